@@ -1,4 +1,4 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from pydantic import BaseModel
 from typing import Dict, Any
 import os
@@ -8,6 +8,8 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from services.ride_client import RideClient
+from api.admission import AdmissionControlMiddleware, RouteLimit, load_route_limits
+from api.encoding import negotiate_media_type, wrap_encoded, encoded_response
 
 app = FastAPI(
     title="Mini-Uber Client API",
@@ -15,6 +17,25 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Admission control: per-user and global token buckets in front of the forwarding routes
+USER_RATE = float(os.getenv("ADMISSION_USER_RATE", 1.0))
+USER_BURST = int(os.getenv("ADMISSION_USER_BURST", 5))
+GLOBAL_RATE = float(os.getenv("ADMISSION_GLOBAL_RATE", 200.0))
+GLOBAL_BURST = int(os.getenv("ADMISSION_GLOBAL_BURST", 400))
+MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", 64))
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", 1024))
+
+app.add_middleware(
+    AdmissionControlMiddleware,
+    limits=load_route_limits(os.getenv("ADMISSION_ROUTE_LIMITS"), [
+        RouteLimit("POST", "/submit-ride", user_rate=USER_RATE, user_burst=USER_BURST,
+                   global_rate=GLOBAL_RATE, global_burst=GLOBAL_BURST, max_in_flight=MAX_IN_FLIGHT),
+        RouteLimit("GET", "/rides", user_rate=USER_RATE, user_burst=USER_BURST,
+                   global_rate=GLOBAL_RATE, global_burst=GLOBAL_BURST, max_in_flight=MAX_IN_FLIGHT),
+    ]),
+    enabled=os.getenv("ADMISSION_CONTROL_ENABLED", "true").lower() == "true",
+)
+
 # Initialize ride client
 ride_client = RideClient()
 
@@ -45,16 +66,15 @@ async def submit_ride_request(ride_request: RideRequestInput):
         raise HTTPException(status_code=500, detail=f"Failed to submit ride request: {str(e)}")
 
 @app.get("/rides")
-async def get_rides(user_id: str = None):
-    """Get all rides or filter by user_id"""
+async def get_rides(request: Request, user_id: str = None):
+    """Get all rides or filter by user_id (JSON, or MessagePack with Accept: application/msgpack)"""
+    media_type = negotiate_media_type(request.headers.get("accept"))
     try:
-        result = ride_client.get_ride_requests(user_id=user_id)
-        return {
-            "status": "success",
-            "data": result
-        }
+        body = ride_client.get_ride_requests_encoded(user_id=user_id, media_type=media_type)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get rides: {str(e)}")
+    # The server's encoded list is placed in the envelope as-is, never decoded here
+    return encoded_response(request, wrap_encoded(body, media_type, status="success"), media_type, RESPONSE_COMPRESSION_MIN_BYTES)
 
 @app.get("/rides/{ride_id}")
 async def get_ride(ride_id: int):
@@ -4,12 +4,16 @@ import os
 # Add the current directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from pydantic import BaseModel
 import requests
 import uvicorn
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from dotenv import load_dotenv
+from api.admission import AdmissionControlMiddleware, RouteLimit, load_route_limits
+from api.encoding import (
+    JSON, MSGPACK, negotiate_media_type, encode, decode, wrap_encoded, encoded_response
+)
 
 load_dotenv()
 
@@ -43,17 +47,33 @@ class RideClient:
         except Exception as e:
             raise Exception(f"Unexpected error: {str(e)}")
     
-    def get_ride_requests(self, user_id: Optional[str] = None) -> Dict[str, Any]:
-        """Get ride requests from server"""
+    def _fetch_ride_requests(self, user_id: Optional[str], media_type: str):
         url = f"{self.server_url}/api/v1/ride-requests"
         params = {"user_id": user_id} if user_id else {}
         
         try:
-            response = self.session.get(url, params=params, timeout=10)
+            # gzip/brotli bodies are decompressed by requests
+            response = self.session.get(url, params=params, headers={"Accept": media_type}, timeout=10)
             response.raise_for_status()
-            return response.json()
         except Exception as e:
             raise Exception(f"Failed to get ride requests: {str(e)}")
+        content_type = response.headers.get("content-type", JSON).split(";")[0].strip()
+        return content_type, response.content
+    
+    def get_ride_requests(self, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get ride requests from server (as MessagePack on the wire when available)"""
+        content_type, body = self._fetch_ride_requests(user_id, negotiate_media_type(f"{MSGPACK}, {JSON};q=0.9"))
+        return decode(body, content_type)
+    
+    def get_ride_requests_encoded(self, user_id: Optional[str] = None, media_type: str = JSON) -> bytes:
+        """
+        Ride requests as an encoded body in media_type. The server's bytes are
+        returned untouched when it answered in that type; otherwise they're transcoded.
+        """
+        content_type, body = self._fetch_ride_requests(user_id, media_type)
+        if content_type != media_type:
+            return encode(decode(body, content_type), media_type)
+        return body
     
     def get_ride_request(self, ride_id: int) -> Dict[str, Any]:
         """Get specific ride request"""
@@ -94,6 +114,25 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Admission control: per-user and global token buckets in front of the forwarding routes
+USER_RATE = float(os.getenv("ADMISSION_USER_RATE", 1.0))
+USER_BURST = int(os.getenv("ADMISSION_USER_BURST", 5))
+GLOBAL_RATE = float(os.getenv("ADMISSION_GLOBAL_RATE", 200.0))
+GLOBAL_BURST = int(os.getenv("ADMISSION_GLOBAL_BURST", 400))
+MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", 64))
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", 1024))
+
+app.add_middleware(
+    AdmissionControlMiddleware,
+    limits=load_route_limits(os.getenv("ADMISSION_ROUTE_LIMITS"), [
+        RouteLimit("POST", "/submit-ride", user_rate=USER_RATE, user_burst=USER_BURST,
+                   global_rate=GLOBAL_RATE, global_burst=GLOBAL_BURST, max_in_flight=MAX_IN_FLIGHT),
+        RouteLimit("GET", "/rides", user_rate=USER_RATE, user_burst=USER_BURST,
+                   global_rate=GLOBAL_RATE, global_burst=GLOBAL_BURST, max_in_flight=MAX_IN_FLIGHT),
+    ]),
+    enabled=os.getenv("ADMISSION_CONTROL_ENABLED", "true").lower() == "true",
+)
+
 @app.post("/submit-ride")
 async def submit_ride_request(ride_request: RideRequestInput):
     """
@@ -116,16 +155,15 @@ async def submit_ride_request(ride_request: RideRequestInput):
         raise HTTPException(status_code=500, detail=f"Failed to submit ride request: {str(e)}")
 
 @app.get("/rides")
-async def get_rides(user_id: str = None):
-    """Get all rides or filter by user_id"""
+async def get_rides(request: Request, user_id: str = None):
+    """Get all rides or filter by user_id (JSON, or MessagePack with Accept: application/msgpack)"""
+    media_type = negotiate_media_type(request.headers.get("accept"))
     try:
-        result = ride_client.get_ride_requests(user_id=user_id)
-        return {
-            "status": "success",
-            "data": result
-        }
+        body = ride_client.get_ride_requests_encoded(user_id=user_id, media_type=media_type)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get rides: {str(e)}")
+    # The server's encoded list is placed in the envelope as-is, never decoded here
+    return encoded_response(request, wrap_encoded(body, media_type, status="success"), media_type, RESPONSE_COMPRESSION_MIN_BYTES)
 
 @app.get("/rides/{ride_id}")
 async def get_ride(ride_id: int):
@@ -1,8 +1,10 @@
 import requests
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import os
 from dotenv import load_dotenv
 
+from api.encoding import JSON, MSGPACK, negotiate_media_type, encode, decode
+
 load_dotenv()
 
 class RideClient:
@@ -34,17 +36,33 @@ class RideClient:
         except Exception as e:
             raise Exception(f"Unexpected error: {str(e)}")
     
-    def get_ride_requests(self, user_id: Optional[str] = None) -> Dict[str, Any]:
-        """Get ride requests from server"""
+    def _fetch_ride_requests(self, user_id: Optional[str], media_type: str):
         url = f"{self.server_url}/api/v1/ride-requests"
         params = {"user_id": user_id} if user_id else {}
         
         try:
-            response = self.session.get(url, params=params, timeout=10)
+            # gzip/brotli bodies are decompressed by requests
+            response = self.session.get(url, params=params, headers={"Accept": media_type}, timeout=10)
             response.raise_for_status()
-            return response.json()
         except Exception as e:
             raise Exception(f"Failed to get ride requests: {str(e)}")
+        content_type = response.headers.get("content-type", JSON).split(";")[0].strip()
+        return content_type, response.content
+    
+    def get_ride_requests(self, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get ride requests from server (as MessagePack on the wire when available)"""
+        content_type, body = self._fetch_ride_requests(user_id, negotiate_media_type(f"{MSGPACK}, {JSON};q=0.9"))
+        return decode(body, content_type)
+    
+    def get_ride_requests_encoded(self, user_id: Optional[str] = None, media_type: str = JSON) -> bytes:
+        """
+        Ride requests as an encoded body in media_type. The server's bytes are
+        returned untouched when it answered in that type; otherwise they're transcoded.
+        """
+        content_type, body = self._fetch_ride_requests(user_id, media_type)
+        if content_type != media_type:
+            return encode(decode(body, content_type), media_type)
+        return body
     
     def get_ride_request(self, ride_id: int) -> Dict[str, Any]:
         """Get specific ride request"""
@@ -0,0 +1 @@
+"""Modules shared by the server and the client API"""
@@ -0,0 +1,280 @@
+"""
+Token-bucket admission control, shared by the server and the client API
+(each re-exports it from its own api/admission.py).
+"""
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+
+class TokenBucket:
+    """Classic token bucket refilled lazily on every take()"""
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """Take one token. Returns 0 on success, otherwise seconds until a token is available"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def refund(self):
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+
+class BucketTable:
+    """Per-key buckets kept in LRU order so the oldest key is evicted in O(1)"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def get(self, key: str, rate: float, capacity: float, now: float) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(rate, capacity, now)
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_size:
+                # An evicted user simply starts again with a full bucket
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class RouteLimit:
+    """
+    Admission limits for one route. path matches the request path exactly,
+    except that a {name} segment matches any single segment, e.g.
+    "/rides/{ride_id}".
+    """
+
+    def __init__(
+        self,
+        method: str,
+        path: str,
+        user_rate: Optional[float] = None,
+        user_burst: int = 5,
+        global_rate: Optional[float] = None,
+        global_burst: int = 100,
+        max_in_flight: int = 64,
+        max_tracked_users: int = 100_000,
+        min_retry_after: float = 1.0,
+    ):
+        self.method = method.upper()
+        self.path = path
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.global_rate = global_rate
+        self.global_burst = global_burst
+        self.max_in_flight = max_in_flight
+        self.min_retry_after = min_retry_after
+        self._segments = self._split(path)
+
+        self.user_buckets = BucketTable(max_tracked_users)
+        self.global_bucket = TokenBucket(global_rate, global_burst, time.monotonic()) if global_rate else None
+
+        # Queue depth, smoothed service time and time between completions, used to size Retry-After
+        self.in_flight = 0
+        self.avg_latency = 0.05
+        self.avg_completion_gap = 0.05
+        self._last_completion: Optional[float] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RouteLimit":
+        return cls(**data)
+
+    @staticmethod
+    def _split(path: str) -> List[str]:
+        return path.rstrip("/").split("/")
+
+    def matches(self, method: str, path: str) -> bool:
+        if method != self.method:
+            return False
+        segments = self._split(path)
+        if len(segments) != len(self._segments):
+            return False
+        return all(
+            pattern == segment or (pattern.startswith("{") and pattern.endswith("}") and segment)
+            for pattern, segment in zip(self._segments, segments)
+        )
+
+    def admit(self, user_id: Optional[str], now: float) -> float:
+        """Take from the user bucket and then the global one. Returns seconds to wait, 0 if admitted"""
+        user_bucket = None
+        if self.user_rate and user_id:
+            user_bucket = self.user_buckets.get(user_id, self.user_rate, self.user_burst, now)
+            wait = user_bucket.take(now)
+            if wait:
+                return wait
+
+        if self.global_bucket is not None:
+            wait = self.global_bucket.take(now)
+            if wait:
+                # Don't charge the user for a request we are not going to serve
+                if user_bucket is not None:
+                    user_bucket.refund()
+                return wait
+
+        return 0.0
+
+    def queue_retry_after(self) -> float:
+        """
+        Seconds until the requests now in flight have drained: in_flight
+        completions at the route's recent completion rate, never less than
+        min_retry_after
+        """
+        return max(self.min_retry_after, self.in_flight * self.avg_completion_gap)
+
+    def record_completion(self, elapsed: float, now: float):
+        self.avg_latency = 0.9 * self.avg_latency + 0.1 * elapsed
+        if self._last_completion is not None:
+            # While requests are in flight the next one finishes within a service time;
+            # capping the gap keeps idle periods from inflating the drain estimate
+            gap = min(now - self._last_completion, self.avg_latency)
+            self.avg_completion_gap = 0.9 * self.avg_completion_gap + 0.1 * gap
+        self._last_completion = now
+
+
+def load_route_limits(raw: Optional[str], defaults: List[RouteLimit]) -> List[RouteLimit]:
+    """Route limits from a JSON list (e.g. the ADMISSION_ROUTE_LIMITS env var), falling back to defaults"""
+    if not raw:
+        return defaults
+    return [RouteLimit.from_dict(item) for item in json.loads(raw)]
+
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware that sheds load before it reaches the database.
+
+    Requests are rejected with 503 when a route already has max_in_flight
+    requests queued, and with 429 when the per-user or global token bucket
+    for the route is empty. Both carry a Retry-After header.
+    """
+
+    MAX_BODY_PEEK = 64 * 1024
+
+    def __init__(self, app, limits: List[RouteLimit], enabled: bool = True):
+        self.app = app
+        self.limits = limits
+        self.enabled = enabled
+
+    def _match(self, scope) -> Optional[RouteLimit]:
+        method = scope.get("method", "")
+        path = scope.get("path", "")
+        for limit in self.limits:
+            if limit.matches(method, path):
+                return limit
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        limit = self._match(scope)
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        if limit.in_flight >= limit.max_in_flight:
+            await self._reject(send, 503, "Server busy, try again later", limit.queue_retry_after())
+            return
+        # Claim the slot before the first await, so requests still sending their bodies count
+        limit.in_flight += 1
+        try:
+            user_id = None
+            if limit.user_rate:
+                user_id, receive = await self._extract_user_id(scope, receive)
+            wait = limit.admit(user_id, time.monotonic())
+        except BaseException:
+            limit.in_flight -= 1
+            raise
+        if wait:
+            limit.in_flight -= 1
+            await self._reject(send, 429, "Rate limit exceeded", wait)
+            return
+
+        start = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limit.in_flight -= 1
+            now = time.monotonic()
+            limit.record_completion(now - start, now)
+
+    async def _extract_user_id(self, scope, receive) -> Tuple[Optional[str], Any]:
+        """
+        Look for user_id in the query string, then in a JSON body. Reads at most
+        MAX_BODY_PEEK bytes; whatever was read is replayed downstream and the
+        rest of a larger body is left for the app to receive.
+        """
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        if query.get("user_id"):
+            return query["user_id"][0], receive
+
+        headers = dict(scope.get("headers") or [])
+        if b"application/json" not in headers.get(b"content-type", b""):
+            return None, receive
+
+        messages = []
+        size = 0
+        more_body = True
+        while more_body and size <= self.MAX_BODY_PEEK:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request":
+                # Client went away; let the app see the disconnect
+                return None, self._replay(messages, receive)
+            size += len(message.get("body", b""))
+            more_body = message.get("more_body", False)
+
+        user_id = None
+        if not more_body and size <= self.MAX_BODY_PEEK:
+            try:
+                data = json.loads(b"".join(m.get("body", b"") for m in messages))
+                if isinstance(data, dict) and data.get("user_id") is not None:
+                    user_id = str(data["user_id"])
+            except ValueError:
+                pass
+
+        return user_id, self._replay(messages, receive)
+
+    @staticmethod
+    def _replay(messages, receive):
+        pending = list(messages)
+
+        async def replay():
+            if pending:
+                return pending.pop(0)
+            return await receive()
+
+        return replay
+
+    @staticmethod
+    async def _reject(send, status_code: int, detail: str, retry_after: float):
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,152 @@
+"""
+Accept-driven response encoding for list endpoints.
+
+Bodies are JSON or MessagePack depending on the Accept header, and are
+compressed with brotli or gzip (per Accept-Encoding) once they pass a
+size threshold. msgpack and brotli are optional: without them the
+negotiation just never picks them.
+
+Shared by the server and the client API; each re-exports it from its
+own api/encoding.py.
+"""
+import gzip
+import json
+from typing import Any, List, Optional, Tuple
+
+from fastapi import Request, Response
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+MEDIA_ALIASES = {"application/x-msgpack": MSGPACK}
+
+DEFAULT_MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4  # well past gzip's ratio at a similar CPU cost; 11 is far slower
+
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        return None
+    return msgpack
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+def available_media_types() -> List[str]:
+    return [MSGPACK, JSON] if _msgpack() else [JSON]
+
+def available_encodings() -> List[str]:
+    return ["br", "gzip"] if _brotli() else ["gzip"]
+
+def _parse_header(header: Optional[str]) -> List[Tuple[str, float]]:
+    """Header values with their q weights, highest first (stable for ties)"""
+    items = []
+    for part in (header or "").split(","):
+        fields = part.strip().split(";")
+        value = fields[0].strip().lower()
+        if not value:
+            continue
+        q = 1.0
+        for param in fields[1:]:
+            name, _, number = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(number)
+                except ValueError:
+                    q = 0.0
+        items.append((value, q))
+    return sorted(items, key=lambda item: -item[1])
+
+def negotiate_media_type(accept: Optional[str]) -> str:
+    """Best media type we can produce for an Accept header; JSON when nothing specific matches"""
+    offered = available_media_types()
+    for value, q in _parse_header(accept):
+        value = MEDIA_ALIASES.get(value, value)
+        if q > 0 and value in offered:
+            return value
+    return JSON
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Preferred compression from Accept-Encoding (brotli before gzip at equal weight), or None"""
+    offered = available_encodings()
+    accepted = {value: q for value, q in _parse_header(accept_encoding)}
+    candidates = [(accepted.get(e, accepted.get("*", 0.0)), -i, e) for i, e in enumerate(offered)]
+    q, _, best = max(candidates)
+    return best if q > 0 else None
+
+def identity_accepted(accept_encoding: Optional[str]) -> bool:
+    """False when Accept-Encoding refuses uncompressed bodies (identity;q=0, or *;q=0 without identity)"""
+    accepted = {value: q for value, q in _parse_header(accept_encoding)}
+    return accepted.get("identity", accepted.get("*", 1.0)) > 0
+
+def encode(data: Any, media_type: str, adapter=None) -> bytes:
+    """
+    Serialize data. With a pydantic TypeAdapter the data is dumped by
+    pydantic (same output as a FastAPI response_model), otherwise it must
+    already be plain JSON types.
+    """
+    if media_type == MSGPACK:
+        if adapter is not None:
+            data = adapter.dump_python(data, mode="json")
+        return _msgpack().packb(data)
+    if adapter is not None:
+        return adapter.dump_json(data)
+    return json.dumps(data, separators=(",", ":")).encode()
+
+def decode(body: bytes, media_type: str) -> Any:
+    if MEDIA_ALIASES.get(media_type, media_type) == MSGPACK:
+        return _msgpack().unpackb(body)
+    return json.loads(body)
+
+def wrap_encoded(body: bytes, media_type: str, **fields) -> bytes:
+    """
+    Encoded {**fields, "data": <body>} built around an already-encoded
+    body without decoding it. Both JSON objects and MessagePack maps can
+    be assembled from their encoded members.
+    """
+    if media_type == MSGPACK:
+        msgpack = _msgpack()
+        items = list(fields.items()) + [("data", None)]
+        if len(items) > 15:
+            raise ValueError("wrap_encoded supports at most 15 fields")
+        head = bytes([0x80 | len(items)])  # fixmap
+        for key, value in items[:-1]:
+            head += msgpack.packb(key) + msgpack.packb(value)
+        return head + msgpack.packb("data") + body
+    head = json.dumps(fields, separators=(",", ":"))[:-1]
+    return (head + ("," if fields else "") + '"data":').encode() + body + b"}"
+
+def compress(body: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == "br":
+        return _brotli().compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+def encoded_response(
+    request: Request, body: bytes, media_type: str, min_compress_size: int = DEFAULT_MIN_COMPRESS_SIZE
+) -> Response:
+    """
+    Response for an encoded body, compressed if it's big enough (or the caller
+    refuses identity) and the caller accepts a compression we have
+    """
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    accept_encoding = request.headers.get("accept-encoding")
+    if len(body) >= min_compress_size or not identity_accepted(accept_encoding):
+        encoding = negotiate_encoding(accept_encoding)
+        if encoding:
+            body = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=media_type, headers=headers)
+
+def negotiated_response(
+    request: Request, data: Any, adapter=None, min_compress_size: int = DEFAULT_MIN_COMPRESS_SIZE
+) -> Response:
+    """Encode data in the media type the caller prefers and build the response"""
+    media_type = negotiate_media_type(request.headers.get("accept"))
+    return encoded_response(request, encode(data, media_type, adapter), media_type, min_compress_size)
@@ -0,0 +1,57 @@
+"""Add ride_requests.source_geohash for proximity search
+
+Revision ID: 0001_ride_source_geohash
+Revises:
+Create Date: 2026-10-19 10:00:00.000000
+
+Tables are created by init_db.py, which already includes this column on a
+new database; there, run `alembic stamp head` instead. On an existing
+database this adds the column and its indexes, then fills it in for rides
+that have pickup coordinates.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from models import geohash
+
+# revision identifiers, used by Alembic.
+revision: str = "0001_ride_source_geohash"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH = 10000
+
+
+def upgrade() -> None:
+    op.add_column(
+        "ride_requests",
+        sa.Column("source_geohash", sa.String(12).with_variant(sa.String(12, collation="C"), "postgresql"), nullable=True),
+    )
+
+    # Backfill in id order, one batch per statement, before building the indexes
+    conn = op.get_bind()
+    select_batch = sa.text(
+        "SELECT id, source_latitude, source_longitude FROM ride_requests "
+        "WHERE id > :after AND source_latitude IS NOT NULL AND source_longitude IS NOT NULL "
+        "ORDER BY id LIMIT :limit"
+    )
+    update = sa.text("UPDATE ride_requests SET source_geohash = :geohash WHERE id = :id")
+    after = 0
+    while True:
+        rows = conn.execute(select_batch, {"after": after, "limit": BACKFILL_BATCH}).fetchall()
+        if not rows:
+            break
+        conn.execute(update, [{"id": row[0], "geohash": geohash.encode(row[1], row[2])} for row in rows])
+        after = rows[-1][0]
+
+    op.create_index("ix_ride_requests_source_geohash", "ride_requests", ["source_geohash"])
+    op.create_index("ix_ride_requests_status_source_geohash", "ride_requests", ["status", "source_geohash"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_ride_requests_status_source_geohash", table_name="ride_requests")
+    op.drop_index("ix_ride_requests_source_geohash", table_name="ride_requests")
+    op.drop_column("ride_requests", "source_geohash")
@@ -0,0 +1,32 @@
+"""Add ride_requests.is_active, which the expiry index and active-ride queries use
+
+Revision ID: 0001b_ride_is_active
+Revises: 0001_ride_source_geohash
+Create Date: 2026-10-19 12:00:00.000000
+
+Existing rides start out active. Databases created by init_db.py after the
+column was added to the model already have it and are left as they are.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0001b_ride_is_active"
+down_revision: Union[str, None] = "0001_ride_source_geohash"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("ride_requests")}
+    if "is_active" not in columns:
+        op.add_column(
+            "ride_requests",
+            sa.Column("is_active", sa.Boolean(), nullable=False, server_default=sa.true()),
+        )
+
+
+def downgrade() -> None:
+    op.drop_column("ride_requests", "is_active")
@@ -0,0 +1,29 @@
+"""Index active rides by status and last change for the expiry sweeper
+
+Revision ID: 0002_ride_expiry_index
+Revises: 0001b_ride_is_active
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_ride_expiry_index"
+down_revision: Union[str, None] = "0001b_ride_is_active"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_ride_requests_active_status_changed",
+        "ride_requests",
+        ["is_active", "status", sa.func.coalesce(sa.column("updated_at"), sa.column("created_at"))],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_ride_requests_active_status_changed", table_name="ride_requests")
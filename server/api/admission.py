@@ -0,0 +1,13 @@
+"""Admission control; shared by the server and the client, see common/admission.py"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from common.admission import (  # noqa: F401
+    AdmissionControlMiddleware,
+    BucketTable,
+    RouteLimit,
+    TokenBucket,
+    load_route_limits,
+)
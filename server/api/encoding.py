@@ -0,0 +1,22 @@
+"""Response encoding; shared by the server and the client, see common/encoding.py"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from common.encoding import (  # noqa: F401
+    JSON,
+    MSGPACK,
+    MEDIA_ALIASES,
+    available_encodings,
+    available_media_types,
+    compress,
+    decode,
+    encode,
+    encoded_response,
+    identity_accepted,
+    negotiate_encoding,
+    negotiate_media_type,
+    negotiated_response,
+    wrap_encoded,
+)
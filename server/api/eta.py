@@ -0,0 +1,40 @@
+import math
+from fastapi import APIRouter, HTTPException
+
+from models.schemas import EtaResponse, EtaBatchRequest, EtaBatchResponse
+from services.eta import get_eta_engine
+
+router = APIRouter()
+
+MAX_BATCH = 500
+
+def _engine():
+    engine = get_eta_engine()
+    if engine is None:
+        raise HTTPException(status_code=503, detail="No road network loaded (set ROAD_GRAPH_PATH)")
+    return engine
+
+@router.get("", response_model=EtaResponse)
+async def get_eta(src_lat: float, src_lon: float, dst_lat: float, dst_lon: float):
+    """Road-network travel time between two points"""
+    seconds = _engine().eta_seconds(src_lat, src_lon, dst_lat, dst_lon)
+    if seconds is None:
+        raise HTTPException(status_code=404, detail="No route between these points")
+    return EtaResponse(seconds=round(seconds, 1), minutes=max(1, math.ceil(seconds / 60)))
+
+@router.post("/one-to-many", response_model=EtaBatchResponse)
+async def get_eta_batch(request: EtaBatchRequest):
+    """Travel times between one origin and many points in a single search (null where unreachable)"""
+    if len(request.points) > MAX_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH} points per request")
+    seconds = _engine().eta_one_to_many(
+        request.origin.lat, request.origin.lon,
+        [(p.lat, p.lon) for p in request.points],
+        reverse=request.reverse,
+    )
+    return EtaBatchResponse(seconds=[None if s is None else round(s, 1) for s in seconds])
+
+@router.get("/stats")
+async def get_eta_stats():
+    """Graph size, router in use and cache hit counts"""
+    return _engine().stats()
@@ -1,17 +1,47 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Union, get_args
+from datetime import datetime
 
-from ..models.database import get_db
-from ..models.schemas import (
+from models.database import get_db, get_read_db, pool_stats
+from models.schemas import (
     PingRequest, PingResponse, 
-    RideRequestCreate, RideRequestResponse
+    NearbyRideResponse, RideRequestCreate, RideRequestResponse, RideRequestWithUserResponse, RideStatus, RideStatusUpdate
 )
-from ..services.ride_service import RideService
-from ..config import settings
+from services.ride_service import RideService
+from services.ride_store import OPEN_STATUSES, get_ride_store
+from services.export import stream_csv, stream_parquet
+from api.encoding import negotiated_response
+from services.event_log import get_event_log
+from services.expiry import get_expiry_sweeper
+from config import settings
 
 router = APIRouter()
 
+ride_list_adapter = TypeAdapter(List[RideRequestResponse])
+ride_with_user_list_adapter = TypeAdapter(List[RideRequestWithUserResponse])
+
+EXPANSIONS = {"user"}
+
+def _expand_user(expand: Optional[str]) -> bool:
+    """Parse ?expand=user (comma separated, for future expansions)"""
+    requested = {part.strip() for part in (expand or "").split(",") if part.strip()}
+    unknown = requested - EXPANSIONS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown expand value(s): {', '.join(sorted(unknown))}")
+    return "user" in requested
+
+def _with_users(ride_service: RideService, rides: List) -> List[RideRequestWithUserResponse]:
+    profiles = ride_service.get_rider_profiles(rides)
+    return [
+        RideRequestWithUserResponse.model_construct(
+            **RideRequestResponse.model_validate(ride).__dict__, user=profiles.get(ride.user_id)
+        )
+        for ride in rides
+    ]
+
 @router.post("/ping", response_model=PingResponse)
 async def ping_endpoint(request: PingRequest):
     """Test endpoint for ping-pong functionality"""
@@ -30,26 +60,7 @@ async def submit_ride_request(
     try:
         ride_service = RideService(db)
         
-        # If PostgreSQL is not available, just print the data
-        if not settings.USE_POSTGRES:
-            print("=" * 50)
-            print("We will store this data in Postgres now")
-            print(f"User ID: {ride_request.user_id}")
-            print(f"Source Location: {ride_request.source_location}")
-            print(f"Destination Location: {ride_request.dest_location}")
-            print("=" * 50)
-            
-            # Return a mock response
-            return RideRequestResponse(
-                id=999,  # Mock ID
-                user_id=ride_request.user_id,
-                source_location=ride_request.source_location,
-                dest_location=ride_request.dest_location,
-                created_at=datetime.utcnow(),
-                status="pending"
-            )
-        
-        # Store in actual database
+        # Stored in Postgres, or in memory when USE_POSTGRES is false
         db_ride = ride_service.create_ride_request(ride_request)
         return RideRequestResponse.from_orm(db_ride)
         
@@ -57,38 +68,156 @@ async def submit_ride_request(
         print(f"Error creating ride request: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to create ride request")
 
-@router.get("/ride-requests", response_model=List[RideRequestResponse])
+@router.get("/ride-requests", response_model=List[Union[RideRequestWithUserResponse, RideRequestResponse]])
 async def get_ride_requests(
+    request: Request,
     user_id: str = None,
-    db: Session = Depends(get_db)
+    expand: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
-    """Get all ride requests or filter by user_id"""
+    """
+    Get all ride requests or filter by user_id. expand=user includes each rider's profile.
+    Send Accept: application/msgpack for MessagePack; large bodies are gzip/brotli compressed per Accept-Encoding.
+    """
+    expand_user = _expand_user(expand)
     try:
         ride_service = RideService(db)
-        rides = ride_service.get_ride_requests(user_id=user_id)
-        return [RideRequestResponse.from_orm(ride) for ride in rides]
+        rides = ride_service.get_ride_requests(user_id=user_id, expand_user=expand_user)
+        if expand_user:
+            adapter, payload = ride_with_user_list_adapter, _with_users(ride_service, rides)
+        else:
+            adapter, payload = ride_list_adapter, ride_list_adapter.validate_python(rides, from_attributes=True)
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to fetch ride requests")
+    return negotiated_response(
+        request, payload, adapter=adapter, min_compress_size=settings.RESPONSE_COMPRESSION_MIN_BYTES
+    )
 
-@router.get("/ride-requests/{ride_id}", response_model=RideRequestResponse)
+# Declared before /ride-requests/{ride_id} so "near" isn't taken for an id
+@router.get("/ride-requests/near", response_model=List[NearbyRideResponse])
+async def get_nearby_ride_requests(
+    lat: float,
+    lon: float,
+    radius_m: float = 2000,
+    status: str = ",".join(OPEN_STATUSES),
+    limit: int = 100,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Rides picked up within radius_m meters of (lat, lon), closest first.
+    status is a comma separated list and defaults to open rides (requested, accepted).
+    """
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise HTTPException(status_code=400, detail="lat must be within [-90, 90] and lon within [-180, 180]")
+    if not 0 < radius_m <= settings.NEARBY_MAX_RADIUS_M:
+        raise HTTPException(status_code=400, detail=f"radius_m must be between 0 and {settings.NEARBY_MAX_RADIUS_M:g}")
+    statuses = sorted({part.strip() for part in status.split(",") if part.strip()})
+    unknown = set(statuses) - set(get_args(RideStatus))
+    if not statuses or unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown status value(s): {', '.join(sorted(unknown)) or status}")
+    limit = max(1, min(limit, 1000))
+
+    ride_service = RideService(db)
+    return [
+        NearbyRideResponse.model_construct(**RideRequestResponse.model_validate(ride).__dict__,
+                                           source_latitude=ride.source_latitude,
+                                           source_longitude=ride.source_longitude,
+                                           distance_m=round(distance, 1))
+        for ride, distance in ride_service.find_nearby_rides(lat, lon, radius_m, statuses, limit)
+    ]
+
+@router.get("/ride-requests/{ride_id}", response_model=Union[RideRequestWithUserResponse, RideRequestResponse])
 async def get_ride_request(
     ride_id: int,
+    expand: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Get a specific ride request (pass user_id to read your own recent writes; expand=user for the rider)"""
+    expand_user = _expand_user(expand)
+    ride_service = RideService(db)
+    ride = ride_service.get_ride_request(ride_id, expand_user=expand_user)
+    
+    if not ride:
+        raise HTTPException(status_code=404, detail="Ride request not found")
+    
+    if expand_user:
+        return _with_users(ride_service, [ride])[0]
+    return RideRequestResponse.from_orm(ride)
+
+@router.patch("/ride-requests/{ride_id}/status", response_model=RideRequestResponse)
+async def update_ride_status(
+    ride_id: int,
+    update: RideStatusUpdate,
     db: Session = Depends(get_db)
 ):
-    """Get a specific ride request"""
+    """Move a ride to a new status"""
     ride_service = RideService(db)
-    ride = ride_service.get_ride_request(ride_id)
+    ride = ride_service.update_ride_status(ride_id, update.status)
     
     if not ride:
         raise HTTPException(status_code=404, detail="Ride request not found")
     
     return RideRequestResponse.from_orm(ride)
 
+@router.get("/exports/ride-requests")
+async def export_ride_requests(
+    format: str = "csv",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    status: Optional[str] = None,
+    user_id: Optional[str] = None,
+    after_id: int = 0,
+    chunk_size: int = 5000,
+    row_group_size: int = 100000,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Stream ride requests as CSV or Parquet, in id order, without loading the table.
+    To resume an interrupted download, pass the last id received as after_id.
+    """
+    store = get_ride_store(db)
+    filters = {"start": start, "end": end, "status": status, "user_id": user_id}
+    chunk_size = max(1, min(chunk_size, 50000))
+    if format == "csv":
+        body = stream_csv(store, chunk_size, after_id=after_id, **filters)
+        media_type = "text/csv"
+    elif format == "parquet":
+        body = stream_parquet(store, chunk_size, max(1, row_group_size), after_id=after_id, **filters)
+        media_type = "application/vnd.apache.parquet"
+    else:
+        raise HTTPException(status_code=400, detail="format must be 'csv' or 'parquet'")
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="ride_requests.{format}"'}
+    )
+
+@router.get("/db/pool")
+async def get_pool_stats():
+    """Live connection pool statistics (checkouts, overflow, wait histogram, connection ages)"""
+    return pool_stats()
+
+@router.get("/events/log")
+async def get_event_log_stats():
+    """Ride event log position and group-commit statistics for this process"""
+    log = get_event_log()
+    if log is None:
+        raise HTTPException(status_code=404, detail="Event log is disabled (set EVENT_LOG_DIR)")
+    return log.stats()
+
+@router.get("/expiry/sweeper")
+async def get_expiry_stats():
+    """Stale ride expiry: TTLs, sweep durations and rides expired per status in this process"""
+    sweeper = get_expiry_sweeper()
+    if sweeper is None:
+        raise HTTPException(status_code=404, detail="Ride expiry is disabled (set RIDE_EXPIRY_TTLS)")
+    return sweeper.to_dict()
+
 @router.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy", 
         "service": "mini-uber-server",
-        "database": "postgres" if settings.USE_POSTGRES else "sqlite"
+        "database": "postgres" if settings.USE_POSTGRES else "memory"
     }
\ No newline at end of file
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, HTTPException, Depends
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import datetime, date, timedelta, timezone
+
+from models.database import get_read_db
+from models.schemas import HourlyRideStat, DailyActiveUsersStat, UserRideStatResponse
+from services.ride_store import get_ride_rollups
+
+# Every endpoint here reads the rollup tables kept by services/analytics.py,
+# never ride_requests, so response time doesn't grow with the number of rides.
+router = APIRouter()
+
+MAX_HOURS = 24 * 31
+MAX_DAYS = 366
+
+@router.get("/hourly", response_model=List[HourlyRideStat])
+async def get_hourly_stats(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    status: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Rides entering each status per hour (default: the last 24 hours)"""
+    end = end or datetime.now(timezone.utc)
+    start = start or end - timedelta(hours=24)
+    if start > end or end - start > timedelta(hours=MAX_HOURS):
+        raise HTTPException(status_code=400, detail=f"Range must be between 0 and {MAX_HOURS} hours")
+    return get_ride_rollups(db).hourly(start, end, status=status)
+
+@router.get("/daily-active-users", response_model=List[DailyActiveUsersStat])
+async def get_daily_active_users(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Distinct users requesting rides per day (default: the last 7 days)"""
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end - timedelta(days=6)
+    if start > end or (end - start).days > MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range must be between 0 and {MAX_DAYS} days")
+    return get_ride_rollups(db).daily_active_users(start, end)
+
+@router.get("/users/{user_id}", response_model=UserRideStatResponse)
+async def get_user_stats(user_id: str, db: Session = Depends(get_read_db)):
+    """Lifetime ride count for a user"""
+    stats = get_ride_rollups(db).user_stats(user_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="No rides for this user")
+    return stats
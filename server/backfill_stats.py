@@ -0,0 +1,39 @@
+import sys
+import os
+import argparse
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.database import SessionLocal, create_tables, test_connection
+from services.analytics import backfill_rollups
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the ride analytics rollup tables")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    print("📊 Rebuilding ride analytics rollups...")
+    if not test_connection():
+        print("❌ Failed to connect to database. Please check your configuration.")
+        return False
+
+    # Make sure the rollup tables exist on databases created before they were added
+    create_tables()
+
+    db = SessionLocal()
+    try:
+        processed = backfill_rollups(db, chunk_size=args.chunk_size)
+        print(f"✅ Rolled up {processed} ride requests")
+        return True
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Backfill failed: {e}")
+        return False
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    success = main()
+    if not success:
+        sys.exit(1)
@@ -0,0 +1,115 @@
+"""
+Load test for the admission control middleware.
+
+Runs entirely in-process: a fake ASGI endpoint stands in for
+POST /api/v1/ride-request and queues on a small "connection pool"
+with a fixed query time, the way the real route queues on Postgres.
+One abusive integration floods the route while a set of normal users
+submit at a polite rate. We report the latency seen by normal users
+with admission control off and on.
+
+Usage: python benchmarks/admission_load_test.py [--seconds 5]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.admission import AdmissionControlMiddleware, RouteLimit
+
+POOL_SIZE = 10
+QUERY_TIME = 0.005
+
+
+def make_db_app():
+    pool = asyncio.Semaphore(POOL_SIZE)
+
+    async def app(scope, receive, send):
+        await receive()
+        async with pool:
+            await asyncio.sleep(QUERY_TIME)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    return app
+
+
+async def call(app, user_id: str) -> int:
+    body = json.dumps({"user_id": user_id, "source_location": "a", "dest_location": "b"}).encode()
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/api/v1/ride-request",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json")],
+    }
+    status = {}
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status["code"] = message["status"]
+
+    await app(scope, receive, send)
+    return status["code"]
+
+
+async def run(app, seconds: float, abusers: int, users: int):
+    deadline = time.monotonic() + seconds
+    latencies = []
+    abuser_status = {}
+
+    async def abuser():
+        while time.monotonic() < deadline:
+            code = await call(app, "abuser")
+            abuser_status[code] = abuser_status.get(code, 0) + 1
+            if code != 200:
+                await asyncio.sleep(0)
+
+    async def normal_user(n: int):
+        while time.monotonic() < deadline:
+            start = time.monotonic()
+            await call(app, f"user_{n}")
+            latencies.append(time.monotonic() - start)
+            await asyncio.sleep(0.2)
+
+    await asyncio.gather(*[abuser() for _ in range(abusers)], *[normal_user(n) for n in range(users)])
+    return latencies, abuser_status
+
+
+def report(label: str, latencies, abuser_status):
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{label:<24} normal p50={p50:7.2f}ms p99={p99:7.2f}ms  abuser responses={abuser_status}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--abusers", type=int, default=200, help="concurrent connections from the abuser")
+    parser.add_argument("--users", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"🔥 {args.abusers} abusive connections vs {args.users} normal users for {args.seconds}s "
+          f"(pool={POOL_SIZE}, query={QUERY_TIME * 1000:.0f}ms)")
+
+    unprotected = make_db_app()
+    report("no admission control", *asyncio.run(run(unprotected, args.seconds, args.abusers, args.users)))
+
+    protected = AdmissionControlMiddleware(make_db_app(), [
+        RouteLimit("POST", "/api/v1/ride-request", user_rate=5, user_burst=10,
+                   global_rate=1000, global_burst=200, max_in_flight=POOL_SIZE * 2),
+    ])
+    report("with admission control", *asyncio.run(run(protected, args.seconds, args.abusers, args.users)))
+
+
+if __name__ == "__main__":
+    main()
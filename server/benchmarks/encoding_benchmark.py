@@ -0,0 +1,89 @@
+"""
+Bytes and CPU per ride-list response for each negotiated encoding.
+
+For N rides this times, in-process:
+  - server: serialize the list (pydantic -> JSON / MessagePack) and compress it
+  - consumer: decompress and decode it
+  - client tier: the old path (decode the server's JSON, re-wrap in
+    {"status", "data"} and re-encode) vs passing the server's bytes
+    through inside the envelope
+
+Usage: python benchmarks/encoding_benchmark.py [--rides 5000] [--repeat 20]
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def timed_ms(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) * 1000 / repeat
+
+def decompress(body: bytes, encoding):
+    import brotli
+
+    if encoding == "br":
+        return brotli.decompress(body)
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    return body
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rides", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    from pydantic import TypeAdapter
+    from api.encoding import JSON, MSGPACK, encode, decode, compress, wrap_encoded
+    from models.schemas import RideRequestResponse
+
+    rng = random.Random(3)
+    places = ["Koramangala", "Indiranagar", "Whitefield", "HSR Layout", "MG Road", "Hebbal", "Jayanagar"]
+    now = datetime.now(timezone.utc)
+    adapter = TypeAdapter(List[RideRequestResponse])
+    rides = adapter.validate_python([
+        {
+            "id": i + 1, "user_id": f"user_{rng.randrange(2000)}",
+            "source_location": rng.choice(places), "dest_location": rng.choice(places),
+            "created_at": now - timedelta(seconds=rng.randrange(86400)),
+            "status": rng.choice(["requested", "accepted", "completed"]),
+            "estimated_duration": rng.randrange(5, 60),
+        }
+        for i in range(args.rides)
+    ])
+
+    print(f"📦 {args.rides} rides, mean of {args.repeat} runs")
+    print(f"  {'encoding':<26}{'bytes':>10}{'server ms':>12}{'consumer ms':>13}")
+    for media_type in (JSON, MSGPACK):
+        for encoding in (None, "gzip", "br"):
+            body = compress(encode(rides, media_type, adapter), encoding)
+            server_ms = timed_ms(lambda: compress(encode(rides, media_type, adapter), encoding), args.repeat)
+            consumer_ms = timed_ms(lambda: decode(decompress(body, encoding), media_type), args.repeat)
+            label = f"{media_type.split('/')[1]}{' + ' + encoding if encoding else ''}"
+            print(f"  {label:<26}{len(body):>10,}{server_ms:>12.2f}{consumer_ms:>13.2f}")
+
+    print("🔁 client tier, per /rides response (uncompressed)")
+    server_json = encode(rides, JSON, adapter)
+    server_msgpack = encode(rides, MSGPACK, adapter)
+    old = timed_ms(lambda: json.dumps({"status": "success", "data": json.loads(server_json)}).encode(), args.repeat)
+    passthrough_json = timed_ms(lambda: wrap_encoded(server_json, JSON, status="success"), args.repeat)
+    passthrough_msgpack = timed_ms(lambda: wrap_encoded(server_msgpack, MSGPACK, status="success"), args.repeat)
+    print(f"  {'decode + re-wrap (JSON)':<32}{old:>9.2f}ms")
+    print(f"  {'pass-through (JSON)':<32}{passthrough_json:>9.2f}ms")
+    print(f"  {'pass-through (MessagePack)':<32}{passthrough_msgpack:>9.2f}ms")
+    assert json.loads(wrap_encoded(server_json, JSON, status="success"))["data"] == json.loads(server_json)
+    assert decode(wrap_encoded(server_msgpack, MSGPACK, status="success"), MSGPACK)["data"] == decode(server_msgpack, MSGPACK)
+    print("✅ pass-through envelopes decode to the same data")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+ETA engine latency on a synthetic city road network.
+
+Builds a jittered grid (arterials every 10th street, some one-way
+streets, some missing blocks), writes it in the road-network file
+format, builds the contraction hierarchy, and times point-to-point
+queries with bidirectional A* and with the hierarchy, cached queries and
+one-to-many queries. A sample of queries is checked against plain Dijkstra.
+
+Usage: python benchmarks/eta_benchmark.py [--size 300] [--queries 500] [--keep road.txt] [--no-hierarchy]
+"""
+import argparse
+import heapq
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CENTER = (12.9716, 77.5946)
+SPACING_DEG = 0.0009  # ~100m
+
+def write_city(path: str, size: int, seed: int = 7):
+    rng = random.Random(seed)
+    lat0 = CENTER[0] - size * SPACING_DEG / 2
+    lon0 = CENTER[1] - size * SPACING_DEG / 2
+    with open(path, "w") as f:
+        f.write(f"# synthetic {size}x{size} grid\n")
+        for r in range(size):
+            for c in range(size):
+                lat = lat0 + r * SPACING_DEG + rng.uniform(-0.2, 0.2) * SPACING_DEG
+                lon = lon0 + c * SPACING_DEG + rng.uniform(-0.2, 0.2) * SPACING_DEG
+                f.write(f"N {r * size + c} {lat:.6f} {lon:.6f}\n")
+        for r in range(size):
+            for c in range(size):
+                for dr, dc in ((0, 1), (1, 0)):
+                    r2, c2 = r + dr, c + dc
+                    if r2 >= size or c2 >= size:
+                        continue
+                    arterial = (r % 10 == 0 and dr == 0) or (c % 10 == 0 and dc == 0)
+                    if not arterial and rng.random() < 0.08:
+                        continue
+                    kph = rng.uniform(35, 50) if arterial else rng.uniform(12, 25)
+                    seconds = 100 / (kph / 3.6)
+                    oneway = 1 if not arterial and rng.random() < 0.15 else 0
+                    u, v = r * size + c, r2 * size + c2
+                    if oneway and rng.random() < 0.5:
+                        u, v = v, u
+                    f.write(f"E {u} {v} {seconds:.2f} {oneway}\n")
+
+def dijkstra(graph, source: int, target: int):
+    dist = {source: 0.0}
+    heap = [(0.0, source)]
+    while heap:
+        d, u = heapq.heappop(heap)
+        if u == target:
+            return d
+        if d > dist[u]:
+            continue
+        for i in range(graph.offsets[u], graph.offsets[u + 1]):
+            v, nd = graph.targets[i], d + graph.weights[i]
+            if nd < dist.get(v, float("inf")):
+                dist[v] = nd
+                heapq.heappush(heap, (nd, v))
+    return None
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+def report(label, samples_ms):
+    print(f"  {label:<32} p50 {percentile(samples_ms, 0.5):8.2f}ms  p95 {percentile(samples_ms, 0.95):8.2f}ms"
+          f"  max {max(samples_ms):8.2f}ms")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=300, help="grid side; nodes = size^2")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--batch", type=int, default=50, help="destinations per one-to-many query")
+    parser.add_argument("--verify", type=int, default=20)
+    parser.add_argument("--keep", default=None, help="write the road file here instead of a temp dir")
+    parser.add_argument("--no-hierarchy", action="store_true", help="skip contraction (A* only)")
+    args = parser.parse_args()
+
+    from services.eta import EtaEngine, RoadGraph
+
+    path = args.keep or os.path.join(tempfile.mkdtemp(prefix="miniuber_eta_"), "road.txt")
+    started = time.perf_counter()
+    write_city(path, args.size)
+    print(f"🗺️  wrote {args.size}x{args.size} city to {path} in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    graph = RoadGraph.from_file(path)
+    print(f"📦 parsed {graph.node_count:,} nodes / {graph.edge_count:,} edges in {time.perf_counter() - started:.1f}s")
+    if not args.no_hierarchy:
+        started = time.perf_counter()
+        hierarchy = graph.build_hierarchy()
+        graph.save_cache(path + ".csr")
+        print(f"🔺 contracted into {hierarchy.edge_count:,} hierarchy edges in {time.perf_counter() - started:.1f}s")
+    started = time.perf_counter()
+    graph = RoadGraph.from_file(path)
+    print(f"📦 reloaded from .csr cache in {time.perf_counter() - started:.2f}s")
+
+    span = args.size * SPACING_DEG
+
+    def points(rng, n):
+        return [(CENTER[0] - span / 2 + rng.random() * span, CENTER[1] - span / 2 + rng.random() * span)
+                for _ in range(n)]
+
+    rng = random.Random(1)
+    pairs = list(zip(points(rng, args.queries), points(rng, args.queries)))
+    dispatches = [(points(rng, 1)[0], points(rng, args.batch)) for _ in range(max(1, args.queries // 10))]
+
+    print("⏱️  latency")
+    engines = [("A*", EtaEngine(graph))]
+    engines[0][1].router = graph
+    if graph.hierarchy is not None:
+        engines.append(("CH", EtaEngine(graph)))
+    for name, engine in engines:
+        for label in ("uncached", "cached"):
+            samples = []
+            for (a, b) in pairs:
+                t = time.perf_counter()
+                engine.eta_seconds(a[0], a[1], b[0], b[1])
+                samples.append((time.perf_counter() - t) * 1000)
+            report(f"{name} point-to-point ({label})", samples)
+
+        samples = []
+        for pickup, drivers in dispatches:
+            t = time.perf_counter()
+            engine.eta_one_to_many(pickup[0], pickup[1], drivers, reverse=True)
+            samples.append((time.perf_counter() - t) * 1000)
+        report(f"{name} {args.batch} drivers -> pickup", samples)
+
+    routers = [("A*", graph)] + ([("CH", graph.hierarchy)] if graph.hierarchy else [])
+    for name, router in routers:
+        mismatches = 0
+        for (a, b) in pairs[:args.verify]:
+            s, _ = engine.snap(*a)
+            t, _ = engine.snap(*b)
+            expected, got = dijkstra(graph, s, t), router.shortest_time(s, t)
+            if (expected is None) != (got is None) or (expected is not None and abs(expected - got) > 1e-6):
+                mismatches += 1
+        print(f"{'✅' if not mismatches else '❌'} {name}: {args.verify - mismatches}/{args.verify} queries match plain Dijkstra")
+    print(f"📊 {engine.stats()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Event log append and replay throughput.
+
+Appends ride events with 1..N writer threads, with group-committed
+fsync and without fsync, to show how many records share each fsync.
+It then replays the log with a memory-mapped reader, first walking raw
+records only and then decoding every event, across small segments so
+segment hand-off is included.
+
+Usage: python benchmarks/event_log_benchmark.py [--events 200000] [--replay-events 2000000]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.event_log import EventLog, LogReader, decode_event, encode_event
+
+def append_run(directory: str, events: int, threads: int, sync: bool, segment_bytes: int):
+    log = EventLog(directory, segment_bytes=segment_bytes, sync=sync)
+    payloads = [
+        encode_event("created" if i % 3 else "status_changed", i + 1, f"user_{i % 5000}", "requested",
+                     datetime.now(timezone.utc))
+        for i in range(min(events, 10000))
+    ]
+    per_thread = events // threads
+
+    def writer(start: int):
+        for i in range(per_thread):
+            log.append(payloads[(start + i) % len(payloads)])
+
+    workers = [threading.Thread(target=writer, args=(t * per_thread,)) for t in range(threads)]
+    started = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    log.flush()
+    elapsed = time.perf_counter() - started
+    stats = log.stats()
+    log.close()
+    return per_thread * threads / elapsed, stats
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=200000, help="events per append run")
+    parser.add_argument("--threads", default="1,8,32")
+    parser.add_argument("--replay-events", type=int, default=2000000)
+    parser.add_argument("--segment-bytes", type=int, default=16 * 1024 * 1024)
+    parser.add_argument("--dir", default=None, help="where to put the logs (default: a temp dir)")
+    args = parser.parse_args()
+
+    root = args.dir or tempfile.mkdtemp(prefix="miniuber_eventlog_")
+    try:
+        print("✍️  append")
+        for sync in (True, False):
+            for threads in [int(t) for t in args.threads.split(",")]:
+                directory = os.path.join(root, f"append-{sync}-{threads}")
+                # fsync per group is slow on some disks; keep the synced runs shorter
+                events = args.events if not sync else max(threads, args.events // 10)
+                rate, stats = append_run(directory, events, threads, sync, args.segment_bytes)
+                label = f"{'fsync' if sync else 'no fsync'}, {threads} writer(s)"
+                print(f"  {label:<26} {rate:12,.0f} events/s  records/fsync {stats['records_per_fsync']}"
+                      f"  fsync avg {stats['fsync_ms_avg']}ms")
+                shutil.rmtree(directory)
+
+        directory = os.path.join(root, "replay")
+        started = time.perf_counter()
+        append_run(directory, args.replay_events, 1, False, args.segment_bytes)
+        size = sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory) if f.endswith(".log"))
+        segments = len([f for f in os.listdir(directory) if f.endswith(".log")])
+        print(f"📦 wrote {args.replay_events:,} events ({size / 1e6:.1f}MB, {segments} segments) "
+              f"in {time.perf_counter() - started:.1f}s")
+
+        print("🔁 replay from offset 0")
+        reader = LogReader(directory, 0)
+        started = time.perf_counter()
+        count = sum(1 for _ in reader)
+        elapsed = time.perf_counter() - started
+        reader.close()
+        print(f"  {'raw records (zero-copy)':<26} {count / elapsed:12,.0f} events/s  {size / elapsed / 1e6:8.1f}MB/s")
+
+        reader = LogReader(directory, 0)
+        started = time.perf_counter()
+        count = 0
+        last = None
+        for offset, payload in reader:
+            last = decode_event(offset, payload)
+            count += 1
+        elapsed = time.perf_counter() - started
+        reader.close()
+        print(f"  {'decoded events':<26} {count / elapsed:12,.0f} events/s  {size / elapsed / 1e6:8.1f}MB/s")
+
+        # Resuming from the last offset reads just the last event
+        reader = LogReader(directory, last.offset)
+        resumed = list(reader.events())
+        reader.close()
+        ok = count == args.replay_events and len(resumed) == 1 and resumed[0] == last
+        print(f"{'✅' if ok else '❌'} replayed {count:,} events; resume from offset {last.offset} returns the last one")
+    finally:
+        if not args.dir:
+            shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Rows/second and peak RSS of export_rides.py.
+
+Seeds a ride_requests table (a local SQLite file unless --database-url
+is given) and runs each export in a child process, so the reported peak
+RSS belongs to the export alone. The default of 10M rows matches the
+target table size; use --rows for a quicker run.
+
+Usage: python benchmarks/export_benchmark.py [--rows 10000000] [--skip-seed]
+"""
+import argparse
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(SERVER_DIR)
+
+def seed(rows: int, batch: int = 50000):
+    from sqlalchemy import insert, func, select
+    from models.database import get_engine, create_tables
+    from models.model import RideRequest
+
+    create_tables()
+    engine = get_engine()
+    with engine.begin() as conn:
+        existing = conn.execute(select(func.count()).select_from(RideRequest)).scalar()
+    if existing >= rows:
+        print(f"🌱 Table already has {existing} rows")
+        return
+
+    print(f"🌱 Seeding {rows - existing} rows...")
+    rng = random.Random(7)
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    statuses = ["requested", "accepted", "completed", "cancelled"]
+    table = RideRequest.__table__
+    for offset in range(existing, rows, batch):
+        n = min(batch, rows - offset)
+        with engine.begin() as conn:
+            conn.execute(insert(table), [{
+                "user_id": f"user_{rng.randrange(100000)}",
+                "source_location": "123 Main St",
+                "dest_location": "456 Oak Ave",
+                "source_latitude": 12.9 + rng.random() / 10,
+                "source_longitude": 77.5 + rng.random() / 10,
+                "dest_latitude": 12.9 + rng.random() / 10,
+                "dest_longitude": 77.5 + rng.random() / 10,
+                "status": rng.choice(statuses),
+                "is_active": True,
+                "estimated_fare": round(rng.uniform(50, 900), 2),
+                "distance": round(rng.uniform(1, 30), 2),
+                "created_at": base + timedelta(seconds=offset + i),
+            } for i in range(n)])
+
+# Runs export_rides.py in a fresh interpreter and reports that process' own peak RSS
+CHILD = """
+import resource, runpy, sys
+sys.argv = sys.argv[1:]
+runpy.run_path(sys.argv[0], run_name="__main__")
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, file=sys.stderr)
+"""
+
+def run_export(fmt: str, output: str, extra):
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD, os.path.join(SERVER_DIR, "export_rides.py"), output, "--format", fmt, *extra],
+        check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, env=os.environ,
+    )
+    elapsed = time.perf_counter() - started
+    # ru_maxrss is in KiB on Linux
+    peak_mb = int(result.stderr.strip().splitlines()[-1]) / 1024
+    return elapsed, peak_mb
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--skip-seed", action="store_true")
+    parser.add_argument("--formats", default="csv,parquet")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="miniuber_export_")
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tmp_dir, 'rides.db')}"
+    try:
+        if not args.skip_seed:
+            seed(args.rows)
+        for fmt in args.formats.split(","):
+            output = os.path.join(tmp_dir, f"rides.{fmt}")
+            elapsed, peak_mb = run_export(fmt, output, ["--chunk-size", str(args.chunk_size)])
+            print(f"📤 {fmt:<8} {args.rows:>11,} rows  {elapsed:8.1f}s  {args.rows / elapsed:12,.0f} rows/s  "
+                  f"peak RSS {peak_mb:7.1f} MB")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+"Open rides within 2km" latency as ride_requests grows.
+
+The table is grown to each size with synthetic rides. The number of
+open (requested/accepted) rides stays fixed and every added ride is
+completed history, as in production. At each size the same pickup
+points are queried three ways:
+
+  near (open)     RideService.find_nearby_rides: geohash ranges on
+                  (status, source_geohash), then exact distance
+  scan (open)     the old way: a bounding box on the unindexed lat/lon columns
+  near (any)      find_nearby_rides over every status, where the rides
+                  around each point grow with the table and only the
+                  widening search keeps the work near `limit` rows
+
+The p50 growth ratios at the end show the indexed search staying nearly flat
+while the scan grows with the row count.
+
+Usage: python benchmarks/near_benchmark.py [--sizes 10000,100000,1000000] [--open 2000]
+"""
+import argparse
+import math
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+OPEN_STATUSES = ("requested", "accepted")
+ALL_STATUSES = ("requested", "accepted", "completed", "cancelled")
+
+def rides(count: int, open_rides: int, seed: int):
+    """generate_rides rows where only the first open_rides are still open"""
+    from synthetic_data import RIDE_COLUMNS, generate_rides
+
+    status = RIDE_COLUMNS.index("status")
+    for i, row in enumerate(generate_rides(count, users=10000, seed=seed)):
+        row[status] = OPEN_STATUSES[i % 2] if i < open_rides else "completed"
+        yield row
+
+def scan(db, lat: float, lon: float, radius_m: float, statuses, limit: int):
+    """Bounding box on source_latitude/longitude (no index), exact distance in Python"""
+    from sqlalchemy import select
+    from models import geohash
+    from models.model import RideRequest
+    from services.ride_store import _closest
+
+    dlat = radius_m / geohash.METERS_PER_DEGREE
+    dlon = dlat / max(0.01, math.cos(math.radians(lat)))
+    candidates = db.execute(
+        select(RideRequest.id, RideRequest.source_latitude, RideRequest.source_longitude).where(
+            RideRequest.is_active == True,
+            RideRequest.status.in_(statuses),
+            RideRequest.source_latitude.between(lat - dlat, lat + dlat),
+            RideRequest.source_longitude.between(lon - dlon, lon + dlon),
+        )
+    )
+    return _closest(lat, lon, radius_m, limit, candidates)
+
+def measure(db, points, radius_m: float, limit: int):
+    from services.ride_service import RideService
+    from services.ride_store import SqlRideStore
+
+    service = RideService(db, store=SqlRideStore(db))
+    runs = {
+        "near (open)": lambda lat, lon: service.find_nearby_rides(lat, lon, radius_m, OPEN_STATUSES, limit),
+        "scan (open)": lambda lat, lon: scan(db, lat, lon, radius_m, OPEN_STATUSES, limit),
+        "near (any)": lambda lat, lon: service.find_nearby_rides(lat, lon, radius_m, ALL_STATUSES, limit),
+    }
+    results = {}
+    for name, fn in runs.items():
+        samples, found = [], 0
+        for lat, lon in points:
+            started = time.perf_counter()
+            found += len(fn(lat, lon))
+            samples.append(time.perf_counter() - started)
+            db.expunge_all()
+        results[name] = (statistics.median(samples), found / len(points))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--open", type=int, default=2000, help="open rides, the same at every size")
+    parser.add_argument("--radius", type=float, default=2000.0, help="meters")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="miniuber_near_")
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tmp_dir, 'near.db')}"
+
+    from models.database import SessionLocal, create_tables, dispose_engine, get_engine
+    from models.model import RideRequest
+    from synthetic_data import RIDE_COLUMNS, _pick_point, analyze, bulk_load
+
+    rng = random.Random(7)
+    points = [_pick_point(rng) for _ in range(args.queries)]
+    sizes = sorted(int(s) for s in args.sizes.split(","))
+    create_tables()
+    engine = get_engine()
+    loaded = 0
+    report = []
+    try:
+        for size in sizes:
+            started = time.perf_counter()
+            bulk_load(engine, RideRequest.__table__, RIDE_COLUMNS, rides(size - loaded, max(0, args.open - loaded), seed=loaded))
+            analyze(engine)
+            print(f"🌱 {size:,} rides ({time.perf_counter() - started:.1f}s to load {size - loaded:,})")
+            loaded = size
+
+            db = SessionLocal()
+            try:
+                results = measure(db, points, args.radius, args.limit)
+            finally:
+                db.close()
+            report.append((size, results))
+            for name, (p50, found) in results.items():
+                print(f"  {name:<14} p50 {p50 * 1000:8.2f}ms  {found:8.1f} rides/query")
+
+        if len(report) > 1:
+            (small, first), (large, last) = report[0], report[-1]
+            print(f"\n📈 p50 growth from {small:,} to {large:,} rows ({large / small:,.1f}x data)")
+            for name in first:
+                ratio = last[name][0] / max(first[name][0], 1e-9)
+                print(f"  {name:<14} {ratio:8.1f}x")
+    finally:
+        dispose_engine()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+RideService throughput on the in-memory store vs the SQLAlchemy store.
+
+The SQL side runs against a local SQLite file by default (or any URL
+given with --database-url), so the gap between the two is roughly the
+ORM + driver + database cost of each RideService call.
+
+Usage: python benchmarks/store_benchmark.py [--rides 20000] [--users 500]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def timed(label: str, n: int, fn):
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<22} {n:>8} ops  {elapsed * 1000:9.1f}ms  {n / elapsed:12,.0f} ops/s")
+
+def run(label: str, service, rides: int, users: int, lookups: int):
+    from models.schemas import RideRequestCreate
+
+    print(f"📦 {label}")
+    rng = random.Random(42)
+    payloads = [
+        RideRequestCreate(user_id=f"user_{rng.randrange(users)}", source_location="A", dest_location="B")
+        for _ in range(rides)
+    ]
+    timed("create", rides, lambda: [service.create_ride_request(p) for p in payloads])
+    ids = [rng.randint(1, rides) for _ in range(lookups)]
+    timed("get by id", lookups, lambda: [service.get_ride_request(i) for i in ids])
+    user_ids = [f"user_{rng.randrange(users)}" for _ in range(lookups // 10)]
+    timed("list by user", len(user_ids), lambda: [service.get_ride_requests(user_id=u) for u in user_ids])
+    timed("list all", 10, lambda: [service.get_ride_requests() for _ in range(10)])
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rides", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--lookups", type=int, default=5000)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="miniuber_bench_")
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+
+    from models.database import SessionLocal, create_tables, dispose_engine
+    from services.ride_service import RideService
+    from services.ride_store import MemoryRideStore, SqlRideStore
+
+    run("MemoryRideStore", RideService(None, store=MemoryRideStore()), args.rides, args.users, args.lookups)
+
+    create_tables()
+    db = SessionLocal()
+    try:
+        run(f"SqlRideStore ({os.environ['DATABASE_URL']})", RideService(db, store=SqlRideStore(db)),
+            args.rides, args.users, args.lookups)
+    finally:
+        db.close()
+        dispose_engine()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
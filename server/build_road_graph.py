@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Preprocess a road-network file for the ETA engine.
+
+Parses the file into CSR arrays, contracts it into a contraction
+hierarchy and writes both to <path>.csr, which the server loads on
+first use. Contracting a city-sized graph takes a few minutes, so run
+this whenever the road file changes rather than at server startup.
+
+Usage: python build_road_graph.py roads.txt
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.eta import RoadGraph
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the ETA graph cache for a road-network file")
+    parser.add_argument("path", help="road-network file (N/E records)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    graph = RoadGraph.from_file(args.path, use_cache=False)
+    print(f"📦 {graph.node_count:,} nodes, {graph.edge_count:,} edges parsed in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    hierarchy = graph.build_hierarchy(
+        progress=lambda done, total: print(f"  ... contracted {done:,}/{total:,} nodes")
+    )
+    print(f"🔺 hierarchy with {hierarchy.edge_count:,} edges built in {time.perf_counter() - started:.1f}s")
+
+    graph.save_cache(args.path + ".csr")
+    print(f"✅ wrote {args.path}.csr")
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,67 @@ class Settings:
     SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
     SERVER_PORT = int(os.getenv("SERVER_PORT", 8000))
     
-    # Database fallback for development
+    # Database fallback for development: without it rides live in one process' memory (single worker only)
     USE_POSTGRES = os.getenv("USE_POSTGRES", "false").lower() == "true"
 
+    # Read replicas (comma separated URLs); read-only routes use these instead of DATABASE_URL
+    DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+    # After a user writes, their reads stay on the primary for this many seconds
+    READ_YOUR_WRITES_WINDOW = float(os.getenv("READ_YOUR_WRITES_WINDOW", 5.0))
+
+    # Connection pool (applies to the primary and each replica)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))  # seconds, -1 to disable
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    # Adaptive mode resizes the pool between these bounds based on checkout waits and DB latency
+    DB_POOL_ADAPTIVE = os.getenv("DB_POOL_ADAPTIVE", "false").lower() == "true"
+    DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", 2))
+    DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", 30))
+    DB_POOL_ADAPT_INTERVAL = float(os.getenv("DB_POOL_ADAPT_INTERVAL", 5.0))
+    DB_POOL_WAIT_THRESHOLD_MS = float(os.getenv("DB_POOL_WAIT_THRESHOLD_MS", 10.0))
+    DB_POOL_LATENCY_CEILING_MS = float(os.getenv("DB_POOL_LATENCY_CEILING_MS", 100.0))
+
+    # Admission control (token buckets in front of the write/read routes)
+    ADMISSION_CONTROL_ENABLED = os.getenv("ADMISSION_CONTROL_ENABLED", "true").lower() == "true"
+    ADMISSION_USER_RATE = float(os.getenv("ADMISSION_USER_RATE", 1.0))  # requests/sec per user_id
+    ADMISSION_USER_BURST = int(os.getenv("ADMISSION_USER_BURST", 5))
+    ADMISSION_GLOBAL_RATE = float(os.getenv("ADMISSION_GLOBAL_RATE", 200.0))  # requests/sec per route
+    ADMISSION_GLOBAL_BURST = int(os.getenv("ADMISSION_GLOBAL_BURST", 400))
+    ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", 64))
+    ADMISSION_MAX_TRACKED_USERS = int(os.getenv("ADMISSION_MAX_TRACKED_USERS", 100000))
+    ADMISSION_MIN_RETRY_AFTER = float(os.getenv("ADMISSION_MIN_RETRY_AFTER", 1.0))  # seconds, floor for 503 Retry-After
+    # Optional JSON list of RouteLimit kwargs that replaces the default per-route limits
+    ADMISSION_ROUTE_LIMITS = os.getenv("ADMISSION_ROUTE_LIMITS", "")
+
+    # Road network for ETAs (see build_road_graph.py); rides get no estimated_duration without one
+    ROAD_GRAPH_PATH = os.getenv("ROAD_GRAPH_PATH", "")
+    ETA_CACHE_SIZE = int(os.getenv("ETA_CACHE_SIZE", 100000))  # origin/destination cell pairs
+
+    # Negotiated list responses are gzip/brotli compressed from this size up
+    RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", 1024))
+
+    # Per-process cache of user profiles in front of GET /users/{user_id} and expand=user
+    USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 10000))
+    USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", 60.0))  # bounds staleness across workers
+
+    # Ride event log (services/event_log.py); disabled when EVENT_LOG_DIR is empty
+    EVENT_LOG_DIR = os.getenv("EVENT_LOG_DIR", "")
+    EVENT_LOG_SEGMENT_BYTES = int(os.getenv("EVENT_LOG_SEGMENT_BYTES", 64 * 1024 * 1024))
+    EVENT_LOG_FSYNC = os.getenv("EVENT_LOG_FSYNC", "true").lower() == "true"  # group-committed fsync per append
+    EVENT_LOG_LINGER_MS = float(os.getenv("EVENT_LOG_LINGER_MS", 0))
+
+    # GET /api/v1/ride-requests/near: largest radius accepted, in meters
+    NEARBY_MAX_RADIUS_M = float(os.getenv("NEARBY_MAX_RADIUS_M", 20000))
+
+    # Background expiry of stale rides (services/expiry.py): status=seconds since the ride's
+    # last change, comma separated; empty disables the sweeper. Every worker process runs its own
+    # sweeper thread. On the memory backend each one only sees its own process' rides, which is
+    # why serve.py keeps that backend to one worker; `uvicorn --workers N` does not.
+    RIDE_EXPIRY_TTLS = os.getenv("RIDE_EXPIRY_TTLS", "requested=1800,accepted=21600")
+    RIDE_EXPIRY_INTERVAL = float(os.getenv("RIDE_EXPIRY_INTERVAL", 60.0))  # seconds between sweeps
+    RIDE_EXPIRY_BATCH_SIZE = int(os.getenv("RIDE_EXPIRY_BATCH_SIZE", 500))  # rows per transaction
+    RIDE_EXPIRY_MAX_BATCHES = int(os.getenv("RIDE_EXPIRY_MAX_BATCHES", 20))  # per status per sweep
+
 settings = Settings()
\ No newline at end of file
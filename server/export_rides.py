@@ -0,0 +1,55 @@
+import sys
+import os
+import argparse
+import time
+from datetime import datetime
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.database import SessionLocal
+from services.ride_store import SqlRideStore
+from services.export import FORMATS, export_to_file
+
+def main():
+    parser = argparse.ArgumentParser(description="Export ride_requests to CSV or Parquet")
+    parser.add_argument("output", help="CSV file, or directory of Parquet part files")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--start", type=datetime.fromisoformat, help="created_at >= START (ISO format)")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="created_at < END (ISO format)")
+    parser.add_argument("--status")
+    parser.add_argument("--user-id")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--row-group-size", type=int, default=100000)
+    parser.add_argument("--rows-per-part", type=int, default=1000000)
+    parser.add_argument("--resume", action="store_true", help="Continue from OUTPUT.checkpoint")
+    args = parser.parse_args()
+
+    print(f"📤 Exporting ride requests to {args.output} ({args.format})...")
+    started = time.perf_counter()
+
+    def progress(state):
+        elapsed = time.perf_counter() - started
+        print(f"  ... {state['rows']} rows (last id {state['last_id']}, {state['rows'] / max(elapsed, 1e-9):,.0f} rows/s)")
+
+    # Always the database: the in-memory store (USE_POSTGRES=false) belongs to a server process, not to this one
+    db = SessionLocal(read_only=True)
+    try:
+        state = export_to_file(
+            SqlRideStore(db), args.output, fmt=args.format,
+            chunk_size=args.chunk_size, row_group_size=args.row_group_size,
+            rows_per_part=args.rows_per_part, resume=args.resume, progress=progress,
+            start=args.start, end=args.end, status=args.status, user_id=args.user_id,
+        )
+        print(f"✅ Exported {state['rows']} rows in {time.perf_counter() - started:.1f}s")
+        return True
+    except Exception as e:
+        print(f"❌ Export failed: {e}")
+        return False
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    success = main()
+    if not success:
+        sys.exit(1)
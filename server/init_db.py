@@ -1,13 +1,15 @@
 import sys
 import os
+import argparse
 
 # Add the current directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from models.database import create_tables, test_connection, engine
 from models.model import RideRequest, User
+from sqlalchemy import inspect
 
-def main():
+def main(seed_users: int = 0, seed_rides: int = 0):
     print("🚀 Initializing Mini Uber Database...")
     
     # Test connection first
@@ -25,17 +27,26 @@ def main():
         print("✅ Tables created successfully!")
         
         # Verify tables were created
-        inspector = engine.inspect(engine)
+        inspector = inspect(engine)
         tables = inspector.get_table_names()
         print(f"📊 Created tables: {tables}")
         
+        if seed_users or seed_rides:
+            from synthetic_data import generate
+            print(f"🌱 Seeding {seed_users:,} users and {seed_rides:,} synthetic rides...")
+            generate(users=seed_users, rides=seed_rides, days=90, skew=3.0, batch_size=100000)
+        
         return True
     except Exception as e:
         print(f"❌ Error creating tables: {e}")
         return False
 
 if __name__ == "__main__":
-    success = main()
+    parser = argparse.ArgumentParser(description="Create the Mini Uber tables")
+    parser.add_argument("--seed-users", type=int, default=0, help="Also load this many synthetic users")
+    parser.add_argument("--seed-rides", type=int, default=0, help="Also load this many synthetic rides")
+    args = parser.parse_args()
+    success = main(seed_users=args.seed_users, seed_rides=args.seed_rides)
     if success:
         print("🎉 Database initialization completed successfully!")
     else:
@@ -1,14 +1,60 @@
+# Started before the imports below so the cold start report includes them
+from startup import ColdStartTimer, SCHEMA_READY_ENV
+cold_start = ColdStartTimer()
+
+import os
+import time
 from fastapi import FastAPI, Depends, HTTPException
 from sqlalchemy.orm import Session
 from models.database import get_db, create_tables, test_connection
-from models.model import RideRequest, User
+from models.model import RideRequest
+from models.schemas import UserResponse
+from services.user_service import UserService
+from services.expiry import start_expiry_sweeper, stop_expiry_sweeper
+from services.eta import get_eta_engine
+from api.routes import router as api_router
+from api.stats import router as stats_router
+from api.eta import router as eta_router
+from api.admission import AdmissionControlMiddleware, RouteLimit, load_route_limits
+from config import settings
 from pydantic import BaseModel
 from typing import Optional
-import uvicorn
+
+cold_start.imports_done()
 
 # Create FastAPI instance
 app = FastAPI(title="Mini Uber API", version="1.0.0")
 
+# Shed abusive traffic before it reaches the database
+def _route_limit(method: str, path: str, per_user: bool) -> RouteLimit:
+    return RouteLimit(
+        method, path,
+        user_rate=settings.ADMISSION_USER_RATE if per_user else None,
+        user_burst=settings.ADMISSION_USER_BURST,
+        global_rate=settings.ADMISSION_GLOBAL_RATE,
+        global_burst=settings.ADMISSION_GLOBAL_BURST,
+        max_in_flight=settings.ADMISSION_MAX_IN_FLIGHT,
+        max_tracked_users=settings.ADMISSION_MAX_TRACKED_USERS,
+        min_retry_after=settings.ADMISSION_MIN_RETRY_AFTER,
+    )
+
+DEFAULT_ROUTE_LIMITS = [
+    _route_limit("POST", "/api/v1/ride-request", per_user=True),
+    _route_limit("GET", "/api/v1/ride-requests", per_user=True),
+    _route_limit("POST", "/rides/", per_user=True),
+    _route_limit("GET", "/rides/", per_user=False),
+]
+
+app.add_middleware(
+    AdmissionControlMiddleware,
+    limits=load_route_limits(settings.ADMISSION_ROUTE_LIMITS, DEFAULT_ROUTE_LIMITS),
+    enabled=settings.ADMISSION_CONTROL_ENABLED,
+)
+
+app.include_router(api_router, prefix="/api/v1")
+app.include_router(stats_router, prefix="/api/v1/stats")
+app.include_router(eta_router, prefix="/api/v1/eta")
+
 # Pydantic models for API
 class RideRequestCreate(BaseModel):
     user_id: str
@@ -25,18 +71,45 @@ class UserCreate(BaseModel):
     phone: Optional[str] = None
     email: Optional[str] = None
 
+class UserUpdate(BaseModel):
+    name: Optional[str] = None
+    phone: Optional[str] = None
+    email: Optional[str] = None
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize database on startup"""
+    started = time.perf_counter()
     print("🚀 Starting Mini Uber API...")
     
-    if not test_connection():
-        print("❌ Failed to connect to database!")
-        raise Exception("Database connection failed")
+    if os.getenv(SCHEMA_READY_ENV) == "1":
+        # serve.py's leader process already checked the connection and schema
+        print("📋 Schema checked by launcher, skipping")
+    else:
+        if not test_connection():
+            print("❌ Failed to connect to database!")
+            raise Exception("Database connection failed")
+        
+        print("✅ Database connected successfully")
+        create_tables()
+        print("📋 Database tables ready")
+    
+    # Load the road graph now rather than inside the first ride creation
+    eta_engine = get_eta_engine()
+    if eta_engine is not None:
+        stats = eta_engine.stats()
+        print(f"🗺️ Road graph loaded: {stats['nodes']:,} nodes, {stats['edges']:,} edges, {stats['router']}")
+    
+    sweeper = start_expiry_sweeper()
+    if sweeper is not None:
+        print(f"🧹 Expiring stale rides every {sweeper.interval:g}s: {sweeper.ttls}")
     
-    print("✅ Database connected successfully")
-    create_tables()
-    print("📋 Database tables ready")
+    report = cold_start.ready(started)
+    print(f"⏱️ Worker {report['pid']} cold start: {report}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    stop_expiry_sweeper()
 
 @app.get("/")
 async def root():
@@ -48,23 +121,27 @@ async def health_check(db: Session = Depends(get_db)):
     try:
         # Simple database query to check connection
         db.execute("SELECT 1")
-        return {"status": "healthy", "database": "connected"}
+        return {"status": "healthy", "database": "connected", "startup": cold_start.report}
     except Exception as e:
-        return {"status": "unhealthy", "database": "disconnected", "error": str(e)}
+        return {"status": "unhealthy", "database": "disconnected", "error": str(e), "startup": cold_start.report}
 
-@app.post("/users/")
+@app.post("/users/", response_model=UserResponse)
 async def create_user(user: UserCreate, db: Session = Depends(get_db)):
     """Create a new user"""
-    db_user = User(**user.dict())
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    return UserService(db).create_user(user.dict())
 
-@app.get("/users/{user_id}")
+@app.get("/users/{user_id}", response_model=UserResponse)
 async def get_user(user_id: str, db: Session = Depends(get_db)):
-    """Get a user by user_id"""
-    user = db.query(User).filter(User.user_id == user_id).first()
+    """Get a user by user_id (served from the profile cache when possible)"""
+    user = UserService(db).get_profile(user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+@app.patch("/users/{user_id}", response_model=UserResponse)
+async def update_user(user_id: str, update: UserUpdate, db: Session = Depends(get_db)):
+    """Update a user's profile; drops the cached copy"""
+    user = UserService(db).update_user(user_id, update.dict(exclude_unset=True))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
@@ -93,4 +170,6 @@ async def get_ride(ride_id: int, db: Session = Depends(get_db)):
     return ride
 
 if __name__ == "__main__":
+    # Workers started by serve.py import this module without ever needing uvicorn here
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
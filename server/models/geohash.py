@@ -0,0 +1,135 @@
+"""
+Geohash cells for proximity search.
+
+A geohash interleaves longitude and latitude bits and spells them in
+base32, so every prefix is a rectangular cell and points in the same cell
+share that prefix. Rides store the hash of their pickup point; a radius
+search becomes a few prefix ranges that an ordinary B-tree index can scan,
+followed by an exact distance check on the rows it finds.
+"""
+import math
+from typing import List, Optional, Tuple
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_INDEX = {c: i for i, c in enumerate(BASE32)}
+
+PRECISION = 9  # stored hash length: cells of about 5m x 5m
+_BITS = 30  # per axis, enough for 12 characters
+
+EARTH_RADIUS_M = 6371000.0
+METERS_PER_DEGREE = 111320.0
+
+def _spread(v: int) -> int:
+    """Put a zero bit between each of the low 32 bits of v"""
+    v &= 0xFFFFFFFF
+    v = (v | (v << 16)) & 0x0000FFFF0000FFFF
+    v = (v | (v << 8)) & 0x00FF00FF00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F0F0F0F0F
+    v = (v | (v << 2)) & 0x3333333333333333
+    return (v | (v << 1)) & 0x5555555555555555
+
+def encode(lat: float, lon: float, precision: int = PRECISION) -> str:
+    """Geohash of a point, `precision` characters long (at most 12)"""
+    scale = 1 << _BITS
+    qlat = min(scale - 1, max(0, int((lat + 90.0) / 180.0 * scale)))
+    qlon = min(scale - 1, max(0, int((lon + 180.0) / 360.0 * scale)))
+    # Longitude takes the first (most significant) bit of each pair
+    code = ((_spread(qlon) << 1) | _spread(qlat)) >> (2 * _BITS - 5 * precision)
+    return "".join(BASE32[(code >> shift) & 31] for shift in range(5 * (precision - 1), -1, -5))
+
+def encode_point(lat: Optional[float], lon: Optional[float]) -> Optional[str]:
+    """Stored geohash for a ride's coordinates; None when either is missing"""
+    if lat is None or lon is None:
+        return None
+    return encode(lat, lon)
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """(height, width) in degrees of cells `precision` characters long"""
+    lat_bits = 5 * precision // 2
+    lon_bits = 5 * precision - lat_bits
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+def _distance_to_cell(lat: float, lon: float, south: float, west: float, height: float, width: float) -> float:
+    """Meters from (lat, lon) to the nearest point of a cell; west may be outside -180..180"""
+    if west <= lon <= west + width:
+        return haversine_m(lat, lon, min(max(lat, south), south + height), lon)
+    edge = west if lon < west else west + width
+    dl = math.radians(edge - lon)
+    if math.cos(dl) <= 0:
+        return 0.0  # a quarter of the world away in longitude: never pruned
+    # The point of a meridian closest to (lat, lon) lies poleward of lat
+    nearest = math.degrees(math.atan(math.tan(math.radians(lat)) / math.cos(dl)))
+    return haversine_m(lat, lon, min(max(nearest, south), south + height), edge)
+
+def cover(lat: float, lon: float, radius_m: float, max_cells: int = 64) -> List[str]:
+    """
+    Cells that together contain every point within radius_m of (lat, lon),
+    at the finest precision that needs no more than max_cells of them.
+    Cells whose nearest point is outside the circle are left out. Circles
+    that cross the antimeridian take cells from both sides of it, and
+    circles that contain a pole take every longitude.
+    """
+    angle = radius_m / EARTH_RADIUS_M
+    dlat = math.degrees(angle)
+    south, north = lat - dlat, lat + dlat
+    if south <= -90.0 or north >= 90.0:
+        west, east = -180.0, 180.0
+    else:
+        # Widest longitude the circle reaches, which is wider than dlat away from the equator
+        dlon = math.degrees(math.asin(math.sin(angle) / math.cos(math.radians(lat))))
+        west, east = lon - dlon, lon + dlon
+    south, north = max(-90.0, south), min(90.0, north)
+
+    for precision in range(PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        lat_cells, lon_cells = round(180.0 / height), round(360.0 / width)
+        rows = range(int((south + 90.0) // height), min(int((north + 90.0) // height), lat_cells - 1) + 1)
+        # Columns past either end of -180..180 wrap around to the other side
+        cols = range(math.floor((west + 180.0) / width), math.floor((east + 180.0) / width) + 1)
+        if len(cols) >= lon_cells:
+            cols = range(lon_cells)
+        if len(rows) * len(cols) <= max_cells:
+            break
+
+    cells = []
+    for row in rows:
+        cell_south = row * height - 90.0
+        for col in cols:
+            cell_west = col * width - 180.0
+            if _distance_to_cell(lat, lon, cell_south, cell_west, height, width) <= radius_m:
+                center_lon = (col % lon_cells + 0.5) * width - 180.0
+                cells.append(encode(cell_south + height / 2, center_lon, precision))
+    return sorted(set(cells))
+
+def successor(prefix: str) -> Optional[str]:
+    """Smallest string after every hash starting with prefix; None if there is none"""
+    chars = list(prefix)
+    while chars:
+        i = _INDEX[chars[-1]]
+        if i < len(BASE32) - 1:
+            chars[-1] = BASE32[i + 1]
+            return "".join(chars)
+        chars.pop()
+    return None
+
+def prefix_ranges(cells: List[str]) -> List[Tuple[str, Optional[str]]]:
+    """
+    Half-open [low, high) string ranges matching hashes in any of the cells,
+    with neighbouring cells merged. high is None for "no upper bound".
+    """
+    ranges: List[Tuple[str, Optional[str]]] = []
+    for cell in sorted(cells):
+        high = successor(cell)
+        if ranges and (ranges[-1][1] is None or ranges[-1][1] >= cell):
+            # Adjacent to, or inside, the previous range
+            low, previous_high = ranges[-1]
+            ranges[-1] = (low, None if previous_high is None or high is None else max(previous_high, high))
+        else:
+            ranges.append((cell, high))
+    return ranges
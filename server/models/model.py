@@ -1,6 +1,11 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Date, Index, event
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base  # Import Base from database.py
+from . import geohash
+
+# Byte-order collation on Postgres so geohash prefix ranges can use a plain B-tree index
+GeohashType = String(12).with_variant(String(12, collation="C"), "postgresql")
 
 class RideRequest(Base):
     """Model for ride requests in your Velo app"""
@@ -16,8 +21,10 @@ class RideRequest(Base):
     source_longitude = Column(Float, nullable=True)
     dest_latitude = Column(Float, nullable=True)
     dest_longitude = Column(Float, nullable=True)
+    source_geohash = Column(GeohashType, nullable=True, index=True)  # set from source_latitude/longitude on write
     
     status = Column(String, default="requested")  # requested, accepted, completed, cancelled
+    is_active = Column(Boolean, default=True, nullable=False)
     estimated_fare = Column(Float, nullable=True)
     estimated_duration = Column(Integer, nullable=True)  # in minutes
     distance = Column(Float, nullable=True)  # in kilometers
@@ -26,9 +33,34 @@ class RideRequest(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    # Joined on user_id without a foreign key: rides may be requested before a user row exists.
+    # List queries should load it with selectinload(RideRequest.user) to avoid one query per ride.
+    user = relationship(
+        "User",
+        primaryjoin="foreign(RideRequest.user_id) == User.user_id",
+        back_populates="rides",
+        viewonly=True,
+    )
+    
+    __table_args__ = (
+        # "Open rides near here": status equality plus a geohash range per covering cell
+        Index("ix_ride_requests_status_source_geohash", "status", "source_geohash"),
+        # Expiry sweeps: active rides in a status, oldest last change first
+        Index("ix_ride_requests_active_status_changed", is_active, status, func.coalesce(updated_at, created_at)),
+    )
+    
     def __repr__(self):
         return f"<RideRequest(id={self.id}, user_id='{self.user_id}', status='{self.status}')>"
 
+@event.listens_for(RideRequest, "before_insert")
+@event.listens_for(RideRequest, "before_update")
+def _set_source_geohash(mapper, connection, ride):
+    ride.source_geohash = geohash.encode_point(ride.source_latitude, ride.source_longitude)
+
+@event.listens_for(RideRequest.status, "set", active_history=True)
+def _load_previous_status(ride, value, previous, initiator):
+    """Load the old status before it is overwritten, so the rollups can tell a real status change"""
+
 class User(Base):
     """User model for your Velo app"""
     __tablename__ = "users"
@@ -43,5 +75,45 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    rides = relationship(
+        "RideRequest",
+        primaryjoin="User.user_id == foreign(RideRequest.user_id)",
+        back_populates="user",
+        viewonly=True,
+    )
+    
     def __repr__(self):
-        return f"<User(id={self.id}, user_id='{self.user_id}', name='{self.name}')>"
\ No newline at end of file
+        return f"<User(id={self.id}, user_id='{self.user_id}', name='{self.name}')>"
+
+class RideHourlyStat(Base):
+    """Rollup: rides that entered each status, per hour"""
+    __tablename__ = "ride_hourly_stats"
+    
+    hour = Column(DateTime(timezone=True), primary_key=True)
+    status = Column(String, primary_key=True)
+    shard = Column(Integer, primary_key=True, default=0)  # spreads hot-row updates, summed on read
+    ride_count = Column(Integer, nullable=False, default=0)
+
+class UserDailyActivity(Base):
+    """Rollup: users who requested at least one ride on a day"""
+    __tablename__ = "user_daily_activity"
+    
+    day = Column(Date, primary_key=True)
+    user_id = Column(String, primary_key=True)
+    ride_count = Column(Integer, nullable=False, default=0)
+
+class DailyActiveUsers(Base):
+    """Rollup: number of distinct active users per day"""
+    __tablename__ = "daily_active_users"
+    
+    day = Column(Date, primary_key=True)
+    shard = Column(Integer, primary_key=True, default=0)  # spreads hot-row updates, summed on read
+    active_users = Column(Integer, nullable=False, default=0)
+
+class UserRideStat(Base):
+    """Rollup: lifetime ride count per user"""
+    __tablename__ = "user_ride_stats"
+    
+    user_id = Column(String, primary_key=True)
+    ride_count = Column(Integer, nullable=False, default=0)
+    last_ride_at = Column(DateTime(timezone=True), nullable=True)
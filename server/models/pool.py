@@ -0,0 +1,316 @@
+import bisect
+import threading
+import time
+from typing import Dict, List, Optional
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.util import queue as sqla_queue
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (bucket upper bounds in milliseconds)"""
+    BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def record(self, seconds: float):
+        ms = seconds * 1000
+        self.counts[bisect.bisect_left(self.BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+
+    def percentile(self, p: float) -> float:
+        """Upper bound (ms) of the bucket holding the p-th percentile; 0 when empty"""
+        if not self.count:
+            return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for bound, n in zip(self.BUCKETS_MS + (float("inf"),), self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def to_dict(self) -> Dict:
+        labels = [f"le_{b}ms" for b in self.BUCKETS_MS] + ["inf"]
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+class PoolStats:
+    """Checkout waits, query latency and connection ages for one pool"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.waits = LatencyHistogram()
+        self.connects = LatencyHistogram()
+        self.queries = LatencyHistogram()
+        # Reset by the autoscaler on every tick
+        self.window_waits = LatencyHistogram()
+        self.window_queries = LatencyHistogram()
+        self.window_peak_checked_out = 0
+        self.connected_at: Dict[int, float] = {}
+        self.resizes = 0
+
+    def record_wait(self, seconds: float, checked_out: int):
+        with self.lock:
+            self.waits.record(seconds)
+            self.window_waits.record(seconds)
+            self.window_peak_checked_out = max(self.window_peak_checked_out, checked_out)
+
+    def record_connect(self, seconds: float):
+        with self.lock:
+            self.connects.record(seconds)
+
+    def record_query(self, seconds: float):
+        with self.lock:
+            self.queries.record(seconds)
+            self.window_queries.record(seconds)
+
+    def drain_window(self):
+        with self.lock:
+            window = (self.window_waits, self.window_queries, self.window_peak_checked_out)
+            self.window_waits = LatencyHistogram()
+            self.window_queries = LatencyHistogram()
+            self.window_peak_checked_out = 0
+        return window
+
+    def connection_ages(self) -> Dict:
+        now = time.monotonic()
+        ages = [now - t for t in list(self.connected_at.values())]
+        if not ages:
+            return {"count": 0}
+        return {
+            "count": len(ages),
+            "min_s": round(min(ages), 1),
+            "max_s": round(max(ages), 1),
+            "avg_s": round(sum(ages) / len(ages), 1),
+        }
+
+class ResizableQueue(sqla_queue.Queue):
+    """
+    The pool's queue of idle connections. A blocked get() also returns (with
+    Empty) when the pool grows, so its caller can open one of the new
+    connections instead of waiting out its timeout for a returned one.
+    """
+
+    def __init__(self, maxsize: int = 0, use_lifo: bool = False):
+        super().__init__(maxsize, use_lifo=use_lifo)
+        self.resizes = 0
+
+    def get(self, block: bool = True, timeout: Optional[float] = None):
+        with self.not_empty:
+            resizes = self.resizes
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while block and self._empty() and self.resizes == resizes:
+                if deadline is None:
+                    self.not_empty.wait()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.not_empty.wait(remaining)
+            if self._empty():
+                raise sqla_queue.Empty()
+            item = self._get()
+            self.not_full.notify()
+            return item
+
+    def resize(self, maxsize: int) -> List:
+        """Set maxsize and wake blocked getters; returns idle items over the new size, for the caller to close"""
+        with self.mutex:
+            self.maxsize = maxsize
+            surplus = []
+            while len(self.queue) > maxsize:
+                surplus.append(self._get())
+            self.resizes += 1
+            self.not_empty.notify_all()
+            return surplus
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times checkouts and can be resized while in use"""
+
+    _queue_class = ResizableQueue
+
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        self.stats = PoolStats()
+        event.listen(self, "connect", self._on_connect)
+        event.listen(self, "close", self._on_close)
+        event.listen(self, "close_detached", self._on_close_detached)
+
+    def _do_get(self):
+        """
+        QueuePool._do_get, retried until pool_timeout when a resize wakes the
+        wait. Time spent waiting for a slot and time spent opening a new
+        connection are recorded separately.
+        """
+        started = time.perf_counter()
+        deadline = started + self._timeout
+        use_overflow = self._max_overflow > -1
+        while True:
+            wait = use_overflow and self._overflow >= self._max_overflow
+            try:
+                record = self._pool.get(wait, max(0.0, deadline - time.perf_counter()))
+                self.stats.record_wait(time.perf_counter() - started, self.checkedout())
+                return record
+            except sqla_queue.Empty:
+                pass
+
+            if use_overflow and self._overflow >= self._max_overflow:
+                if wait and time.perf_counter() >= deadline:
+                    self.stats.record_wait(time.perf_counter() - started, self.checkedout())
+                    raise exc.TimeoutError(
+                        "QueuePool limit of size %d overflow %d reached, "
+                        "connection timed out, timeout %0.2f"
+                        % (self.size(), self.overflow(), self._timeout),
+                        code="3o7r",
+                    )
+                continue
+
+            if self._inc_overflow():
+                connecting = time.perf_counter()
+                self.stats.record_wait(connecting - started, self.checkedout())
+                try:
+                    return self._create_connection()
+                except Exception:
+                    self._dec_overflow()
+                    raise
+                finally:
+                    self.stats.record_connect(time.perf_counter() - connecting)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self.stats.connected_at[id(dbapi_connection)] = time.monotonic()
+
+    def _on_close(self, dbapi_connection, connection_record):
+        self.stats.connected_at.pop(id(dbapi_connection), None)
+
+    def _on_close_detached(self, dbapi_connection):
+        self.stats.connected_at.pop(id(dbapi_connection), None)
+
+    def recreate(self):
+        # engine.dispose() swaps in a new pool; keep the history
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def resize(self, pool_size: int):
+        """
+        Change pool_size in place. Growing wakes threads waiting for a
+        connection so they can open one of the new ones; shrinking closes idle
+        connections over the new size now, and checked out ones as they are
+        returned.
+        """
+        with self._overflow_lock:
+            delta = pool_size - self._pool.maxsize
+            # Same connections, counted against the new size: overflow is connections - pool_size
+            self._overflow -= delta
+            surplus = self._pool.resize(pool_size)
+            self._overflow -= len(surplus)
+        for record in surplus:
+            record.close()
+        self.stats.resizes += 1
+
+def instrument_engine(engine):
+    """Record query latency for the engine's pool stats"""
+    pool_stats = lambda: getattr(engine.pool, "stats", None)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("query_started", None)
+        stats = pool_stats()
+        if started is not None and stats is not None:
+            stats.record_query(time.perf_counter() - started)
+
+class PoolAutoscaler(threading.Thread):
+    """
+    Grows the pool when checkouts queue up while the database itself is
+    still fast, and shrinks it again when connections sit idle. When the
+    database is slow, more connections would only add load, so the pool
+    is left alone.
+    """
+
+    def __init__(
+        self,
+        engine,
+        min_size: int,
+        max_size: int,
+        interval: float = 5.0,
+        wait_threshold_ms: float = 10.0,
+        latency_ceiling_ms: float = 100.0,
+    ):
+        super().__init__(daemon=True, name="pool-autoscaler")
+        self.engine = engine
+        self.min_size = min_size
+        self.max_size = max_size
+        self.interval = interval
+        self.wait_threshold_ms = wait_threshold_ms
+        self.latency_ceiling_ms = latency_ceiling_ms
+        self.last_decision: Optional[str] = None
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self.tick()
+
+    def stop(self):
+        self._stopped.set()
+
+    def tick(self):
+        pool = self.engine.pool
+        if not isinstance(pool, InstrumentedQueuePool):
+            return
+        waits, queries, peak = pool.stats.drain_window()
+        size = pool.size()
+        wait_p95 = waits.percentile(95)
+        query_p50 = queries.percentile(50)
+
+        if wait_p95 > self.wait_threshold_ms and query_p50 < self.latency_ceiling_ms and size < self.max_size:
+            new_size = min(self.max_size, size + max(1, size // 4))
+            pool.resize(new_size)
+            self.last_decision = f"grew {size}->{new_size} (wait p95 {wait_p95}ms, query p50 {query_p50}ms)"
+        elif wait_p95 <= 1 and peak < size // 2 and size > self.min_size:
+            pool.resize(size - 1)
+            self.last_decision = f"shrank {size}->{size - 1} (peak checked out {peak})"
+
+    def to_dict(self) -> Dict:
+        return {
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "last_decision": self.last_decision,
+        }
+
+def pool_report(engine, autoscaler: Optional[PoolAutoscaler] = None) -> Dict:
+    """Live statistics for one engine's pool"""
+    pool = engine.pool
+    report = {"url": engine.url.render_as_string(hide_password=True), "pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        report.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "max_overflow": pool._max_overflow,
+        })
+    stats: Optional[PoolStats] = getattr(pool, "stats", None)
+    if stats is not None:
+        report.update({
+            "checkout_wait": stats.waits.to_dict(),
+            "connect_time": stats.connects.to_dict(),
+            "query_latency": stats.queries.to_dict(),
+            "connection_age": stats.connection_ages(),
+            "resizes": stats.resizes,
+        })
+    report["autoscaler"] = autoscaler.to_dict() if autoscaler is not None else None
+    return report
@@ -1,6 +1,8 @@
 from pydantic import BaseModel
-from typing import Optional
-from datetime import datetime
+from typing import List, Optional, Literal
+from datetime import datetime, date
+
+RideStatus = Literal["requested", "accepted", "completed", "cancelled"]
 
 class PingRequest(BaseModel):
     data: str
@@ -13,6 +15,10 @@ class RideRequestCreate(BaseModel):
     user_id: str
     source_location: str
     dest_location: str
+    source_latitude: Optional[float] = None
+    source_longitude: Optional[float] = None
+    dest_latitude: Optional[float] = None
+    dest_longitude: Optional[float] = None
 
 class RideRequestResponse(BaseModel):
     id: int
@@ -21,10 +27,36 @@ class RideRequestResponse(BaseModel):
     dest_location: str
     created_at: datetime
     status: str
+    estimated_duration: Optional[int] = None  # minutes
+    
+    class Config:
+        from_attributes = True
+
+class UserResponse(BaseModel):
+    id: int
+    user_id: str
+    name: Optional[str] = None
+    phone: Optional[str] = None
+    email: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
 
+class RideRequestWithUserResponse(RideRequestResponse):
+    """A ride with its rider's profile (expand=user); user is null if there's no users row"""
+    user: Optional[UserResponse] = None
+
+class NearbyRideResponse(RideRequestResponse):
+    """A ride found by GET /ride-requests/near, with its pickup point and distance from the search point"""
+    source_latitude: float
+    source_longitude: float
+    distance_m: float
+
+class RideStatusUpdate(BaseModel):
+    status: RideStatus
+
 class RideRequestDB(BaseModel):
     id: Optional[int] = None
     user_id: str
@@ -33,3 +65,34 @@ class RideRequestDB(BaseModel):
     created_at: Optional[datetime] = None
     status: str = "pending"
     is_active: bool = True
+
+class Coordinate(BaseModel):
+    lat: float
+    lon: float
+
+class EtaResponse(BaseModel):
+    seconds: float
+    minutes: int
+
+class EtaBatchRequest(BaseModel):
+    origin: Coordinate
+    points: List[Coordinate]
+    # True: times from each point to origin (drivers to a pickup); False: origin to each point
+    reverse: bool = False
+
+class EtaBatchResponse(BaseModel):
+    seconds: List[Optional[float]]
+
+class HourlyRideStat(BaseModel):
+    hour: datetime
+    status: str
+    ride_count: int
+
+class DailyActiveUsersStat(BaseModel):
+    day: date
+    active_users: int
+
+class UserRideStatResponse(BaseModel):
+    user_id: str
+    ride_count: int
+    last_ride_at: Optional[datetime] = None
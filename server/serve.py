@@ -0,0 +1,71 @@
+"""
+Production launcher: runs the API in N worker processes.
+
+The launcher acts as the leader. It checks the database connection and
+creates the schema once, closes its pool, and only then starts the
+workers. Workers see MINIUBER_SCHEMA_READY=1 and skip those checks, and
+each one opens its own engine lazily on its first request.
+
+Rides only live in the database with USE_POSTGRES=true. The in-memory
+store is per process, so with several workers a ride created on one
+would be missing on the others; without USE_POSTGRES the launcher
+runs a single worker and refuses --workers above 1.
+
+Usage: python serve.py --workers 4 [--host 0.0.0.0] [--port 8000]
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from startup import SCHEMA_READY_ENV, process_age
+
+def prepare_schema() -> bool:
+    """Leader-only connection check and table creation"""
+    # Imported here so `--help` and a skipped check don't pay for SQLAlchemy
+    from models.database import create_tables, test_connection, dispose_engine
+    import models.model  # noqa: F401  (registers the tables on Base.metadata)
+
+    started = time.perf_counter()
+    if not test_connection():
+        print("❌ Failed to connect to database!")
+        return False
+    create_tables()
+    # Workers must not inherit the leader's connections
+    dispose_engine()
+    print(f"📋 Schema ready in {(time.perf_counter() - started) * 1000:.0f}ms")
+    return True
+
+def main():
+    from config import settings
+
+    parser = argparse.ArgumentParser(description="Run the Mini Uber API with multiple workers")
+    default_workers = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)) if settings.USE_POSTGRES else 1
+    parser.add_argument("--workers", type=int, default=default_workers)
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--skip-schema-check", action="store_true",
+                        help="Assume the schema already exists (e.g. migrated by a deploy job)")
+    args = parser.parse_args()
+
+    if args.workers > 1 and not settings.USE_POSTGRES:
+        print("❌ The in-memory ride store is per process; set USE_POSTGRES=true to run more than one worker")
+        sys.exit(1)
+
+    print(f"🚀 Starting Mini Uber API with {args.workers} workers...")
+    if not args.skip_schema_check and not prepare_schema():
+        sys.exit(1)
+    os.environ[SCHEMA_READY_ENV] = "1"
+
+    age = process_age()
+    if age is not None:
+        print(f"⏱️ Leader ready after {age * 1000:.0f}ms")
+
+    import uvicorn
+    uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+import random
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import func, select, delete, update
+from sqlalchemy.orm import Session, attributes
+
+from models.model import (
+    RideRequest, RideHourlyStat, UserDailyActivity, DailyActiveUsers, UserRideStat
+)
+
+# Rollups are bucketed by when things happen: a ride counts towards
+# (hour, "requested") in the hour it was created, and towards
+# (hour, "completed") in the hour it was completed. Buckets never need
+# to be decremented, so every update is a single upsert.
+#
+# Every ride insert touches the current hour's row, so the two global
+# counters are split into ROLLUP_SHARDS rows that writers pick at random
+# and readers sum, to keep concurrent inserts from queueing on one row lock.
+ROLLUP_SHARDS = 8
+
+def hour_bucket(moment: datetime) -> datetime:
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+def day_bucket(moment: datetime) -> date:
+    return hour_bucket(moment).date()
+
+class RideEvent:
+    """A ride being created or entering a new status"""
+    __slots__ = ("kind", "user_id", "status", "at")
+
+    def __init__(self, kind: str, user_id: str, status: str, at: datetime):
+        self.kind = kind
+        self.user_id = user_id
+        self.status = status
+        self.at = at
+
+# ---------------------------------------------------------------------------
+# SQL rollups
+# ---------------------------------------------------------------------------
+
+def _dialect_insert(conn):
+    """INSERT construct with ON CONFLICT support for the connection's dialect"""
+    if conn.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif conn.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Rollups need ON CONFLICT support, not available for {conn.dialect.name}")
+    return insert
+
+def _upsert_add(conn, model, keys: Dict, column: str, amount: int, extra: Optional[Dict] = None):
+    """INSERT keys with column=amount, or add amount to the existing row"""
+    table = model.__table__
+    insert = _dialect_insert(conn)
+    stmt = insert(table).values(**keys, **{column: amount}, **(extra or {}))
+    set_ = {column: table.c[column] + amount}
+    for name in (extra or {}):
+        set_[name] = stmt.excluded[name]
+    conn.execute(stmt.on_conflict_do_update(index_elements=list(keys), set_=set_))
+
+def _add_user_day(conn, day: date, user_id: str, rides: int) -> bool:
+    """Count rides for a user on a day; returns True if this is the user's first ride that day"""
+    table = UserDailyActivity.__table__
+    insert = _dialect_insert(conn)
+    result = conn.execute(
+        insert(table).values(day=day, user_id=user_id, ride_count=rides).on_conflict_do_nothing()
+    )
+    if result.rowcount:
+        return True
+    conn.execute(
+        update(table)
+        .where(table.c.day == day, table.c.user_id == user_id)
+        .values(ride_count=table.c.ride_count + rides)
+    )
+    return False
+
+def apply_events(conn, events: Iterable[RideEvent]):
+    """Fold a batch of ride events into the rollup tables"""
+    hourly = Counter()
+    user_rides = Counter()
+    user_last: Dict[str, datetime] = {}
+    user_days = Counter()
+    for e in events:
+        hourly[(hour_bucket(e.at), e.status)] += 1
+        if e.kind == "created":
+            user_rides[e.user_id] += 1
+            user_last[e.user_id] = max(e.at, user_last.get(e.user_id, e.at))
+            user_days[(day_bucket(e.at), e.user_id)] += 1
+    _apply_counts(conn, hourly, user_rides, user_last, user_days, shard=random.randrange(ROLLUP_SHARDS))
+
+def _apply_counts(conn, hourly: Counter, user_rides: Counter, user_last: Dict, user_days: Counter, shard: int):
+    for (hour, status), n in hourly.items():
+        _upsert_add(conn, RideHourlyStat, {"hour": hour, "status": status, "shard": shard}, "ride_count", n)
+    for user_id, n in user_rides.items():
+        _upsert_add(conn, UserRideStat, {"user_id": user_id}, "ride_count", n,
+                    extra={"last_ride_at": user_last[user_id]})
+    new_users = Counter()
+    for (day, user_id), n in user_days.items():
+        if _add_user_day(conn, day, user_id, n):
+            new_users[day] += 1
+    for day, n in new_users.items():
+        _upsert_add(conn, DailyActiveUsers, {"day": day, "shard": shard}, "active_users", n)
+
+def update_rollups(session: Session):
+    """
+    Fold the session's pending ride changes into the rollups, in the same
+    transaction. Called after every flush of a SessionLocal session (see
+    models/database.py).
+    """
+    now = datetime.now(timezone.utc)
+    events = []
+    for obj in session.new:
+        if isinstance(obj, RideRequest):
+            events.append(RideEvent("created", obj.user_id, obj.status or "requested", now))
+    for obj in session.dirty:
+        if isinstance(obj, RideRequest):
+            history = attributes.get_history(obj, "status")
+            if history.added and history.deleted and history.added[0] != history.deleted[0]:
+                events.append(RideEvent("status_changed", obj.user_id, history.added[0], now))
+    if events:
+        apply_events(session.connection(), events)
+
+class SqlRollups:
+    """Reads the rollup tables; cost depends on the range asked for, not on ride_requests"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def hourly(self, start: datetime, end: datetime, status: Optional[str] = None) -> List[Dict]:
+        t = RideHourlyStat
+        query = (
+            self.db.query(t.hour, t.status, func.sum(t.ride_count))
+            .filter(t.hour >= hour_bucket(start), t.hour <= hour_bucket(end))
+            .group_by(t.hour, t.status)
+            .order_by(t.hour, t.status)
+        )
+        if status:
+            query = query.filter(t.status == status)
+        return [{"hour": hour, "status": s, "ride_count": int(n)} for hour, s, n in query.all()]
+
+    def daily_active_users(self, start: date, end: date) -> List[Dict]:
+        t = DailyActiveUsers
+        query = (
+            self.db.query(t.day, func.sum(t.active_users))
+            .filter(t.day >= start, t.day <= end)
+            .group_by(t.day)
+            .order_by(t.day)
+        )
+        return [{"day": day, "active_users": int(n)} for day, n in query.all()]
+
+    def user_stats(self, user_id: str) -> Optional[Dict]:
+        row = self.db.get(UserRideStat, user_id)
+        if row is None:
+            return None
+        return {"user_id": row.user_id, "ride_count": row.ride_count, "last_ride_at": row.last_ride_at}
+
+def backfill_rollups(db: Session, chunk_size: int = 10000, progress=print) -> int:
+    """
+    Rebuild all rollup tables from ride_requests in id-ordered chunks,
+    committing after each chunk. A ride that is no longer "requested" is
+    counted as entering its current status at updated_at.
+
+    Rides created after the backfill starts are counted by the live hook.
+    Counts may be slightly off for rides written while the old rollups are
+    being cleared, so run this when writes are quiet.
+    """
+    conn = db.connection()
+    for model in (RideHourlyStat, UserDailyActivity, DailyActiveUsers, UserRideStat):
+        conn.execute(delete(model.__table__))
+    max_id = conn.execute(select(func.max(RideRequest.id))).scalar() or 0
+    db.commit()
+
+    t = RideRequest.__table__
+    last_id = 0
+    processed = 0
+    while last_id < max_id:
+        conn = db.connection()
+        rows = conn.execute(
+            select(t.c.id, t.c.user_id, t.c.status, t.c.created_at, t.c.updated_at)
+            .where(t.c.id > last_id, t.c.id <= max_id)
+            .order_by(t.c.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+
+        events = []
+        for ride_id, user_id, status, created_at, updated_at in rows:
+            created_at = created_at or datetime.now(timezone.utc)
+            events.append(RideEvent("created", user_id, "requested", created_at))
+            if status and status != "requested":
+                events.append(RideEvent("status_changed", user_id, status, updated_at or created_at))
+        apply_events(conn, events)
+        db.commit()
+
+        last_id = rows[-1][0]
+        processed += len(rows)
+        progress(f"  ... {processed} rides (up to id {last_id} of {max_id})")
+    return processed
+
+# ---------------------------------------------------------------------------
+# In-memory rollups (USE_POSTGRES=false)
+# ---------------------------------------------------------------------------
+
+class MemoryRollups:
+    """Same rollups for MemoryRideStore, kept in dicts"""
+
+    def __init__(self):
+        self._hourly: Counter = Counter()
+        self._day_users: Dict[date, set] = {}
+        self._user_rides: Counter = Counter()
+        self._user_last: Dict[str, datetime] = {}
+
+    def record(self, e: RideEvent):
+        self._hourly[(hour_bucket(e.at), e.status)] += 1
+        if e.kind == "created":
+            self._user_rides[e.user_id] += 1
+            self._user_last[e.user_id] = e.at
+            self._day_users.setdefault(day_bucket(e.at), set()).add(e.user_id)
+
+    def hourly(self, start: datetime, end: datetime, status: Optional[str] = None) -> List[Dict]:
+        result = []
+        hour = hour_bucket(start)
+        statuses = [status] if status else sorted({s for _, s in self._hourly})
+        while hour <= hour_bucket(end):
+            for s in statuses:
+                n = self._hourly.get((hour, s))
+                if n:
+                    result.append({"hour": hour, "status": s, "ride_count": n})
+            hour += timedelta(hours=1)
+        return result
+
+    def daily_active_users(self, start: date, end: date) -> List[Dict]:
+        result = []
+        day = start
+        while day <= end:
+            users = self._day_users.get(day)
+            if users:
+                result.append({"day": day, "active_users": len(users)})
+            day += timedelta(days=1)
+        return result
+
+    def user_stats(self, user_id: str) -> Optional[Dict]:
+        if user_id not in self._user_rides:
+            return None
+        return {"user_id": user_id, "ride_count": self._user_rides[user_id], "last_ride_at": self._user_last[user_id]}
+
+    def clear(self):
+        self._hourly.clear()
+        self._day_users.clear()
+        self._user_rides.clear()
+        self._user_last.clear()
@@ -0,0 +1,596 @@
+"""
+Road-graph ETA engine.
+
+The road network is held in compressed sparse row (CSR) form: for node u
+its outgoing edges are targets[offsets[u]:offsets[u + 1]] with travel
+times (seconds) in the same slice of weights. A reversed copy serves the
+backward half of bidirectional search and many-to-one queries. All
+arrays are `array.array`s, so a city-sized graph is a few flat buffers
+rather than millions of Python objects.
+
+Road-network file format (text, one record per line, '#' for comments):
+
+    N <node_id> <lat> <lon>
+    E <from_id> <to_id> <seconds> [oneway]
+
+Edges are two-way unless the oneway flag is 1. A parsed graph is cached
+next to the file as <path>.csr so later loads skip parsing.
+
+Queries use a contraction hierarchy when one has been built (offline,
+with build_road_graph.py, because contracting a city takes minutes) and
+fall back to bidirectional A* on the plain graph otherwise.
+"""
+import heapq
+import math
+import os
+import pickle
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+EARTH_RADIUS_M = 6371000.0
+CACHE_VERSION = 1
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+def _arrays(serialized) -> List[array]:
+    loaded = []
+    for typecode, raw in serialized:
+        a = array(typecode)
+        a.frombytes(raw)
+        loaded.append(a)
+    return loaded
+
+def _csr(node_count: int, edges: Sequence[Tuple[int, int, float]]):
+    offsets = array("l", [0]) * (node_count + 1)
+    for u, _, _ in edges:
+        offsets[u + 1] += 1
+    for i in range(node_count):
+        offsets[i + 1] += offsets[i]
+    targets = array("l", [0]) * len(edges)
+    weights = array("d", [0.0]) * len(edges)
+    cursor = array("l", offsets[:-1])
+    for u, v, w in edges:
+        targets[cursor[u]] = v
+        weights[cursor[u]] = w
+        cursor[u] += 1
+    return offsets, targets, weights
+
+class GridIndex:
+    """Buckets nodes into lat/lon cells for nearest-node lookups"""
+
+    def __init__(self, lats: array, lons: array, cell_deg: float = 0.005):
+        self.lats = lats
+        self.lons = lons
+        self.cell_deg = cell_deg
+        self.cells: Dict[Tuple[int, int], array] = {}
+        for i in range(len(lats)):
+            self.cells.setdefault(self._cell(lats[i], lons[i]), array("l")).append(i)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell_deg)), int(math.floor(lon / self.cell_deg))
+
+    def nearest(self, lat: float, lon: float, max_rings: int = 40) -> Tuple[Optional[int], float]:
+        """Closest node and its distance in metres, or (None, inf) if nothing is within max_rings cells"""
+        cx, cy = self._cell(lat, lon)
+        best, best_d = None, float("inf")
+        for ring in range(max_rings + 1):
+            for x in range(cx - ring, cx + ring + 1):
+                for y in range(cy - ring, cy + ring + 1):
+                    if max(abs(x - cx), abs(y - cy)) != ring:
+                        continue
+                    for i in self.cells.get((x, y), ()):
+                        d = haversine_m(lat, lon, self.lats[i], self.lons[i])
+                        if d < best_d:
+                            best, best_d = i, d
+            # Anything in a farther ring is at least `ring` whole cells away
+            if best is not None and best_d <= ring * self.cell_deg * 111_000 * math.cos(math.radians(lat)):
+                break
+        return best, best_d
+
+class ContractionHierarchy:
+    """
+    Nodes are contracted one at a time in order of importance; removing a
+    node adds a shortcut between two of its neighbours whenever the path
+    through it was the only shortest one. A query then only ever moves
+    "up" to more important nodes from both ends, which touches a few
+    hundred nodes instead of a large part of the city.
+
+    up_*: edges u -> v with rank[v] > rank[u], searched forward from a source.
+    down_*: edges v -> u with rank[v] > rank[u], stored at u and searched
+    backward from a target.
+    """
+
+    def __init__(self, rank: array, up: Tuple[array, array, array], down: Tuple[array, array, array]):
+        self.rank = rank
+        self.up_offsets, self.up_targets, self.up_weights = up
+        self.down_offsets, self.down_targets, self.down_weights = down
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.up_targets) + len(self.down_targets)
+
+    @classmethod
+    def build(cls, graph: "RoadGraph", witness_settle_limit: int = 100, progress=None) -> "ContractionHierarchy":
+        n = graph.node_count
+        out_adj: List[Dict[int, float]] = [{} for _ in range(n)]
+        in_adj: List[Dict[int, float]] = [{} for _ in range(n)]
+        for u in range(n):
+            for i in range(graph.offsets[u], graph.offsets[u + 1]):
+                v, w = graph.targets[i], graph.weights[i]
+                if v != u and w < out_adj[u].get(v, float("inf")):
+                    out_adj[u][v] = w
+                    in_adj[v][u] = w
+
+        deleted = [0] * n
+
+        def shortcuts_for(v: int) -> List[Tuple[int, int, float]]:
+            outs = out_adj[v]
+            if not outs:
+                return []
+            max_out = max(outs.values())
+            needed = []
+            for u, c_uv in in_adj[v].items():
+                dist = _witness_search(out_adj, u, v, c_uv + max_out, witness_settle_limit)
+                for w, c_vw in outs.items():
+                    if w != u and dist.get(w, float("inf")) > c_uv + c_vw:
+                        needed.append((u, w, c_uv + c_vw))
+            return needed
+
+        def priority(v: int, shortcuts) -> int:
+            # Edge difference, plus a term that spreads contraction evenly over the map
+            return len(shortcuts) - len(in_adj[v]) - len(out_adj[v]) + deleted[v]
+
+        heap = [(priority(v, shortcuts_for(v)), v) for v in range(n)]
+        heapq.heapify(heap)
+        rank = array("l", [0]) * n
+        up: List[List[Tuple[int, float]]] = [[] for _ in range(n)]
+        down: List[List[Tuple[int, float]]] = [[] for _ in range(n)]
+        order = 0
+        while heap:
+            _, v = heapq.heappop(heap)
+            shortcuts = shortcuts_for(v)
+            p = priority(v, shortcuts)
+            if heap and p > heap[0][0]:
+                # Priorities go stale as neighbours are contracted; re-queue lazily
+                heapq.heappush(heap, (p, v))
+                continue
+
+            rank[v] = order
+            order += 1
+            up[v] = list(out_adj[v].items())
+            down[v] = list(in_adj[v].items())
+            for u in in_adj[v]:
+                del out_adj[u][v]
+                deleted[u] += 1
+            for w in out_adj[v]:
+                del in_adj[w][v]
+                deleted[w] += 1
+            for u, w, cost in shortcuts:
+                if cost < out_adj[u].get(w, float("inf")):
+                    out_adj[u][w] = cost
+                    in_adj[w][u] = cost
+            out_adj[v] = {}
+            in_adj[v] = {}
+            if progress and order % 10000 == 0:
+                progress(order, n)
+
+        return cls(
+            rank,
+            _csr(n, [(u, v, w) for u in range(n) for v, w in up[u]]),
+            _csr(n, [(u, v, w) for u in range(n) for v, w in down[u]]),
+        )
+
+    def _upward(self, source: int, forward: bool) -> Dict[int, float]:
+        """
+        Distances to every node reachable upward from source, skipping
+        nodes that stall-on-demand proves are reached shorter from above.
+        """
+        if forward:
+            offsets, targets, weights = self.up_offsets, self.up_targets, self.up_weights
+            s_offsets, s_targets, s_weights = self.down_offsets, self.down_targets, self.down_weights
+        else:
+            offsets, targets, weights = self.down_offsets, self.down_targets, self.down_weights
+            s_offsets, s_targets, s_weights = self.up_offsets, self.up_targets, self.up_weights
+
+        dist = {source: 0.0}
+        heap = [(0.0, source)]
+        done = set()
+        result = {}
+        while heap:
+            d, u = heapq.heappop(heap)
+            if u in done:
+                continue
+            done.add(u)
+            stalled = False
+            for i in range(s_offsets[u], s_offsets[u + 1]):
+                dx = dist.get(s_targets[i])
+                if dx is not None and dx + s_weights[i] < d:
+                    stalled = True
+                    break
+            if stalled:
+                continue
+            result[u] = d
+            for i in range(offsets[u], offsets[u + 1]):
+                v = targets[i]
+                nd = d + weights[i]
+                if nd < dist.get(v, float("inf")):
+                    dist[v] = nd
+                    heapq.heappush(heap, (nd, v))
+        return result
+
+    def shortest_time(self, source: int, target: int) -> Optional[float]:
+        if source == target:
+            return 0.0
+        forward = self._upward(source, True)
+        backward = self._upward(target, False)
+        if len(forward) > len(backward):
+            forward, backward = backward, forward
+        best = min((d + backward[u] for u, d in forward.items() if u in backward), default=None)
+        return best
+
+    def times_from(self, source: int, targets: Iterable[int], reverse: bool = False) -> Dict[int, float]:
+        """
+        Bucket-based one-to-many: one upward search per target fills
+        per-node buckets, then a single search from source scans them.
+        """
+        buckets: Dict[int, List[Tuple[int, float]]] = {}
+        for t in set(targets):
+            for u, d in self._upward(t, reverse).items():
+                buckets.setdefault(u, []).append((t, d))
+        found: Dict[int, float] = {}
+        for u, d in self._upward(source, not reverse).items():
+            for t, dt in buckets.get(u, ()):
+                if d + dt < found.get(t, float("inf")):
+                    found[t] = d + dt
+        return found
+
+def _witness_search(out_adj, source: int, skip: int, limit: float, settle_limit: int) -> Dict[int, float]:
+    """Bounded Dijkstra from source that avoids the node being contracted"""
+    dist = {source: 0.0}
+    heap = [(0.0, source)]
+    settled = 0
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        if d > limit or settled >= settle_limit:
+            break
+        settled += 1
+        for v, w in out_adj[u].items():
+            if v == skip:
+                continue
+            nd = d + w
+            if nd < dist.get(v, float("inf")):
+                dist[v] = nd
+                heapq.heappush(heap, (nd, v))
+    return dist
+
+class RoadGraph:
+    """Directed road graph in CSR form, with its reverse"""
+
+    def __init__(self, lats: array, lons: array, edges: Sequence[Tuple[int, int, float]]):
+        self.lats = lats
+        self.lons = lons
+        self.offsets, self.targets, self.weights = _csr(len(lats), edges)
+        self.rev_offsets, self.rev_targets, self.rev_weights = _csr(len(lats), [(v, u, w) for u, v, w in edges])
+        # Fastest straight-line speed of any edge; keeps the A* heuristic a lower bound
+        self.max_speed = max(
+            (haversine_m(lats[u], lons[u], lats[v], lons[v]) / w for u, v, w in edges if w > 0),
+            default=1.0,
+        ) or 1.0
+        self.index = GridIndex(lats, lons)
+        self.hierarchy: Optional[ContractionHierarchy] = None
+
+    @property
+    def node_count(self) -> int:
+        return len(self.lats)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    @classmethod
+    def from_file(cls, path: str, use_cache: bool = True) -> "RoadGraph":
+        cache_path = path + ".csr"
+        if use_cache and os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(path):
+            with open(cache_path, "rb") as f:
+                data = pickle.load(f)
+            if data.get("version") == CACHE_VERSION:
+                return cls._from_cache(data)
+
+        ids: Dict[str, int] = {}
+        lats, lons = array("d"), array("d")
+        raw_edges = []
+        with open(path) as f:
+            for line_no, line in enumerate(f, 1):
+                parts = line.split("#", 1)[0].split()
+                if not parts:
+                    continue
+                if parts[0] == "N":
+                    ids[parts[1]] = len(lats)
+                    lats.append(float(parts[2]))
+                    lons.append(float(parts[3]))
+                elif parts[0] == "E":
+                    raw_edges.append((parts[1], parts[2], float(parts[3]), len(parts) > 4 and parts[4] == "1"))
+                else:
+                    raise ValueError(f"{path}:{line_no}: unknown record type {parts[0]!r}")
+
+        edges = []
+        for a, b, seconds, oneway in raw_edges:
+            u, v = ids[a], ids[b]
+            edges.append((u, v, seconds))
+            if not oneway:
+                edges.append((v, u, seconds))
+
+        graph = cls(lats, lons, edges)
+        if use_cache:
+            try:
+                graph.save_cache(cache_path)
+            except OSError as e:
+                # e.g. a read-only graph directory: the parsed graph is still good
+                print(f"⚠️  Could not write {cache_path} ({e}); the graph will be parsed again on the next load")
+        return graph
+
+    def build_hierarchy(self, progress=None) -> ContractionHierarchy:
+        self.hierarchy = ContractionHierarchy.build(self, progress=progress)
+        return self.hierarchy
+
+    def save_cache(self, cache_path: str):
+        edges = (self.offsets, self.targets, self.weights, self.rev_offsets, self.rev_targets, self.rev_weights)
+        hierarchy = None
+        if self.hierarchy is not None:
+            h = self.hierarchy
+            hierarchy = [(a.typecode, a.tobytes()) for a in (
+                h.rank, h.up_offsets, h.up_targets, h.up_weights, h.down_offsets, h.down_targets, h.down_weights
+            )]
+        with open(cache_path, "wb") as f:
+            pickle.dump({
+                "version": CACHE_VERSION,
+                "lats": self.lats.tobytes(), "lons": self.lons.tobytes(),
+                "arrays": [(a.typecode, a.tobytes()) for a in edges],
+                "max_speed": self.max_speed,
+                "hierarchy": hierarchy,
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def _from_cache(cls, data) -> "RoadGraph":
+        graph = cls.__new__(cls)
+        graph.lats = array("d")
+        graph.lats.frombytes(data["lats"])
+        graph.lons = array("d")
+        graph.lons.frombytes(data["lons"])
+        (graph.offsets, graph.targets, graph.weights,
+         graph.rev_offsets, graph.rev_targets, graph.rev_weights) = _arrays(data["arrays"])
+        graph.max_speed = data["max_speed"]
+        graph.index = GridIndex(graph.lats, graph.lons)
+        graph.hierarchy = None
+        if data.get("hierarchy"):
+            rank, *csr = _arrays(data["hierarchy"])
+            graph.hierarchy = ContractionHierarchy(rank, tuple(csr[:3]), tuple(csr[3:]))
+        return graph
+
+    def shortest_time(self, source: int, target: int) -> Optional[float]:
+        """
+        Bidirectional A* with the average potential
+        p(v) = (h_target(v) - h_source(v)) / 2, which is consistent for
+        both directions, so the search can stop as soon as the two
+        frontier minimums together reach the best meeting found.
+        """
+        if source == target:
+            return 0.0
+
+        lats, lons, speed = self.lats, self.lons, self.max_speed
+        s_lat, s_lon, t_lat, t_lon = lats[source], lons[source], lats[target], lons[target]
+        potentials: Dict[int, float] = {}
+
+        def potential(v: int) -> float:
+            p = potentials.get(v)
+            if p is None:
+                lat, lon = lats[v], lons[v]
+                p = (haversine_m(lat, lon, t_lat, t_lon) - haversine_m(lat, lon, s_lat, s_lon)) / (2 * speed)
+                potentials[v] = p
+            return p
+
+        dist_f = {source: 0.0}
+        dist_r = {target: 0.0}
+        done_f, done_r = set(), set()
+        heap_f = [(potential(source), source)]
+        heap_r = [(-potential(target), target)]
+        best = float("inf")
+
+        while heap_f and heap_r:
+            if heap_f[0][0] + heap_r[0][0] >= best:
+                break
+            forward = heap_f[0][0] <= heap_r[0][0]
+            if forward:
+                heap, dist, other, done, sign = heap_f, dist_f, dist_r, done_f, 1
+                offsets, targets, weights = self.offsets, self.targets, self.weights
+            else:
+                heap, dist, other, done, sign = heap_r, dist_r, dist_f, done_r, -1
+                offsets, targets, weights = self.rev_offsets, self.rev_targets, self.rev_weights
+
+            _, u = heapq.heappop(heap)
+            if u in done:
+                continue
+            done.add(u)
+            du = dist[u]
+            for i in range(offsets[u], offsets[u + 1]):
+                v = targets[i]
+                nd = du + weights[i]
+                if nd < dist.get(v, float("inf")):
+                    dist[v] = nd
+                    heapq.heappush(heap, (nd + sign * potential(v), v))
+                    if v in other and nd + other[v] < best:
+                        best = nd + other[v]
+
+        return None if best == float("inf") else best
+
+    def times_from(self, source: int, targets: Iterable[int], reverse: bool = False) -> Dict[int, float]:
+        """
+        One Dijkstra from source (on the reversed graph when reverse=True,
+        i.e. times *to* source) that stops once every target is settled.
+        """
+        offsets, edge_targets, weights = (
+            (self.rev_offsets, self.rev_targets, self.rev_weights) if reverse
+            else (self.offsets, self.targets, self.weights)
+        )
+        remaining = set(targets)
+        found: Dict[int, float] = {}
+        dist = {source: 0.0}
+        heap = [(0.0, source)]
+        done = set()
+        while heap and remaining:
+            du, u = heapq.heappop(heap)
+            if u in done:
+                continue
+            done.add(u)
+            if u in remaining:
+                remaining.discard(u)
+                found[u] = du
+            for i in range(offsets[u], offsets[u + 1]):
+                v = edge_targets[i]
+                nd = du + weights[i]
+                if nd < dist.get(v, float("inf")):
+                    dist[v] = nd
+                    heapq.heappush(heap, (nd, v))
+        return found
+
+class EtaEngine:
+    """
+    Point-to-point and one-to-many travel times between coordinates.
+
+    Coordinates are snapped to the nearest graph node; the distance from
+    the point to its node is added at ACCESS_SPEED. Results for recent
+    (origin cell, destination cell) pairs are kept in an LRU cache.
+    """
+    ACCESS_SPEED = 5.0  # m/s to get from a coordinate onto the road network
+    MAX_SNAP_M = 2000.0
+
+    def __init__(self, graph: RoadGraph, cache_size: int = 100_000, cache_cell_deg: float = 0.002):
+        self.graph = graph
+        # Both routers offer shortest_time(source, target) and times_from(source, targets, reverse)
+        self.router = graph.hierarchy or graph
+        self.cache_size = cache_size
+        self.cache_cell_deg = cache_cell_deg
+        self._cache: "OrderedDict[Tuple, Optional[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def snap(self, lat: float, lon: float) -> Tuple[Optional[int], float]:
+        node, d = self.graph.index.nearest(lat, lon)
+        if node is None or d > self.MAX_SNAP_M:
+            return None, d
+        return node, d
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cache_cell_deg)), int(math.floor(lon / self.cache_cell_deg))
+
+    def eta_seconds(self, src_lat: float, src_lon: float, dst_lat: float, dst_lon: float) -> Optional[float]:
+        """Travel time in seconds, or None if either point is off the network or unreachable"""
+        key = self._cell(src_lat, src_lon) + self._cell(dst_lat, dst_lon)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+            self.misses += 1
+
+        source, d_src = self.snap(src_lat, src_lon)
+        target, d_dst = self.snap(dst_lat, dst_lon)
+        seconds = None
+        if source is not None and target is not None:
+            on_road = self.router.shortest_time(source, target)
+            if on_road is not None:
+                seconds = on_road + (d_src + d_dst) / self.ACCESS_SPEED
+
+        with self._lock:
+            self._cache[key] = seconds
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return seconds
+
+    def eta_one_to_many(
+        self, lat: float, lon: float, points: List[Tuple[float, float]], reverse: bool = False
+    ) -> List[Optional[float]]:
+        """
+        Travel times from (lat, lon) to each point in one search. With
+        reverse=True the times are from each point *to* (lat, lon), e.g.
+        from every candidate driver to a pickup.
+        """
+        hub, d_hub = self.snap(lat, lon)
+        if hub is None:
+            return [None] * len(points)
+        snapped = [self.snap(p_lat, p_lon) for p_lat, p_lon in points]
+        times = self.router.times_from(hub, {node for node, _ in snapped if node is not None}, reverse=reverse)
+        results = []
+        for node, d in snapped:
+            if node is None or node not in times:
+                results.append(None)
+            else:
+                results.append(times[node] + (d + d_hub) / self.ACCESS_SPEED)
+        return results
+
+    def stats(self) -> Dict:
+        return {
+            "nodes": self.graph.node_count,
+            "edges": self.graph.edge_count,
+            "router": "contraction-hierarchy" if self.graph.hierarchy else "bidirectional-astar",
+            "cache_entries": len(self._cache),
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+        }
+
+_engine: Optional[EtaEngine] = None
+_engine_loaded = False
+_engine_lock = threading.Lock()
+
+def _load_engine():
+    global _engine, _engine_loaded
+    from config import settings
+
+    path = settings.ROAD_GRAPH_PATH
+    _engine = None
+    try:
+        if path and os.path.exists(path):
+            graph = RoadGraph.from_file(path)
+            if graph.hierarchy is None:
+                print(f"⚠️  {path} has no contraction hierarchy; ETAs use slower A* "
+                      f"(run python build_road_graph.py {path})")
+            _engine = EtaEngine(graph, cache_size=settings.ETA_CACHE_SIZE)
+        elif path:
+            print(f"⚠️  ROAD_GRAPH_PATH {path} not found; ETAs disabled")
+    except Exception as e:
+        # A bad graph disables ETAs; rides are still created, without estimated_duration
+        print(f"❌ Could not load road graph {path}: {e!r}; ETAs disabled")
+    _engine_loaded = True
+
+def load_eta_engine() -> Optional[EtaEngine]:
+    """(Re)load the engine for ROAD_GRAPH_PATH, e.g. from the startup hook; None if there is none"""
+    with _engine_lock:
+        _load_engine()
+    return _engine
+
+def get_eta_engine() -> Optional[EtaEngine]:
+    """The process-wide engine, loaded once (normally at startup); None if no graph is loaded"""
+    if not _engine_loaded:
+        with _engine_lock:
+            if not _engine_loaded:
+                _load_engine()
+    return _engine
+
+def estimate_duration_minutes(src_lat, src_lon, dst_lat, dst_lon) -> Optional[int]:
+    """Road-network ETA rounded up to whole minutes, or None if it can't be computed"""
+    if None in (src_lat, src_lon, dst_lat, dst_lon):
+        return None
+    engine = get_eta_engine()
+    if engine is None:
+        return None
+    seconds = engine.eta_seconds(src_lat, src_lon, dst_lat, dst_lon)
+    return None if seconds is None else max(1, math.ceil(seconds / 60))
@@ -0,0 +1,384 @@
+"""
+Append-only log of ride lifecycle events on local disk.
+
+The log is a directory of segment files named after the offset of their
+first byte (00000000000000000000.log, 00000000000067108921.log, ...).
+An offset is a byte position in the whole log, so a consumer only has to
+remember one integer to resume. Each record is
+
+    [u32 payload length][u32 crc32(payload)][payload]
+
+and a ride event payload is a fixed struct followed by the user_id and
+status strings (see encode_event), so readers can decode straight out of
+the mapped segment.
+
+Appends from every thread and process go through an flock on the
+directory. A segment is sealed once it reaches segment_bytes; the next
+append starts a new one. With sync=True, append() returns only after
+the record is fsynced. Concurrent appenders share fsyncs: whoever syncs
+first covers every record written before it (group commit).
+"""
+import fcntl
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+RECORD_HEADER = struct.Struct("<II")
+EVENT_HEADER = struct.Struct("<BqdHH")  # kind, ride_id, at (epoch seconds), len(user_id), len(status)
+EVENT_KINDS = {"created": 1, "status_changed": 2}
+EVENT_KIND_NAMES = {code: name for name, code in EVENT_KINDS.items()}
+SEGMENT_SUFFIX = ".log"
+
+class LoggedRideEvent(NamedTuple):
+    offset: int
+    kind: str
+    ride_id: int
+    user_id: str
+    status: str
+    at: datetime
+
+def encode_event(kind: str, ride_id: int, user_id: str, status: str, at: datetime) -> bytes:
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)
+    user = user_id.encode()
+    state = status.encode()
+    return EVENT_HEADER.pack(EVENT_KINDS[kind], ride_id, at.timestamp(), len(user), len(state)) + user + state
+
+def decode_event(offset: int, payload) -> LoggedRideEvent:
+    """Decode a payload (bytes or a memoryview into a segment) without copying the fixed part"""
+    code, ride_id, at, user_len, status_len = EVENT_HEADER.unpack_from(payload)
+    start = EVENT_HEADER.size
+    user_id = str(payload[start:start + user_len], "utf-8")
+    status = str(payload[start + user_len:start + user_len + status_len], "utf-8")
+    return LoggedRideEvent(
+        offset, EVENT_KIND_NAMES[code], ride_id, user_id, status,
+        datetime.fromtimestamp(at, tz=timezone.utc),
+    )
+
+def _segment_name(base: int) -> str:
+    return f"{base:020d}{SEGMENT_SUFFIX}"
+
+def list_segments(directory: str) -> List[int]:
+    """Base offsets of the segments in a log directory, oldest first"""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(int(name[:-len(SEGMENT_SUFFIX)]) for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX))
+
+def _valid_length(data, start: int = 0) -> int:
+    """Bytes from start that hold complete records with matching checksums"""
+    position, end = start, len(data)
+    while position + RECORD_HEADER.size <= end:
+        length, crc = RECORD_HEADER.unpack_from(data, position)
+        record_end = position + RECORD_HEADER.size + length
+        if record_end > end or zlib.crc32(data[position + RECORD_HEADER.size:record_end]) != crc:
+            break
+        position = record_end
+    return position - start
+
+class EventLog:
+    """Appender for one log directory"""
+
+    def __init__(self, directory: str, segment_bytes: int = 64 * 1024 * 1024, sync: bool = True,
+                 linger: float = 0.0):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.sync = sync
+        # Optional pause before an fsync so more appends can join the group
+        self.linger = linger
+        os.makedirs(directory, exist_ok=True)
+        self._lock_fd = os.open(os.path.join(directory, ".lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._fd: Optional[int] = None
+        self._base = 0
+        self._retired: List[int] = []
+        self._written = 0  # records appended by this process
+        self._synced = 0   # records known to be on disk
+        self.appends = 0
+        self.bytes = 0
+        self.fsyncs = 0
+        self.fsync_seconds = 0.0
+        with self._lock:
+            self._locked(self._recover)
+
+    def _locked(self, fn):
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            return fn()
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _open_segment(self, base: int):
+        if self._fd is not None:
+            self._retired.append(self._fd)
+        self._fd = os.open(os.path.join(self.directory, _segment_name(base)), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._base = base
+
+    def _recover(self):
+        """Open the newest segment, dropping a torn record left at its end by a crash"""
+        segments = list_segments(self.directory)
+        base = segments[-1] if segments else 0
+        path = os.path.join(self.directory, _segment_name(base))
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, "r+b") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    valid = _valid_length(data)
+                if valid < os.path.getsize(path):
+                    f.truncate(valid)
+        self._open_segment(base)
+
+    def _current_size(self) -> int:
+        """Size of the segment to append to, moving to a newer one if this one is sealed"""
+        size = os.fstat(self._fd).st_size
+        if size < self.segment_bytes:
+            return size
+        newest = list_segments(self.directory)[-1]
+        if newest != self._base:
+            # Another process rolled the log
+            self._open_segment(newest)
+            return os.fstat(self._fd).st_size
+        # Sealed by us: fsync it before anything lands in the next segment
+        os.fsync(self._fd)
+        self._open_segment(self._base + size)
+        return 0
+
+    def append(self, payload: bytes) -> int:
+        """Append one record and return its offset (after it is fsynced, if sync is on)"""
+        record = RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+        def write():
+            size = self._current_size()  # may move to a new segment, so read _base after it
+            offset = self._base + size
+            os.write(self._fd, record)
+            return offset
+
+        with self._lock:
+            offset = self._locked(write)
+            self._written += 1
+            sequence = self._written
+            self.appends += 1
+            self.bytes += len(record)
+        if self.sync:
+            self._sync_up_to(sequence)
+        return offset
+
+    def _sync_up_to(self, sequence: int):
+        if self._synced >= sequence:
+            return
+        with self._sync_lock:
+            if self._synced >= sequence:
+                return
+            if self.linger:
+                time.sleep(self.linger)
+            with self._lock:
+                target, fd, retired = self._written, self._fd, self._retired
+                self._retired = []
+            started = time.perf_counter()
+            os.fdatasync(fd)
+            self.fsync_seconds += time.perf_counter() - started
+            self.fsyncs += 1
+            for old in retired:
+                os.close(old)  # already fsynced when it was sealed
+            self._synced = target
+
+    def flush(self):
+        """fsync everything appended so far (for sync=False logs)"""
+        self._sync_up_to(self._written)
+
+    def end_offset(self) -> int:
+        def end():
+            size = self._current_size()
+            return self._base + size
+
+        with self._lock:
+            return self._locked(end)
+
+    def stats(self) -> Dict:
+        return {
+            "directory": self.directory,
+            "segments": len(list_segments(self.directory)),
+            "end_offset": self.end_offset(),
+            "appends": self.appends,
+            "bytes": self.bytes,
+            "fsyncs": self.fsyncs,
+            "records_per_fsync": round(self.appends / self.fsyncs, 2) if self.fsyncs else None,
+            "fsync_ms_avg": round(self.fsync_seconds * 1000 / self.fsyncs, 3) if self.fsyncs else None,
+        }
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            for fd in self._retired + [self._fd]:
+                os.close(fd)
+            self._retired, self._fd = [], None
+        os.close(self._lock_fd)
+
+class LogReader:
+    """
+    Sequential reader over memory-mapped segments. Payloads are returned
+    as memoryviews into the mapping, so nothing is copied until a
+    consumer decodes them; they stay valid while the reader is open.
+    """
+
+    def __init__(self, directory: str, offset: int = 0):
+        self.directory = directory
+        self.position = offset
+        self._base: Optional[int] = None
+        self._map: Optional[mmap.mmap] = None
+        self._view: Optional[memoryview] = None
+        self._old_maps: List[mmap.mmap] = []
+        self._seek(offset)
+
+    def _seek(self, offset: int):
+        segments = list_segments(self.directory)
+        containing = [base for base in segments if base <= offset]
+        self._base = containing[-1] if containing else (segments[0] if segments else None)
+        if self._base is not None and self.position < self._base:
+            self.position = self._base  # older segments were deleted
+        self._remap()
+
+    def _release_maps(self):
+        """Close mappings that no handed-out payload still points into"""
+        still_used = []
+        for m in self._old_maps:
+            try:
+                m.close()
+            except BufferError:
+                still_used.append(m)
+        self._old_maps = still_used
+
+    def _remap(self):
+        if self._map is not None:
+            self._view.release()
+            self._old_maps.append(self._map)
+            self._release_maps()
+        self._map = self._view = None
+        if self._base is None:
+            return
+        with open(os.path.join(self.directory, _segment_name(self._base)), "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size:
+                self._map = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+                self._view = memoryview(self._map)
+
+    def _mapped_size(self) -> int:
+        return len(self._map) if self._map is not None else 0
+
+    def _next_segment(self) -> Optional[int]:
+        later = [base for base in list_segments(self.directory) if self._base is None or base > self._base]
+        return later[0] if later else None
+
+    def read(self, max_records: int = 10000) -> List[Tuple[int, memoryview]]:
+        """Up to max_records (offset, payload) pairs from the current position; [] when caught up"""
+        records = []
+        while len(records) < max_records:
+            if self._base is None:
+                self._seek(self.position)
+                if self._base is None:
+                    break
+            start = self.position - self._base
+            if start + RECORD_HEADER.size > self._mapped_size():
+                on_disk = os.path.getsize(os.path.join(self.directory, _segment_name(self._base)))
+                if on_disk > self._mapped_size():
+                    self._remap()
+                    continue
+                following = self._next_segment()
+                if following is None:
+                    break
+                # All writes to a segment happen before the next one is created,
+                # so check once more for a tail written just before the roll
+                if os.path.getsize(os.path.join(self.directory, _segment_name(self._base))) > self._mapped_size():
+                    self._remap()
+                    continue
+                self._base = self.position = following
+                self._remap()
+                continue
+            length, crc = RECORD_HEADER.unpack_from(self._view, start)
+            end = start + RECORD_HEADER.size + length
+            if end > self._mapped_size():
+                self._remap()
+                if end > self._mapped_size():
+                    break  # record still being written
+                continue
+            payload = self._view[start + RECORD_HEADER.size:end]
+            if zlib.crc32(payload) != crc:
+                break  # torn write at the tail; wait for recovery or a retry
+            records.append((self.position, payload))
+            self.position = self._base + end
+        return records
+
+    def __iter__(self) -> Iterator[Tuple[int, memoryview]]:
+        """Everything from the current position to the end of the log"""
+        while True:
+            batch = self.read()
+            if not batch:
+                return
+            yield from batch
+
+    def events(self) -> Iterator[LoggedRideEvent]:
+        for offset, payload in self:
+            yield decode_event(offset, payload)
+
+    def tail(self, poll_interval: float = 0.05, stop: Optional[threading.Event] = None) -> Iterator[Tuple[int, memoryview]]:
+        """Follow the log, yielding records as they are appended, until stop is set"""
+        while stop is None or not stop.is_set():
+            batch = self.read()
+            if not batch:
+                time.sleep(poll_interval)
+                continue
+            yield from batch
+
+    def close(self):
+        if self._map is not None:
+            self._view.release()
+            self._old_maps.append(self._map)
+        self._map = self._view = None
+        # A mapping a consumer still holds a view into goes away with the view
+        self._release_maps()
+        self._old_maps = []
+
+# ---------------------------------------------------------------------------
+# Ride event publishing
+# ---------------------------------------------------------------------------
+
+_log: Optional[EventLog] = None
+_log_pid: Optional[int] = None
+_log_lock = threading.Lock()
+
+def get_event_log() -> Optional[EventLog]:
+    """This process's appender for EVENT_LOG_DIR, or None when the log is disabled"""
+    global _log, _log_pid
+    from config import settings
+
+    if not settings.EVENT_LOG_DIR:
+        return None
+    if _log is None or _log_pid != os.getpid():
+        with _log_lock:
+            if _log is None or _log_pid != os.getpid():
+                _log = EventLog(
+                    settings.EVENT_LOG_DIR,
+                    segment_bytes=settings.EVENT_LOG_SEGMENT_BYTES,
+                    sync=settings.EVENT_LOG_FSYNC,
+                    linger=settings.EVENT_LOG_LINGER_MS / 1000,
+                )
+                _log_pid = os.getpid()
+    return _log
+
+def publish_ride_event(kind: str, ride) -> Optional[int]:
+    """Append a ride lifecycle event after the change has been committed; returns its offset"""
+    at = ride.created_at if kind == "created" and ride.created_at else datetime.now(timezone.utc)
+    try:
+        # Opening the log (e.g. an unwritable EVENT_LOG_DIR) can fail as well as appending to it
+        log = get_event_log()
+        if log is None:
+            return None
+        return log.append(encode_event(kind, ride.id, ride.user_id, ride.status, at))
+    except OSError as e:
+        # The ride itself is already committed; don't fail the request over the log
+        print(f"⚠️  Failed to log {kind} event for ride {ride.id}: {e}")
+        return None
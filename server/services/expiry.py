@@ -0,0 +1,142 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, get_args
+
+from models.database import SessionLocal
+from models.pool import LatencyHistogram
+from models.schemas import RideStatus
+from config import settings
+from services.ride_store import get_ride_store
+
+STATUSES = get_args(RideStatus)
+
+def parse_ttls(spec: str) -> Dict[str, float]:
+    """RIDE_EXPIRY_TTLS ("requested=1800,accepted=21600") as {status: seconds}"""
+    ttls = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        status, _, seconds = part.partition("=")
+        status = status.strip()
+        if status not in STATUSES:
+            raise ValueError(f"Unknown ride status in RIDE_EXPIRY_TTLS: {status!r}")
+        ttls[status] = float(seconds)
+    return {status: ttl for status, ttl in ttls.items() if ttl > 0}
+
+class ExpirySweeper(threading.Thread):
+    """
+    Periodically expires rides that have sat in a status for longer than
+    that status' TTL: open rides are cancelled, finished ones deactivated,
+    so they drop out of ride lists and dispatch searches.
+
+    Each sweep works through every status in batches of batch_size rows,
+    one transaction per batch, and stops after max_batches so one sweep
+    can't hold the database for long; whatever is left waits for the next.
+    Every server process runs its own sweeper. Batches skip rows another
+    process has locked, so the processes split the work instead of
+    queueing on each other.
+    """
+
+    def __init__(self, ttls: Dict[str, float], interval: float = 60.0, batch_size: int = 500, max_batches: int = 20):
+        super().__init__(daemon=True, name="ride-expiry")
+        self.ttls = ttls
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self.durations = LatencyHistogram()
+        self.sweeps = 0
+        self.errors = 0
+        self.expired: Dict[str, int] = {status: 0 for status in ttls}
+        self.last_sweep: Optional[Dict] = None
+        self.last_error: Optional[str] = None
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                # Keep sweeping; the database may be back by the next interval
+                with self._lock:
+                    self.errors += 1
+                    self.last_error = f"{type(e).__name__}: {e}"
+                print(f"⚠️  Ride expiry sweep failed: {e}")
+
+    def stop(self):
+        self._stopped.set()
+
+    def sweep(self) -> Dict[str, int]:
+        """Expire stale rides now; returns the number expired per status"""
+        started = time.perf_counter()
+        now = datetime.now(timezone.utc)
+        touched = {}
+        batches = 0
+        db = SessionLocal()
+        try:
+            store = get_ride_store(db)
+            for status, ttl in self.ttls.items():
+                cutoff = now - timedelta(seconds=ttl)
+                touched[status] = 0
+                for _ in range(self.max_batches):
+                    n = store.expire_stale(status, cutoff, self.batch_size)
+                    batches += 1
+                    touched[status] += n
+                    if n < self.batch_size:
+                        break
+        finally:
+            db.close()
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.sweeps += 1
+                self.durations.record(elapsed)
+                for status, n in touched.items():
+                    self.expired[status] += n
+                self.last_sweep = {
+                    "at": now.isoformat(),
+                    "duration_ms": round(elapsed * 1000, 3),
+                    "batches": batches,
+                    "expired": touched,
+                }
+        return touched
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "ttls": self.ttls,
+                "interval": self.interval,
+                "batch_size": self.batch_size,
+                "max_batches": self.max_batches,
+                "sweeps": self.sweeps,
+                "errors": self.errors,
+                "last_error": self.last_error,
+                "expired_total": dict(self.expired),
+                "last_sweep": self.last_sweep,
+                "duration": self.durations.to_dict(),
+            }
+
+_sweeper: Optional[ExpirySweeper] = None
+
+def start_expiry_sweeper() -> Optional[ExpirySweeper]:
+    """Start this process' sweeper; None when RIDE_EXPIRY_TTLS sets no TTLs"""
+    global _sweeper
+    ttls = parse_ttls(settings.RIDE_EXPIRY_TTLS)
+    if _sweeper is None and ttls:
+        _sweeper = ExpirySweeper(
+            ttls,
+            interval=settings.RIDE_EXPIRY_INTERVAL,
+            batch_size=settings.RIDE_EXPIRY_BATCH_SIZE,
+            max_batches=settings.RIDE_EXPIRY_MAX_BATCHES,
+        )
+        _sweeper.start()
+    return _sweeper
+
+def stop_expiry_sweeper():
+    global _sweeper
+    if _sweeper is not None:
+        _sweeper.stop()
+        _sweeper = None
+
+def get_expiry_sweeper() -> Optional[ExpirySweeper]:
+    return _sweeper
@@ -0,0 +1,253 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from typing import Dict, Iterator, List, Tuple
+
+from services.ride_store import EXPORT_COLUMNS, RideStore
+
+FORMATS = ("csv", "parquet")
+
+# ---------------------------------------------------------------------------
+# Encoders
+# ---------------------------------------------------------------------------
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def csv_bytes(rows: List[Tuple], header: bool = False) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    writer.writerows([_csv_value(v) for v in row] for row in rows)
+    return buf.getvalue().encode()
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+    return pyarrow, pyarrow.parquet
+
+def parquet_schema():
+    pa, _ = _pyarrow()
+    types = {
+        "id": pa.int64(),
+        "estimated_duration": pa.int64(),
+        "is_active": pa.bool_(),
+        "created_at": pa.timestamp("us", tz="UTC"),
+        "updated_at": pa.timestamp("us", tz="UTC"),
+    }
+    floats = {"source_latitude", "source_longitude", "dest_latitude", "dest_longitude", "estimated_fare", "distance"}
+    return pa.schema([
+        (name, types.get(name, pa.float64() if name in floats else pa.string()))
+        for name in EXPORT_COLUMNS
+    ])
+
+class RowGroupBuffer:
+    """Collects chunks of rows column-wise until there are enough for one Parquet row group"""
+
+    def __init__(self, row_group_size: int):
+        self.row_group_size = row_group_size
+        self.columns = [[] for _ in EXPORT_COLUMNS]
+        self.rows = 0
+
+    def add(self, rows: List[Tuple]):
+        for row in rows:
+            for column, value in zip(self.columns, row):
+                column.append(value)
+        self.rows += len(rows)
+
+    def full(self) -> bool:
+        return self.rows >= self.row_group_size
+
+    def take_table(self, schema):
+        pa, _ = _pyarrow()
+        table = pa.Table.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(self.columns, schema)],
+            schema=schema,
+        )
+        self.columns = [[] for _ in EXPORT_COLUMNS]
+        self.rows = 0
+        return table
+
+# ---------------------------------------------------------------------------
+# HTTP streaming
+# ---------------------------------------------------------------------------
+
+def stream_csv(store: RideStore, chunk_size: int, after_id: int = 0, **filters) -> Iterator[bytes]:
+    yield csv_bytes([], header=True)
+    for rows in store.iter_chunks(chunk_size, after_id=after_id, **filters):
+        yield csv_bytes(rows)
+
+class _DrainableSink(io.RawIOBase):
+    """Write-only file object whose contents can be drained after each row group"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def stream_parquet(
+    store: RideStore, chunk_size: int, row_group_size: int, after_id: int = 0, **filters
+) -> Iterator[bytes]:
+    _, pq = _pyarrow()
+    schema = parquet_schema()
+    sink = _DrainableSink()
+    writer = pq.ParquetWriter(sink, schema)
+    buffer = RowGroupBuffer(row_group_size)
+    try:
+        for rows in store.iter_chunks(chunk_size, after_id=after_id, **filters):
+            buffer.add(rows)
+            if buffer.full():
+                writer.write_table(buffer.take_table(schema), row_group_size=row_group_size)
+                yield sink.drain()
+        if buffer.rows:
+            writer.write_table(buffer.take_table(schema), row_group_size=row_group_size)
+    finally:
+        writer.close()
+    yield sink.drain()
+
+# ---------------------------------------------------------------------------
+# Resumable file exports
+# ---------------------------------------------------------------------------
+
+def _encode_filters(filters: Dict) -> Dict:
+    return {k: v.isoformat() if isinstance(v, datetime) else v for k, v in filters.items() if v is not None}
+
+def _save_checkpoint(path: str, state: Dict):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def export_to_file(
+    store: RideStore,
+    path: str,
+    fmt: str = "csv",
+    chunk_size: int = 10000,
+    row_group_size: int = 100000,
+    rows_per_part: int = 1000000,
+    resume: bool = False,
+    progress=None,
+    **filters,
+) -> Dict:
+    """
+    Export rides to a CSV file, or to a directory of Parquet part files.
+
+    Progress is checkpointed to <path>.checkpoint: for CSV after every
+    chunk (with the byte offset reached), for Parquet after every closed
+    part file. With resume=True the export continues from the checkpoint,
+    truncating any CSV bytes written after it.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}, expected one of {FORMATS}")
+
+    checkpoint_path = path + ".checkpoint"
+    encoded_filters = _encode_filters(filters)
+    state = {"format": fmt, "filters": encoded_filters, "last_id": 0, "rows": 0, "offset": 0, "parts": 0, "complete": False}
+    if resume and os.path.exists(checkpoint_path):
+        with open(checkpoint_path) as f:
+            saved = json.load(f)
+        if saved.get("format") != fmt or saved.get("filters") != encoded_filters:
+            raise ValueError("Checkpoint was written for a different format or filters; can't resume")
+        state = saved
+        if state["complete"]:
+            return state
+
+    if fmt == "csv":
+        _export_csv(store, path, checkpoint_path, state, chunk_size, progress, filters)
+    else:
+        _export_parquet(store, path, checkpoint_path, state, chunk_size, row_group_size, rows_per_part, progress, filters)
+
+    state["complete"] = True
+    _save_checkpoint(checkpoint_path, state)
+    return state
+
+def _export_csv(store, path, checkpoint_path, state, chunk_size, progress, filters):
+    mode = "r+b" if state["offset"] and os.path.exists(path) else "wb"
+    with open(path, mode) as f:
+        if mode == "r+b":
+            f.seek(state["offset"])
+            f.truncate()
+        else:
+            f.write(csv_bytes([], header=True))
+        for rows in store.iter_chunks(chunk_size, after_id=state["last_id"], **filters):
+            f.write(csv_bytes(rows))
+            f.flush()
+            os.fsync(f.fileno())
+            state.update(last_id=rows[-1][0], rows=state["rows"] + len(rows), offset=f.tell())
+            _save_checkpoint(checkpoint_path, state)
+            if progress:
+                progress(state)
+
+def _export_parquet(store, path, checkpoint_path, state, chunk_size, row_group_size, rows_per_part, progress, filters):
+    _, pq = _pyarrow()
+    schema = parquet_schema()
+    os.makedirs(path, exist_ok=True)
+
+    writer = None
+    part_rows = 0
+    part_last_id = state["last_id"]
+    buffer = RowGroupBuffer(row_group_size)
+
+    def flush_row_group():
+        nonlocal writer
+        if writer is None:
+            # Part files from an interrupted run past the checkpoint are simply overwritten
+            part_path = os.path.join(path, f"part-{state['parts']:05d}.parquet")
+            writer = pq.ParquetWriter(part_path, schema)
+        writer.write_table(buffer.take_table(schema), row_group_size=row_group_size)
+
+    def close_part():
+        nonlocal writer, part_rows
+        if buffer.rows:
+            flush_row_group()
+        if writer is None:
+            return
+        writer.close()
+        writer = None
+        state.update(last_id=part_last_id, rows=state["rows"] + part_rows, parts=state["parts"] + 1)
+        part_rows = 0
+        _save_checkpoint(checkpoint_path, state)
+        if progress:
+            progress(state)
+
+    try:
+        for rows in store.iter_chunks(chunk_size, after_id=state["last_id"], **filters):
+            buffer.add(rows)
+            part_rows += len(rows)
+            part_last_id = rows[-1][0]
+            if buffer.full():
+                flush_row_group()
+            if part_rows >= rows_per_part:
+                close_part()
+        close_part()
+    finally:
+        if writer is not None:
+            # Interrupted: leave the partial part for the resumed run to overwrite
+            writer.close()
@@ -1,40 +1,67 @@
+from sqlalchemy import inspect
 from sqlalchemy.orm import Session
-from ..models.database import RideRequest
-from ..models.schemas import RideRequestCreate
-from typing import List, Optional
+from models.schemas import RideRequestCreate, UserResponse
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from services.ride_store import RideStore, get_ride_store
+from services.eta import estimate_duration_minutes
+from services.user_service import UserService
+
+# find_nearby_rides first searches radius_m / NEARBY_FIRST_PASS
+NEARBY_FIRST_PASS = 4
 
 class RideService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, store: Optional[RideStore] = None):
         self.db = db
+        self.store = store or get_ride_store(db)
     
-    def create_ride_request(self, ride_data: RideRequestCreate) -> RideRequest:
-        """Create a new ride request"""
-        try:
-            db_ride = RideRequest(
-                user_id=ride_data.user_id,
-                source_location=ride_data.source_location,
-                dest_location=ride_data.dest_location
-            )
-            self.db.add(db_ride)
-            self.db.commit()
-            self.db.refresh(db_ride)
-            return db_ride
-        except Exception as e:
-            self.db.rollback()
-            # BUG: Not handling database connection errors properly
-            # This could crash if database is unavailable
-            raise e
+    def create_ride_request(self, ride_data: RideRequestCreate):
+        """Create a new ride request, with a road-network ETA when coordinates are given"""
+        estimated_duration = estimate_duration_minutes(
+            ride_data.source_latitude, ride_data.source_longitude,
+            ride_data.dest_latitude, ride_data.dest_longitude,
+        )
+        return self.store.create(ride_data, estimated_duration=estimated_duration)
     
-    def get_ride_requests(self, user_id: Optional[str] = None) -> List[RideRequest]:
+    def get_ride_requests(self, user_id: Optional[str] = None, expand_user: bool = False) -> List:
         """Get ride requests, optionally filtered by user_id"""
-        query = self.db.query(RideRequest).filter(RideRequest.is_active == True)
-        if user_id:
-            query = query.filter(RideRequest.user_id == user_id)
-        return query.all()
+        return self.store.list(user_id=user_id, expand_user=expand_user)
     
-    def get_ride_request(self, ride_id: int) -> Optional[RideRequest]:
+    def get_ride_request(self, ride_id: int, expand_user: bool = False):
         """Get a specific ride request by ID"""
-        return self.db.query(RideRequest).filter(
-            RideRequest.id == ride_id,
-            RideRequest.is_active == True
-        ).first()
\ No newline at end of file
+        return self.store.get(ride_id, expand_user=expand_user)
+    
+    def find_nearby_rides(self, lat: float, lon: float, radius_m: float, statuses: Sequence[str], limit: int) -> List[Tuple]:
+        """
+        (ride, meters) for rides picked up within radius_m of a point, closest first.
+        Searches a smaller circle first and only widens to radius_m if that holds
+        fewer than `limit` rides, so dense areas don't read every ride in radius_m.
+        """
+        found = self.store.near(lat, lon, radius_m / NEARBY_FIRST_PASS, statuses, limit)
+        if len(found) >= limit:
+            # Everything outside the smaller circle is farther than these
+            return found
+        return self.store.near(lat, lon, radius_m, statuses, limit)
+    
+    def get_rider_profiles(self, rides: List) -> Dict[str, UserResponse]:
+        """
+        Profiles of the users who requested rides, keyed by user_id. Uses the
+        .user relationship where the store already loaded it, and one batched
+        (cached) lookup for the rest.
+        """
+        profiles: Dict[str, UserResponse] = {}
+        missing = set()
+        for ride in rides:
+            state = inspect(ride, raiseerr=False)
+            if state is not None and "user" not in state.unloaded:
+                if ride.user is not None:
+                    profiles[ride.user_id] = UserResponse.model_validate(ride.user)
+            else:
+                missing.add(ride.user_id)
+        if missing:
+            profiles.update(UserService(self.db).get_profiles(missing))
+        return profiles
+    
+    def update_ride_status(self, ride_id: int, status: str):
+        """Change a ride's status"""
+        return self.store.update_status(ride_id, status)
@@ -0,0 +1,414 @@
+import heapq
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session, selectinload
+
+from models import geohash
+from models.database import rollups_enabled
+from models.model import RideRequest
+from models.schemas import RideRequestCreate
+from config import settings
+from services.analytics import MemoryRollups, RideEvent, SqlRollups, apply_events
+from services.event_log import publish_ride_event
+
+# Column order of the tuples yielded by RideStore.iter_chunks
+EXPORT_COLUMNS = [column.name for column in RideRequest.__table__.columns]
+
+# Rides still waiting on a driver or a trip. When these expire they are
+# cancelled; rides in a final status are only deactivated.
+OPEN_STATUSES = ("requested", "accepted")
+
+def expired_status(status: str) -> str:
+    return "cancelled" if status in OPEN_STATUSES else status
+
+class RideStore(ABC):
+    """Storage interface behind RideService"""
+
+    @abstractmethod
+    def create(self, ride_data: RideRequestCreate, estimated_duration: Optional[int] = None):
+        """Store a new requested ride and return it"""
+
+    @abstractmethod
+    def get(self, ride_id: int, expand_user: bool = False):
+        """An active ride by id, or None"""
+
+    @abstractmethod
+    def list(self, user_id: Optional[str] = None, expand_user: bool = False) -> List:
+        """Active rides; with expand_user, stores that can load each ride's .user in bulk do so"""
+
+    @abstractmethod
+    def update_status(self, ride_id: int, status: str):
+        """Set a ride's status; returns the updated ride or None if it doesn't exist"""
+
+    @abstractmethod
+    def expire_stale(self, status: str, cutoff: datetime, batch_size: int) -> int:
+        """
+        Deactivate up to batch_size active rides in `status` whose last change
+        (updated_at, else created_at) is before cutoff, oldest first, cancelling
+        open ones. Returns the number of rides expired.
+        """
+
+    @abstractmethod
+    def near(self, lat: float, lon: float, radius_m: float, statuses: Sequence[str], limit: int) -> List[Tuple]:
+        """
+        Active rides with one of `statuses` picked up within radius_m of (lat, lon),
+        closest first, as (ride, distance in meters) pairs
+        """
+
+    @abstractmethod
+    def iter_chunks(
+        self,
+        chunk_size: int,
+        after_id: int = 0,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        status: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ) -> Iterator[List[Tuple]]:
+        """Rides with id > after_id matching the filters, in id order, as lists of EXPORT_COLUMNS tuples"""
+
+class SqlRideStore(RideStore):
+    """RideStore backed by the ride_requests table"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create(self, ride_data: RideRequestCreate, estimated_duration: Optional[int] = None) -> RideRequest:
+        try:
+            db_ride = RideRequest(
+                user_id=ride_data.user_id,
+                source_location=ride_data.source_location,
+                dest_location=ride_data.dest_location,
+                source_latitude=ride_data.source_latitude,
+                source_longitude=ride_data.source_longitude,
+                dest_latitude=ride_data.dest_latitude,
+                dest_longitude=ride_data.dest_longitude,
+                estimated_duration=estimated_duration
+            )
+            self.db.add(db_ride)
+            self.db.commit()
+            self.db.refresh(db_ride)
+        except Exception:
+            # Leave the session usable; callers turn the error into a 500
+            self.db.rollback()
+            raise
+        publish_ride_event("created", db_ride)
+        return db_ride
+
+    def get(self, ride_id: int, expand_user: bool = False) -> Optional[RideRequest]:
+        query = self.db.query(RideRequest).filter(
+            RideRequest.id == ride_id,
+            RideRequest.is_active == True
+        )
+        if expand_user:
+            query = query.options(selectinload(RideRequest.user))
+        return query.first()
+
+    def list(self, user_id: Optional[str] = None, expand_user: bool = False) -> List[RideRequest]:
+        query = self.db.query(RideRequest).filter(RideRequest.is_active == True)
+        if user_id:
+            query = query.filter(RideRequest.user_id == user_id)
+        if expand_user:
+            # One extra SELECT ... WHERE user_id IN (...) for the whole page, not one per ride
+            query = query.options(selectinload(RideRequest.user))
+        return query.all()
+
+    def update_status(self, ride_id: int, status: str) -> Optional[RideRequest]:
+        ride = self.get(ride_id)
+        if ride is None:
+            return None
+        previous = ride.status
+        try:
+            ride.status = status
+            self.db.commit()
+            self.db.refresh(ride)
+        except Exception:
+            self.db.rollback()
+            raise
+        if previous != status:
+            publish_ride_event("status_changed", ride)
+        return ride
+
+    def expire_stale(self, status, cutoff, batch_size):
+        last_change = func.coalesce(RideRequest.updated_at, RideRequest.created_at)
+        # Walks ix_ride_requests_active_status_changed. SKIP LOCKED lets several
+        # workers sweep at once, each taking rows nobody else holds.
+        batch = (
+            select(RideRequest.id)
+            .where(RideRequest.is_active == True, RideRequest.status == status, last_change < cutoff)
+            .order_by(last_change)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        new_status = expired_status(status)
+        try:
+            expired = self.db.execute(
+                update(RideRequest)
+                .where(RideRequest.id.in_(batch.scalar_subquery()))
+                .values(status=new_status, is_active=False, updated_at=func.now())
+                .returning(RideRequest.id, RideRequest.user_id, RideRequest.status, RideRequest.created_at)
+                .execution_options(synchronize_session=False)
+            ).all()
+            if expired and new_status != status and rollups_enabled():
+                # Bulk UPDATE skips the flush hook that keeps the rollups current
+                now = datetime.now(timezone.utc)
+                apply_events(self.db.connection(),
+                             [RideEvent("status_changed", ride.user_id, new_status, now) for ride in expired])
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        if new_status != status:
+            for ride in expired:
+                publish_ride_event("status_changed", ride)
+        return len(expired)
+
+    def near(self, lat, lon, radius_m, statuses, limit):
+        # Index prefilter: one (status, geohash range) branch per status and covering range
+        branches = []
+        for low, high in geohash.prefix_ranges(geohash.cover(lat, lon, radius_m)):
+            cell = RideRequest.source_geohash >= low
+            if high is not None:
+                cell = and_(cell, RideRequest.source_geohash < high)
+            branches.extend(and_(RideRequest.status == status, cell) for status in statuses)
+        candidates = self.db.execute(
+            select(RideRequest.id, RideRequest.source_latitude, RideRequest.source_longitude)
+            .where(RideRequest.is_active == True, or_(*branches))
+        )
+        # Exact distance on the candidates, then load only the rows being returned
+        distances = _closest(lat, lon, radius_m, limit, candidates)
+        if not distances:
+            return []
+        rides = self.db.query(RideRequest).filter(RideRequest.id.in_(list(distances))).all()
+        return sorted(((ride, distances[ride.id]) for ride in rides), key=lambda pair: pair[1])
+
+    def iter_chunks(self, chunk_size, after_id=0, start=None, end=None, status=None, user_id=None):
+        t = RideRequest.__table__
+        stmt = select(*t.columns).where(t.c.id > after_id, t.c.is_active == True).order_by(t.c.id)
+        if start:
+            stmt = stmt.where(t.c.created_at >= start)
+        if end:
+            stmt = stmt.where(t.c.created_at < end)
+        if status:
+            stmt = stmt.where(t.c.status == status)
+        if user_id:
+            stmt = stmt.where(t.c.user_id == user_id)
+        # Server-side cursor: only one chunk of rows is held in memory at a time
+        result = self.db.execute(stmt, execution_options={"stream_results": True, "yield_per": chunk_size})
+        try:
+            for partition in result.partitions(chunk_size):
+                yield [tuple(row) for row in partition]
+        finally:
+            result.close()
+
+def _closest(lat: float, lon: float, radius_m: float, limit: int, candidates) -> Dict[int, float]:
+    """{id: meters} for the `limit` (id, lat, lon) candidates nearest to (lat, lon) within radius_m"""
+    within = []
+    for ride_id, ride_lat, ride_lon in candidates:
+        distance = geohash.haversine_m(lat, lon, ride_lat, ride_lon)
+        if distance <= radius_m:
+            within.append((distance, ride_id))
+    return {ride_id: distance for distance, ride_id in heapq.nsmallest(limit, within)}
+
+class MemoryRide:
+    """One row of the in-memory store; same attributes as the RideRequest model"""
+    __slots__ = (
+        "id", "user_id", "source_location", "dest_location",
+        "source_latitude", "source_longitude", "dest_latitude", "dest_longitude", "source_geohash",
+        "status", "is_active", "estimated_fare", "estimated_duration", "distance",
+        "created_at", "updated_at",
+    )
+
+    def __init__(self, id: int, user_id: str, source_location: str, dest_location: str):
+        self.id = id
+        self.user_id = user_id
+        self.source_location = source_location
+        self.dest_location = dest_location
+        self.source_latitude = None
+        self.source_longitude = None
+        self.dest_latitude = None
+        self.dest_longitude = None
+        self.source_geohash = None
+        self.status = "requested"
+        self.is_active = True
+        self.estimated_fare = None
+        self.estimated_duration = None
+        self.distance = None
+        self.created_at = datetime.now(timezone.utc)
+        self.updated_at = None
+
+    def __repr__(self):
+        return f"<MemoryRide(id={self.id}, user_id='{self.user_id}', status='{self.status}')>"
+
+class MemoryRideStore(RideStore):
+    """
+    In-memory RideStore with the same semantics as the Postgres backend.
+
+    Rows live in a list at position id - 1, so the auto-increment id is
+    also the primary index. Secondary indexes map user_id and status
+    (active rides only) to the ids that have them, and pickup
+    geohash cells (GEO_CELL characters) to the rides starting in them.
+    """
+
+    GEO_CELL = 5  # about 5km x 5km
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows: List[MemoryRide] = []
+        self._by_user: Dict[str, List[int]] = {}
+        self._by_status: Dict[str, Set[int]] = {}
+        self._by_cell: Dict[str, List[int]] = {}
+        self.rollups = MemoryRollups()
+
+    def create(self, ride_data: RideRequestCreate, estimated_duration: Optional[int] = None) -> MemoryRide:
+        with self._lock:
+            ride = MemoryRide(
+                id=len(self._rows) + 1,
+                user_id=ride_data.user_id,
+                source_location=ride_data.source_location,
+                dest_location=ride_data.dest_location
+            )
+            ride.source_latitude = ride_data.source_latitude
+            ride.source_longitude = ride_data.source_longitude
+            ride.dest_latitude = ride_data.dest_latitude
+            ride.dest_longitude = ride_data.dest_longitude
+            ride.source_geohash = geohash.encode_point(ride.source_latitude, ride.source_longitude)
+            ride.estimated_duration = estimated_duration
+            self._rows.append(ride)
+            self._by_user.setdefault(ride.user_id, []).append(ride.id)
+            if ride.source_geohash:
+                self._by_cell.setdefault(ride.source_geohash[:self.GEO_CELL], []).append(ride.id)
+            self._by_status.setdefault(ride.status, set()).add(ride.id)
+            self.rollups.record(RideEvent("created", ride.user_id, ride.status, ride.created_at))
+        publish_ride_event("created", ride)
+        return ride
+
+    def _row(self, ride_id: int) -> Optional[MemoryRide]:
+        if 1 <= ride_id <= len(self._rows):
+            ride = self._rows[ride_id - 1]
+            if ride.is_active:
+                return ride
+        return None
+
+    # Users aren't kept here; RideService looks riders up in one batch for expand_user
+
+    def get(self, ride_id: int, expand_user: bool = False) -> Optional[MemoryRide]:
+        return self._row(ride_id)
+
+    def list(self, user_id: Optional[str] = None, expand_user: bool = False) -> List[MemoryRide]:
+        if user_id:
+            rows = [self._rows[i - 1] for i in self._by_user.get(user_id, ())]
+        else:
+            rows = list(self._rows)
+        return [ride for ride in rows if ride.is_active]
+
+    def list_by_status(self, status: str) -> List[MemoryRide]:
+        return [self._rows[i - 1] for i in sorted(self._by_status.get(status, ()))]
+
+    def update_status(self, ride_id: int, status: str) -> Optional[MemoryRide]:
+        with self._lock:
+            ride = self._row(ride_id)
+            if ride is None or ride.status == status:
+                return ride
+            self._by_status[ride.status].discard(ride_id)
+            self._by_status.setdefault(status, set()).add(ride_id)
+            ride.status = status
+            ride.updated_at = datetime.now(timezone.utc)
+            self.rollups.record(RideEvent("status_changed", ride.user_id, status, ride.updated_at))
+        publish_ride_event("status_changed", ride)
+        return ride
+
+    def expire_stale(self, status, cutoff, batch_size):
+        new_status = expired_status(status)
+        with self._lock:
+            stale = []
+            for ride_id in self._by_status.get(status, ()):
+                ride = self._rows[ride_id - 1]
+                if (ride.updated_at or ride.created_at) < cutoff:
+                    stale.append(ride)
+            stale = heapq.nsmallest(batch_size, stale, key=lambda ride: ride.updated_at or ride.created_at)
+            now = datetime.now(timezone.utc)
+            for ride in stale:
+                # Inactive rides leave the status index, so later sweeps don't revisit them
+                self._by_status[status].discard(ride.id)
+                ride.status = new_status
+                ride.is_active = False
+                ride.updated_at = now
+                if new_status != status:
+                    self.rollups.record(RideEvent("status_changed", ride.user_id, new_status, now))
+        if new_status != status:
+            for ride in stale:
+                publish_ride_event("status_changed", ride)
+        return len(stale)
+
+    def near(self, lat, lon, radius_m, statuses, limit):
+        buckets: Dict[str, List[str]] = {}
+        for cell in geohash.cover(lat, lon, radius_m):
+            if len(cell) >= self.GEO_CELL:
+                buckets.setdefault(cell[:self.GEO_CELL], []).append(cell)
+            else:
+                # Coarser than the index: every indexed cell inside it
+                for key in [key for key in self._by_cell if key.startswith(cell)]:
+                    buckets.setdefault(key, []).append(key)
+
+        wanted = set(statuses)
+        candidates = []
+        for key, cells in buckets.items():
+            prefixes = tuple(cells)
+            for ride_id in self._by_cell.get(key, ()):
+                ride = self._rows[ride_id - 1]
+                if ride.is_active and ride.status in wanted and ride.source_geohash.startswith(prefixes):
+                    candidates.append((ride_id, ride.source_latitude, ride.source_longitude))
+        distances = _closest(lat, lon, radius_m, limit, candidates)
+        return sorted(((self._rows[i - 1], d) for i, d in distances.items()), key=lambda pair: pair[1])
+
+    def iter_chunks(self, chunk_size, after_id=0, start=None, end=None, status=None, user_id=None):
+        # created_at is timezone-aware here; treat naive bounds as UTC
+        start = start.replace(tzinfo=timezone.utc) if start and start.tzinfo is None else start
+        end = end.replace(tzinfo=timezone.utc) if end and end.tzinfo is None else end
+        if user_id:
+            ids = [i for i in self._by_user.get(user_id, ()) if i > after_id]
+        elif status:
+            ids = sorted(i for i in self._by_status.get(status, ()) if i > after_id)
+        else:
+            ids = range(after_id + 1, len(self._rows) + 1)
+
+        chunk = []
+        for i in ids:
+            ride = self._rows[i - 1]
+            if not ride.is_active or (status and ride.status != status):
+                continue
+            if (start and ride.created_at < start) or (end and ride.created_at >= end):
+                continue
+            chunk.append(tuple(getattr(ride, name) for name in EXPORT_COLUMNS))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+            self._by_user.clear()
+            self._by_status.clear()
+            self._by_cell.clear()
+            self.rollups.clear()
+
+# Shared by every request in this process when USE_POSTGRES is false
+memory_store = MemoryRideStore()
+
+def get_ride_store(db: Session) -> RideStore:
+    """The configured backend: the database when USE_POSTGRES is set, otherwise memory"""
+    if settings.USE_POSTGRES:
+        return SqlRideStore(db)
+    return memory_store
+
+def get_ride_rollups(db: Session):
+    """Analytics rollups for the configured backend"""
+    if settings.USE_POSTGRES:
+        return SqlRollups(db)
+    return memory_store.rollups
@@ -0,0 +1,162 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+
+from models.model import User
+from models.schemas import UserResponse
+from config import settings
+
+class UserProfileCache:
+    """
+    Bounded LRU of UserResponse profiles with a TTL.
+
+    Loaders call begin_load before reading the database and finish_load
+    after. An invalidation while a load is in flight bumps that load's
+    generation, and finish_load only stores a result whose generation
+    hasn't changed, so a read that races an update can't put the old
+    profile back after the update invalidated it. Generations are only
+    kept while a load for the user is in flight.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Optional[UserResponse]]]" = OrderedDict()
+        # user_id -> [loads in flight, generation]
+        self._loads: Dict[str, List[int]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str) -> Tuple[bool, Optional[UserResponse]]:
+        """(found, profile); a cached None means the user is known not to exist"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return True, entry[1]
+
+    def begin_load(self, user_id: str) -> int:
+        """Register a load from the database; returns the generation to pass to finish_load"""
+        with self._lock:
+            load = self._loads.setdefault(user_id, [0, 0])
+            load[0] += 1
+            return load[1]
+
+    def finish_load(self, user_id: str, generation: int, profile: Optional[UserResponse] = None, store: bool = True):
+        """End a load; with store, cache its profile unless the user was invalidated since begin_load"""
+        with self._lock:
+            load = self._loads.get(user_id)
+            if load is None:
+                return
+            load[0] -= 1
+            if load[0] == 0:
+                del self._loads[user_id]
+            if not store or load[1] != generation:
+                return
+            self._entries[user_id] = (time.monotonic() + self.ttl, profile)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            load = self._loads.get(user_id)
+            if load is not None:
+                load[1] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        return {
+            "entries": len(self._entries),
+            "max_size": self.max_size,
+            "loading": len(self._loads),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+# Shared by every request in this process
+user_cache = UserProfileCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL)
+
+class UserService:
+    def __init__(self, db: Session, cache: UserProfileCache = user_cache):
+        self.db = db
+        self.cache = cache
+
+    def create_user(self, fields: Dict) -> UserResponse:
+        """Create a user"""
+        try:
+            db_user = User(**fields)
+            self.db.add(db_user)
+            self.db.commit()
+            self.db.refresh(db_user)
+        except Exception:
+            self.db.rollback()
+            raise
+        # A "not found" may be cached for this user_id
+        self.cache.invalidate(db_user.user_id)
+        return UserResponse.model_validate(db_user)
+
+    def update_user(self, user_id: str, fields: Dict) -> Optional[UserResponse]:
+        """Update a user's profile fields; None if the user doesn't exist"""
+        db_user = self.db.query(User).filter(User.user_id == user_id).first()
+        if db_user is None:
+            return None
+        try:
+            for name, value in fields.items():
+                setattr(db_user, name, value)
+            self.db.commit()
+            self.db.refresh(db_user)
+        except Exception:
+            self.db.rollback()
+            raise
+        finally:
+            self.cache.invalidate(user_id)
+        return UserResponse.model_validate(db_user)
+
+    def get_profile(self, user_id: str) -> Optional[UserResponse]:
+        """A user's profile, from the cache when possible"""
+        found, profile = self.cache.get(user_id)
+        if found:
+            return profile
+        generation = self.cache.begin_load(user_id)
+        profile, loaded = None, False
+        try:
+            db_user = self.db.query(User).filter(User.user_id == user_id).first()
+            profile = UserResponse.model_validate(db_user) if db_user else None
+            loaded = True
+        finally:
+            self.cache.finish_load(user_id, generation, profile, store=loaded)
+        return profile
+
+    def get_profiles(self, user_ids: Iterable[str]) -> Dict[str, UserResponse]:
+        """Profiles for many users: cache hits, then one IN query for the rest"""
+        profiles: Dict[str, UserResponse] = {}
+        missing = {}
+        for user_id in set(user_ids):
+            found, profile = self.cache.get(user_id)
+            if not found:
+                missing[user_id] = self.cache.begin_load(user_id)
+            elif profile is not None:
+                profiles[user_id] = profile
+        if missing:
+            loaded = None
+            try:
+                loaded = {
+                    u.user_id: UserResponse.model_validate(u)
+                    for u in self.db.query(User).filter(User.user_id.in_(list(missing)))
+                }
+            finally:
+                for user_id, generation in missing.items():
+                    self.cache.finish_load(user_id, generation, (loaded or {}).get(user_id), store=loaded is not None)
+            profiles.update(loaded)
+        return profiles
@@ -0,0 +1,49 @@
+import os
+import time
+from typing import Optional
+
+# Shared between the launcher and the app so the leader/worker handshake lives in one place
+SCHEMA_READY_ENV = "MINIUBER_SCHEMA_READY"
+
+def process_age() -> Optional[float]:
+    """Seconds since this process was started by the OS (Linux only), including interpreter startup"""
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the ")" that closes the command name start at field 3; starttime is field 22
+            fields = f.read().rsplit(")", 1)[1].split()
+        start_ticks = int(fields[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+class ColdStartTimer:
+    """Records how long a worker took from process start to serving requests"""
+
+    def __init__(self):
+        self.imported_at = time.perf_counter()
+        self.import_age = process_age()
+        self.imports_done_at: Optional[float] = None
+        self.report = {}
+
+    def imports_done(self):
+        """Call once the app module has finished its own imports"""
+        self.imports_done_at = time.perf_counter()
+
+    def ready(self, startup_started: float) -> dict:
+        now = time.perf_counter()
+        startup_ms = (now - startup_started) * 1000
+        report = {
+            "pid": os.getpid(),
+            "startup_hook_ms": round(startup_ms, 1),
+            "since_import_ms": round((now - self.imported_at) * 1000, 1),
+        }
+        if self.imports_done_at is not None:
+            report["app_imports_ms"] = round((self.imports_done_at - self.imported_at) * 1000, 1)
+        if self.import_age is not None:
+            # Interpreter start and the launcher's (uvicorn's) imports, up to the top of main.py
+            report["before_main_import_ms"] = round(self.import_age * 1000, 1)
+            report["cold_start_ms"] = round(self.import_age * 1000 + report["since_import_ms"], 1)
+        self.report = report
+        return report
@@ -0,0 +1,322 @@
+"""
+Synthetic data for local scale testing.
+
+  python synthetic_data.py generate --users 100000 --rides 5000000
+  python synthetic_data.py scale-test --sizes 10000,100000,1000000
+
+`generate` bulk-loads realistic users and rides: pickups and drop-offs
+clustered around a few hotspots, request times following a daily
+commute curve, and a small share of users taking most of the rides.
+Postgres is loaded with COPY, SQLite with large executemany batches.
+
+`scale-test` grows ride_requests to each size in turn and runs the same
+query workload through RideService at every step, so you can see how
+each endpoint's latency changes with row count.
+"""
+import sys
+import os
+import argparse
+import csv
+import io
+import math
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import geohash
+
+# (latitude, longitude, spread in degrees, share of trips)
+HOTSPOTS = [
+    (12.9716, 77.5946, 0.020, 0.30),  # city centre
+    (12.9352, 77.6245, 0.015, 0.20),  # business district
+    (12.9698, 77.7500, 0.020, 0.15),  # tech park
+    (13.1986, 77.7066, 0.010, 0.10),  # airport
+    (12.9141, 77.6101, 0.030, 0.25),  # residential belt
+]
+
+# Relative ride volume for each hour of the day (UTC+0 for simplicity)
+HOURLY_WEIGHTS = [
+    1, 0.6, 0.4, 0.3, 0.4, 1, 3, 7, 9, 7, 5, 4,
+    4, 4, 4, 5, 6, 8, 9, 8, 6, 4, 3, 2,
+]
+
+STATUSES = ["requested", "accepted", "completed", "cancelled"]
+
+RIDE_COLUMNS = [
+    "user_id", "source_location", "dest_location",
+    "source_latitude", "source_longitude", "dest_latitude", "dest_longitude", "source_geohash",
+    "status", "is_active", "estimated_fare", "estimated_duration", "distance",
+    "created_at", "updated_at",
+]
+USER_COLUMNS = ["user_id", "name", "phone", "email", "created_at"]
+
+def user_key(i: int) -> str:
+    return f"user_{i:07d}"
+
+def _pick_point(rng: random.Random):
+    r = rng.random()
+    for lat, lon, spread, share in HOTSPOTS:
+        r -= share
+        if r <= 0:
+            break
+    return rng.gauss(lat, spread), rng.gauss(lon, spread)
+
+def _haversine_km(lat1, lon1, lat2, lon2) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(a))
+
+def generate_users(count: int, start: int = 0, seed: int = 1) -> Iterator[List]:
+    rng = random.Random(seed + start)
+    now = datetime.now(timezone.utc)
+    for i in range(start, start + count):
+        yield [
+            user_key(i),
+            f"Rider {i}",
+            f"+91{rng.randrange(10**9, 10**10)}",
+            f"rider{i}@example.com",
+            now - timedelta(days=rng.randrange(730)),
+        ]
+
+def generate_rides(count: int, users: int, days: int = 90, skew: float = 3.0, seed: int = 2) -> Iterator[List]:
+    """
+    Rides over the last `days` days. User i is picked with probability
+    falling off like a power law (skew=1 is uniform), so a few heavy
+    riders account for most trips.
+    """
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    hours = list(range(24))
+    for _ in range(count):
+        user = user_key(min(users - 1, int(users * rng.random() ** skew)))
+        day = now - timedelta(days=rng.randrange(days))
+        created_at = day.replace(
+            hour=rng.choices(hours, HOURLY_WEIGHTS)[0], minute=rng.randrange(60), second=rng.randrange(60)
+        )
+        if created_at > now:
+            created_at -= timedelta(days=1)
+
+        src_lat, src_lon = _pick_point(rng)
+        dst_lat, dst_lon = _pick_point(rng)
+        distance = round(_haversine_km(src_lat, src_lon, dst_lat, dst_lon) * 1.3, 2)  # roads aren't straight
+        duration = max(3, int(distance * rng.uniform(2.0, 4.5)))
+
+        # Old requests have been resolved; recent ones may still be open
+        age = now - created_at
+        if age > timedelta(hours=2):
+            status = rng.choices(STATUSES, [0.01, 0.01, 0.83, 0.15])[0]
+        else:
+            status = rng.choices(STATUSES, [0.4, 0.3, 0.2, 0.1])[0]
+        updated_at = None if status == "requested" else created_at + timedelta(minutes=duration)
+
+        src_lat, src_lon = round(src_lat, 6), round(src_lon, 6)
+        yield [
+            user,
+            f"{src_lat:.4f},{src_lon:.4f}",
+            f"{dst_lat:.4f},{dst_lon:.4f}",
+            src_lat, src_lon, round(dst_lat, 6), round(dst_lon, 6), geohash.encode(src_lat, src_lon),
+            status, True,
+            round(40 + distance * rng.uniform(12, 18), 2), duration, distance,
+            created_at, updated_at,
+        ]
+
+def _batches(rows: Iterator[List], size: int) -> Iterator[List[List]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def bulk_load(engine, table, columns: List[str], rows: Iterator[List], batch_size: int = 100000) -> int:
+    """
+    Load rows into a model's table (e.g. RideRequest.__table__) with the fastest
+    path for the engine: COPY on Postgres, executemany elsewhere
+    """
+    loaded = 0
+    if engine.dialect.name == "postgresql":
+        column_list = ", ".join(columns)
+        for batch in _batches(rows, batch_size):
+            buf = io.StringIO()
+            csv.writer(buf).writerows(batch)  # None becomes an empty, unquoted field = NULL
+            buf.seek(0)
+            raw = engine.raw_connection()
+            try:
+                cursor = raw.cursor()
+                cursor.copy_expert(f"COPY {table.name} ({column_list}) FROM STDIN WITH (FORMAT csv)", buf)
+                raw.commit()
+            finally:
+                raw.close()
+            loaded += len(batch)
+    else:
+        from sqlalchemy import insert
+        for batch in _batches(rows, batch_size):
+            with engine.begin() as conn:
+                conn.execute(insert(table), [dict(zip(columns, row)) for row in batch])
+            loaded += len(batch)
+    return loaded
+
+def analyze(engine):
+    """Refresh planner statistics after a bulk load"""
+    from sqlalchemy import text
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+
+def _count(engine, model) -> int:
+    from sqlalchemy import func, select
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(model)).scalar()
+
+def generate(users: int, rides: int, days: int, skew: float, batch_size: int, rebuild_rollups: bool = True):
+    from models.database import SessionLocal, create_tables, get_engine
+    from models.model import RideRequest, User
+    from services.analytics import backfill_rollups
+
+    create_tables()
+    engine = get_engine()
+
+    existing_users = _count(engine, User)
+    if existing_users < users:
+        started = time.perf_counter()
+        n = bulk_load(engine, User.__table__, USER_COLUMNS,
+                      generate_users(users - existing_users, start=existing_users), batch_size)
+        print(f"👤 Loaded {n:,} users in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    existing_rides = _count(engine, RideRequest)
+    n = bulk_load(engine, RideRequest.__table__, RIDE_COLUMNS,
+                  generate_rides(rides, max(users, 1), days=days, skew=skew, seed=existing_rides), batch_size)
+    elapsed = time.perf_counter() - started
+    print(f"🚗 Loaded {n:,} rides in {elapsed:.1f}s ({n / max(elapsed, 1e-9):,.0f} rows/s)")
+
+    analyze(engine)
+    if rebuild_rollups:
+        # Bulk loads bypass the ORM, so the analytics rollups need rebuilding
+        db = SessionLocal()
+        try:
+            backfill_rollups(db, progress=lambda msg: None)
+        finally:
+            db.close()
+        print("📊 Analytics rollups rebuilt")
+
+# ---------------------------------------------------------------------------
+# Scale test
+# ---------------------------------------------------------------------------
+
+def _timed(samples: Dict[str, List[float]], name: str, fn):
+    started = time.perf_counter()
+    result = fn()
+    samples.setdefault(name, []).append(time.perf_counter() - started)
+    return result
+
+def run_workload(db, users: int, max_id: int, iterations: int, seed: int = 3) -> Dict[str, List[float]]:
+    """The fixed query mix, run through RideService against the database"""
+    from models.schemas import RideRequestCreate
+    from services.ride_service import RideService
+    from services.ride_store import SqlRideStore
+
+    rng = random.Random(seed)
+    service = RideService(db, store=SqlRideStore(db))
+    samples: Dict[str, List[float]] = {}
+    heavy_user = user_key(0)
+
+    for _ in range(iterations):
+        _timed(samples, "get_ride_request", lambda: service.get_ride_request(rng.randint(1, max_id)))
+        _timed(samples, "list rides (heavy user)", lambda: service.get_ride_requests(user_id=heavy_user))
+        _timed(samples, "list rides (typical user)",
+               lambda: service.get_ride_requests(user_id=user_key(rng.randrange(users // 2, users))))
+        ride = _timed(samples, "create_ride_request", lambda: service.create_ride_request(
+            RideRequestCreate(user_id=user_key(rng.randrange(users)), source_location="A", dest_location="B")))
+        _timed(samples, "update_ride_status", lambda: service.update_ride_status(ride.id, "cancelled"))
+        db.expire_all()
+    # Unfiltered listing returns the whole table; a couple of samples is plenty
+    for _ in range(2):
+        _timed(samples, "list rides (all)", lambda: service.get_ride_requests())
+        db.expunge_all()
+    return samples
+
+def _percentile(values: List[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+def scale_test(sizes: List[int], users: int, iterations: int, batch_size: int):
+    from sqlalchemy import func, select
+    from models.database import SessionLocal, create_tables, get_engine
+    from models.model import RideRequest, User
+
+    create_tables()
+    engine = get_engine()
+    # Users are only needed for realism of the data, not by the workload; each table is topped up separately
+    existing_users = _count(engine, User)
+    if existing_users < users:
+        bulk_load(engine, User.__table__, USER_COLUMNS,
+                  generate_users(users - existing_users, start=existing_users), batch_size)
+
+    results = []
+    for size in sorted(sizes):
+        current = _count(engine, RideRequest)
+        if current < size:
+            print(f"🌱 Growing ride_requests {current:,} -> {size:,}...")
+            bulk_load(engine, RideRequest.__table__, RIDE_COLUMNS,
+                      generate_rides(size - current, users, seed=current), batch_size)
+            analyze(engine)
+        with engine.connect() as conn:
+            max_id = conn.execute(select(func.max(RideRequest.id))).scalar()
+
+        db = SessionLocal()
+        try:
+            samples = run_workload(db, users, max_id, iterations)
+        finally:
+            db.close()
+        results.append((size, samples))
+
+        print(f"\n📏 {size:,} rides")
+        print(f"  {'operation':<28}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for name, values in samples.items():
+            print(f"  {name:<28}{statistics.median(values) * 1000:>10.2f}"
+                  f"{_percentile(values, 95) * 1000:>10.2f}{_percentile(values, 99) * 1000:>10.2f}")
+
+    if len(results) > 1:
+        (small, first), (large, last) = results[0], results[-1]
+        print(f"\n📈 p50 growth from {small:,} to {large:,} rows ({large / small:,.1f}x data)")
+        for name in first:
+            ratio = statistics.median(last[name]) / max(statistics.median(first[name]), 1e-9)
+            print(f"  {name:<28}{ratio:>8.1f}x")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic users/rides and a scale-test harness")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    gen = commands.add_parser("generate", help="Bulk-load synthetic users and rides")
+    gen.add_argument("--users", type=int, default=100000)
+    gen.add_argument("--rides", type=int, default=1000000)
+    gen.add_argument("--days", type=int, default=90)
+    gen.add_argument("--skew", type=float, default=3.0, help="1 = uniform users; higher = more skewed")
+    gen.add_argument("--batch-size", type=int, default=100000)
+    gen.add_argument("--skip-rollups", action="store_true", help="Don't rebuild analytics rollups afterwards")
+
+    scale = commands.add_parser("scale-test", help="Measure RideService latency at growing table sizes")
+    scale.add_argument("--sizes", default="10000,100000,1000000")
+    scale.add_argument("--users", type=int, default=100000)
+    scale.add_argument("--iterations", type=int, default=200)
+    scale.add_argument("--batch-size", type=int, default=100000)
+
+    args = parser.parse_args()
+    if args.command == "generate":
+        print(f"🌱 Generating {args.users:,} users and {args.rides:,} rides...")
+        generate(args.users, args.rides, args.days, args.skew, args.batch_size, not args.skip_rollups)
+    else:
+        sizes = [int(s) for s in args.sizes.split(",")]
+        scale_test(sizes, args.users, args.iterations, args.batch_size)
+
+if __name__ == "__main__":
+    main()
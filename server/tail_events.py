@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Read ride events from the event log instead of polling ride_requests.
+
+Prints events from an offset (or from where a named consumer group left
+off) and optionally keeps following the log. With --group the next
+offset is saved to <log dir>/consumers/<group>.offset after each batch.
+
+Usage: python tail_events.py [--dir DIR] [--from-offset N | --group NAME] [--follow]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import settings
+from services.event_log import LogReader, decode_event
+
+def _offset_path(directory: str, group: str) -> str:
+    return os.path.join(directory, "consumers", f"{group}.offset")
+
+def load_offset(directory: str, group: str) -> int:
+    try:
+        with open(_offset_path(directory, group)) as f:
+            return int(f.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+def save_offset(directory: str, group: str, offset: int):
+    path = _offset_path(directory, group)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        f.write(str(offset))
+    os.replace(path + ".tmp", path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Print ride events from the event log")
+    parser.add_argument("--dir", default=settings.EVENT_LOG_DIR, help="log directory (default: EVENT_LOG_DIR)")
+    parser.add_argument("--from-offset", type=int, default=None)
+    parser.add_argument("--group", default=None, help="consumer group whose offset to resume from and save")
+    parser.add_argument("--follow", action="store_true", help="keep waiting for new events")
+    args = parser.parse_args()
+
+    if not args.dir:
+        print("❌ No log directory: pass --dir or set EVENT_LOG_DIR")
+        sys.exit(1)
+
+    offset = args.from_offset if args.from_offset is not None else (load_offset(args.dir, args.group) if args.group else 0)
+    reader = LogReader(args.dir, offset)
+    try:
+        while True:
+            batch = reader.read(1000)
+            for record_offset, payload in batch:
+                event = decode_event(record_offset, payload)
+                print(json.dumps({**event._asdict(), "at": event.at.isoformat()}))
+            if batch and args.group:
+                save_offset(args.dir, args.group, reader.position)
+            if not batch:
+                if not args.follow:
+                    break
+                time.sleep(0.1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Throwaway SQLite databases for the test scripts.
+
+temp_database() points SessionLocal at a new file in a temporary
+directory, optionally with read replica files next to it. Afterwards it
+restores the database settings, the backend and admission switches, and
+the process-wide ride store and profile cache the test may have changed.
+"""
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, List
+
+from config import settings
+from models.database import create_tables, use_database
+from services.ride_store import memory_store
+from services.user_service import user_cache
+
+class TempDatabase:
+    def __init__(self, directory: str, replicas: int):
+        self.directory = directory
+        self.path = os.path.join(directory, "primary.db")
+        self.replica_paths: List[str] = [os.path.join(directory, f"replica{i + 1}.db") for i in range(replicas)]
+        self.url = f"sqlite:///{self.path}"
+        self.replica_urls = [f"sqlite:///{path}" for path in self.replica_paths]
+
+@contextmanager
+def temp_database(name: str, replicas: int = 0, create: bool = True) -> Iterator[TempDatabase]:
+    """A fresh SQLite database (tables created unless create=False) for the duration of the block"""
+    saved = (settings.DATABASE_URL, settings.DATABASE_REPLICA_URLS,
+             settings.USE_POSTGRES, settings.ADMISSION_CONTROL_ENABLED)
+    db = TempDatabase(tempfile.mkdtemp(prefix=f"miniuber_{name}_"), replicas)
+    use_database(db.url, db.replica_urls)
+    try:
+        if create:
+            create_tables()
+        yield db
+    finally:
+        use_database(*saved[:2])
+        settings.USE_POSTGRES, settings.ADMISSION_CONTROL_ENABLED = saved[2:]
+        memory_store.clear()
+        user_cache.clear()
+        shutil.rmtree(db.directory, ignore_errors=True)
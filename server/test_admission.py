@@ -0,0 +1,251 @@
+import sys
+import os
+import asyncio
+import json
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from api.admission import AdmissionControlMiddleware, BucketTable, RouteLimit, TokenBucket
+
+async def echo_app(scope, receive, send):
+    """Reads the whole body and answers with its size"""
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    payload = json.dumps({"size": len(body)}).encode()
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": payload})
+
+async def call(app, method, path, body=b"", chunk=None, query=b""):
+    """Send one request through app; returns (status, headers, JSON body, number of receive() calls)"""
+    chunk = chunk or max(len(body), 1)
+    chunks = [body[i:i + chunk] for i in range(0, len(body), chunk)] or [b""]
+    messages = [
+        {"type": "http.request", "body": c, "more_body": i < len(chunks) - 1}
+        for i, c in enumerate(chunks)
+    ]
+    received = []
+
+    async def receive():
+        message = messages.pop(0) if messages else {"type": "http.disconnect"}
+        received.append(message)
+        return message
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": query,
+        "headers": [(b"content-type", b"application/json")],
+    }
+    await app(scope, receive, send)
+    headers = dict(sent[0].get("headers", []))
+    body = sent[1]["body"]
+    return sent[0]["status"], headers, json.loads(body) if body else None, len(received)
+
+def test_token_bucket():
+    print("🧪 Testing token bucket refill...")
+    bucket = TokenBucket(rate=2.0, capacity=3, now=0.0)
+    taken = [bucket.take(0.0) for _ in range(3)]
+    wait = bucket.take(0.0)
+    after_refill = bucket.take(0.5)
+    capped = TokenBucket(rate=2.0, capacity=3, now=0.0)
+    capped.take(0.0)
+    capped.take(100.0)  # a long idle period refills to capacity, not beyond
+    assert taken == [0.0] * 3 and abs(wait - 0.5) < 1e-9 and after_refill == 0.0 and capped.tokens == 2, \
+        f"unexpected bucket behaviour: {taken}, wait {wait}, refill {after_refill}, tokens {capped.tokens}"
+    print("✅ Burst drained, 0.5s wait at 2 tokens/s, refill capped at capacity")
+
+def test_lru_eviction():
+    print("🧪 Testing per-user bucket eviction...")
+    table = BucketTable(max_size=3)
+    for user in ("a", "b", "c"):
+        table.get(user, 1.0, 5, 0.0)
+    table.get("a", 1.0, 5, 0.0)  # a is now the most recently used
+    table.get("d", 1.0, 5, 0.0)
+    keys = list(table._buckets)
+    assert len(table) == 3 and keys == ["c", "a", "d"], f"expected b to be evicted, have {keys}"
+    print("✅ Least recently used user evicted, table stays at max_size")
+
+def test_route_matching():
+    print("🧪 Testing route matching...")
+    rides = RouteLimit("POST", "/rides/")
+    ride = RouteLimit("GET", "/rides/{ride_id}")
+    cases = [
+        (rides, "POST", "/rides/", True),
+        (rides, "POST", "/rides", True),
+        (rides, "POST", "/rides/42/accept", False),
+        (rides, "GET", "/rides/", False),
+        (ride, "GET", "/rides/42", True),
+        (ride, "GET", "/rides/", False),
+        (ride, "GET", "/rides/42/events", False),
+    ]
+    failed = [(limit.path, method, path) for limit, method, path, want in cases if limit.matches(method, path) != want]
+    assert not failed, f"wrong matches: {failed}"
+    print("✅ Paths match exactly, {param} segments match one segment")
+
+def test_rate_limit_429():
+    print("🧪 Testing 429 responses...")
+    limit = RouteLimit("POST", "/rides/", user_rate=1.0, user_burst=2, global_rate=1000, global_burst=1000)
+    app = AdmissionControlMiddleware(echo_app, [limit])
+    body = json.dumps({"user_id": "rider_1"}).encode()
+
+    async def run():
+        results = [await call(app, "POST", "/rides/", body) for _ in range(3)]
+        other = await call(app, "POST", "/rides/", json.dumps({"user_id": "rider_2"}).encode())
+        return results, other
+
+    results, other = asyncio.run(run())
+    statuses = [r[0] for r in results]
+    status, headers, detail, _ = results[-1]
+    assert statuses == [200, 200, 429] and other[0] == 200, \
+        f"expected the third request from one user to be limited: {statuses}, other user {other[0]}"
+    assert headers.get(b"retry-after") == b"1" and detail == {"detail": "Rate limit exceeded"}, \
+        f"bad 429 response: {headers}, {detail}"
+    print("✅ Third request from rider_1 got 429 with Retry-After: 1, rider_2 unaffected")
+
+def test_concurrency_503():
+    print("🧪 Testing concurrency shedding...")
+
+    async def run():
+        gate = asyncio.Event()
+        started = 0
+
+        async def slow_app(scope, receive, send):
+            nonlocal started
+            started += 1
+            await gate.wait()
+            await echo_app(scope, receive, send)
+
+        limit = RouteLimit("GET", "/rides/", max_in_flight=4, min_retry_after=2.0)
+        app = AdmissionControlMiddleware(slow_app, [limit])
+        held = [asyncio.create_task(call(app, "GET", "/rides/")) for _ in range(4)]
+        while started < 4:
+            await asyncio.sleep(0)
+        rejected = await call(app, "GET", "/rides/")
+
+        # Drain time: 4 in flight, one completing every 1.5s
+        limit.avg_completion_gap = 1.5
+        drain = await call(app, "GET", "/rides/")
+        gate.set()
+        done = await asyncio.gather(*held)
+        after = await call(app, "GET", "/rides/")
+        return rejected, drain, done, after, limit.in_flight
+
+    rejected, drain, done, after, in_flight = asyncio.run(run())
+    assert rejected[0] == 503 and rejected[1].get(b"retry-after") == b"2", \
+        f"expected 503 with the 2s floor, got {rejected[0]} {rejected[1]}"
+    assert drain[1].get(b"retry-after") == b"6", f"expected Retry-After 6 (4 x 1.5s), got {drain[1].get(b'retry-after')}"
+    assert [r[0] for r in done] == [200] * 4 and after[0] == 200 and in_flight == 0, \
+        f"held requests should finish and free their slots: {[r[0] for r in done]}, {after[0]}, {in_flight}"
+    print("✅ Fifth concurrent request got 503, Retry-After follows the drain time with a floor")
+
+def test_slow_bodies_hold_slots():
+    print("🧪 Testing that requests still sending their bodies count as in flight...")
+
+    async def run():
+        gate = asyncio.Event()
+        limit = RouteLimit("POST", "/rides/", user_rate=100.0, user_burst=100, max_in_flight=3)
+        app = AdmissionControlMiddleware(echo_app, [limit])
+        body = json.dumps({"user_id": "rider_1"}).encode()
+
+        async def slow_call():
+            """A client whose body only arrives once the gate opens"""
+            sent = []
+
+            async def receive():
+                await gate.wait()
+                return {"type": "http.request", "body": body, "more_body": False}
+
+            async def send(message):
+                sent.append(message)
+
+            scope = {"type": "http", "method": "POST", "path": "/rides/", "query_string": b"",
+                     "headers": [(b"content-type", b"application/json")]}
+            await app(scope, receive, send)
+            return sent[0]["status"]
+
+        slow = [asyncio.create_task(slow_call()) for _ in range(5)]
+        for _ in range(10):
+            await asyncio.sleep(0)
+        peak = limit.in_flight
+        gate.set()
+        statuses = await asyncio.gather(*slow)
+        return peak, statuses, limit.in_flight
+
+    peak, statuses, in_flight = asyncio.run(run())
+    assert peak == 3 and sorted(statuses) == [200, 200, 200, 503, 503] and in_flight == 0, \
+        f"max_in_flight=3 should hold while bodies are pending: peak {peak}, statuses {statuses}, {in_flight} left"
+    print("✅ Three slow senders took the slots, the other two got 503 before their bodies arrived")
+
+def test_rejected_requests_free_slots():
+    print("🧪 Testing that 429s give their slot back...")
+    limit = RouteLimit("POST", "/rides/", user_rate=1.0, user_burst=1, max_in_flight=2)
+    app = AdmissionControlMiddleware(echo_app, [limit])
+    body = json.dumps({"user_id": "rider_1"}).encode()
+
+    async def run():
+        return [(await call(app, "POST", "/rides/", body))[0] for _ in range(4)], limit.in_flight
+
+    statuses, in_flight = asyncio.run(run())
+    assert statuses == [200, 429, 429, 429] and in_flight == 0, f"429s should not hold slots: {statuses}, {in_flight} left"
+    print("✅ Rate-limited requests release their slot")
+
+def test_large_body():
+    print("🧪 Testing bounded body peek...")
+    limit = RouteLimit("POST", "/rides/", user_rate=1.0, user_burst=1)
+    app = AdmissionControlMiddleware(echo_app, [limit])
+    peek = AdmissionControlMiddleware.MAX_BODY_PEEK
+
+    big = json.dumps({"user_id": "rider_1", "notes": "x" * (4 * peek)}).encode()
+    small = json.dumps({"user_id": "rider_1", "notes": "x" * 1000}).encode()
+
+    async def run():
+        # Stream the big body in 8KB chunks, without a user_id in the query string
+        status, _, payload, _ = await call(app, "POST", "/rides/", big, chunk=8192)
+        # In front of an app that never reads the body, count what the middleware reads by itself
+        async def ignore_body(scope, receive, send):
+            await send({"type": "http.response.start", "status": 204, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        peeker = AdmissionControlMiddleware(ignore_body, [RouteLimit("POST", "/rides/", user_rate=1.0, user_burst=1)])
+        _, _, _, read = await call(peeker, "POST", "/rides/", big, chunk=8192)
+        first = await call(app, "POST", "/rides/", small, chunk=100)
+        second = await call(app, "POST", "/rides/", small, chunk=100)
+        return status, payload, read, first, second
+
+    status, payload, read, first, second = asyncio.run(run())
+    assert status == 200 and payload == {"size": len(big)}, f"large body should reach the app intact: {status} {payload}"
+    assert read <= peek // 8192 + 2, f"middleware read {read} chunks before admission, expected at most {peek // 8192 + 2}"
+    assert first[0] == 200 and first[2] == {"size": len(small)} and second[0] == 429, \
+        f"small chunked body should still be replayed and rate limited: {first[0]} {first[2]}, {second[0]}"
+    print(f"✅ Stopped after {read} of {len(big) // 8192 + 1} chunks, replayed bodies arrive intact")
+
+def main():
+    print("🚀 Starting admission control tests...")
+
+    try:
+        test_token_bucket()
+        test_lru_eviction()
+        test_route_matching()
+        test_rate_limit_429()
+        test_concurrency_503()
+        test_slow_bodies_hold_slots()
+        test_rejected_requests_free_slots()
+        test_large_body()
+        print("🎉 All admission control tests passed!")
+    except AssertionError as e:
+        print(f"💥 Admission control test failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
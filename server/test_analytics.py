@@ -0,0 +1,110 @@
+import sys
+import os
+import subprocess
+from collections import Counter
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import func, select
+
+from models.database import SessionLocal
+from models.model import DailyActiveUsers, RideHourlyStat, RideRequest, UserRideStat
+from models.schemas import RideRequestCreate
+from services.analytics import backfill_rollups, hour_bucket
+from services.ride_store import SqlRideStore
+from temp_database import temp_database
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# A script that writes rides without importing services.analytics itself
+SCRIPT = """
+import sys
+sys.path.append(sys.argv[1])
+from models.database import SessionLocal
+from models.model import RideRequest
+
+db = SessionLocal()
+rides = [RideRequest(user_id=f"script_{i % 2}", source_location="A", dest_location="B") for i in range(4)]
+db.add_all(rides)
+db.commit()
+rides[0].status = "cancelled"  # set on an expired instance, without loading it first
+db.commit()
+db.close()
+"""
+
+def recompute(db):
+    """Rollups rebuilt from ride_requests: each ride entered "requested" when created and its status since"""
+    hourly, users, days = Counter(), Counter(), {}
+    for user_id, status, created_at, updated_at in db.execute(
+        select(RideRequest.user_id, RideRequest.status, RideRequest.created_at, RideRequest.updated_at)
+    ):
+        hourly[(hour_bucket(created_at), "requested")] += 1
+        if status != "requested":
+            hourly[(hour_bucket(updated_at or created_at), status)] += 1
+        users[user_id] += 1
+        days.setdefault(hour_bucket(created_at).date(), set()).add(user_id)
+    return hourly, users, {day: len(ids) for day, ids in days.items()}
+
+def stored(db):
+    hourly = Counter()
+    for hour, status, n in db.execute(
+        select(RideHourlyStat.hour, RideHourlyStat.status, func.sum(RideHourlyStat.ride_count))
+        .group_by(RideHourlyStat.hour, RideHourlyStat.status)
+    ):
+        hourly[(hour_bucket(hour), status)] += n
+    users = Counter({user_id: n for user_id, n in db.execute(select(UserRideStat.user_id, UserRideStat.ride_count))})
+    days = Counter()
+    for day, n in db.execute(select(DailyActiveUsers.day, DailyActiveUsers.active_users)):
+        days[day] += n
+    return hourly, users, dict(days)
+
+def compare(db, label):
+    expected, actual = recompute(db), stored(db)
+    names = ("hourly ride counts", "per-user ride counts", "daily active users")
+    for name, want, got in zip(names, expected, actual):
+        assert want == got, f"{label}: {name} differ: expected {dict(want)}, rollups have {dict(got)}"
+    print(f"✅ {label}: rollups match ride_requests ({sum(expected[0].values())} status entries)")
+
+def test_rollups_match_rides():
+    print("🧪 Testing ride rollups against ride_requests...")
+    with temp_database("analytics") as tmp:
+        # Writes from a process that only imported the models
+        result = subprocess.run(
+            [sys.executable, "-c", SCRIPT, SERVER_DIR],
+            env={**os.environ, "DATABASE_URL": tmp.url, "DATABASE_REPLICA_URLS": ""},
+            capture_output=True, text=True,
+        )
+        assert result.returncode == 0, f"script writing rides failed: {result.stderr.strip()}"
+
+        db = SessionLocal()
+        try:
+            store = SqlRideStore(db)
+            rides = [
+                store.create(RideRequestCreate(user_id=f"rider_{i % 3}", source_location="A", dest_location="B"))
+                for i in range(9)
+            ]
+            compare(db, "after create")
+
+            for ride, status in zip(rides, ("accepted", "completed", "cancelled", "accepted")):
+                store.update_status(ride.id, status)
+            store.update_status(rides[5].id, "requested")  # unchanged status counts nothing
+            compare(db, "after status changes")
+
+            backfill_rollups(db, chunk_size=4, progress=lambda message: None)
+            compare(db, "after backfill")
+        finally:
+            db.close()
+
+def main():
+    print("🚀 Starting ride analytics tests...")
+
+    try:
+        test_rollups_match_rides()
+        print("🎉 All ride analytics tests passed!")
+    except AssertionError as e:
+        print(f"💥 Ride analytics test failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
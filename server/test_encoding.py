@@ -0,0 +1,138 @@
+import sys
+import os
+import gzip
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import List
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, TypeAdapter
+
+from api.encoding import (
+    JSON, MSGPACK, decode, encode, identity_accepted, negotiate_encoding, negotiate_media_type,
+    negotiated_response, wrap_encoded,
+)
+import common.encoding  # the module behind api.encoding, to switch its optional libraries off
+
+class Item(BaseModel):
+    id: int
+    name: str
+    created_at: datetime
+
+ITEMS = [Item(id=i, name=f"ride {i}", created_at=datetime(2024, 1, 1, tzinfo=timezone.utc)) for i in range(200)]
+items_adapter = TypeAdapter(List[Item])
+
+app = FastAPI()
+
+@app.get("/items")
+async def list_items(request: Request, limit: int = 200):
+    return negotiated_response(request, ITEMS[:limit], adapter=items_adapter, min_compress_size=1024)
+
+client = TestClient(app)
+
+@contextmanager
+def without(name):
+    """Negotiate as if the optional library behind common.encoding.<name> were not installed"""
+    original = getattr(common.encoding, name)
+    setattr(common.encoding, name, lambda: None)
+    try:
+        yield
+    finally:
+        setattr(common.encoding, name, original)
+
+def expect(label, got, want):
+    assert got == want, f"{label}: expected {want!r}, got {got!r}"
+
+def test_accept_negotiation():
+    print("🧪 Testing Accept negotiation...")
+    expect("no Accept", negotiate_media_type(None), JSON)
+    expect("msgpack", negotiate_media_type("application/msgpack"), MSGPACK)
+    expect("x-msgpack alias", negotiate_media_type("application/x-msgpack"), MSGPACK)
+    expect("q-values", negotiate_media_type("application/msgpack;q=0.5, application/json;q=0.9"), JSON)
+    expect("q-values", negotiate_media_type("application/json;q=0.4, application/msgpack"), MSGPACK)
+    expect("refused msgpack", negotiate_media_type("application/msgpack;q=0"), JSON)
+    expect("unknown type", negotiate_media_type("text/html, */*;q=0.1"), JSON)
+    with without("_msgpack"):
+        expect("msgpack not installed", negotiate_media_type("application/msgpack"), JSON)
+    print("✅ Media types follow q-values, aliases and what is installed")
+
+def test_accept_encoding_negotiation():
+    print("🧪 Testing Accept-Encoding negotiation...")
+    expect("no header", negotiate_encoding(None), None)
+    expect("br preferred at equal weight", negotiate_encoding("gzip, br"), "br")
+    expect("q-values", negotiate_encoding("br;q=0.2, gzip;q=0.8"), "gzip")
+    expect("wildcard", negotiate_encoding("*"), "br")
+    expect("wildcard minus br", negotiate_encoding("*, br;q=0"), "gzip")
+    expect("unknown coding", negotiate_encoding("deflate"), None)
+    expect("all refused", negotiate_encoding("gzip;q=0, br;q=0"), None)
+    with without("_brotli"):
+        expect("brotli not installed", negotiate_encoding("br, gzip"), "gzip")
+        expect("brotli only, not installed", negotiate_encoding("br"), None)
+    expect("identity", identity_accepted("gzip"), True)
+    expect("identity;q=0", identity_accepted("gzip, identity;q=0"), False)
+    expect("*;q=0", identity_accepted("gzip, *;q=0"), False)
+    expect("*;q=0, identity", identity_accepted("*;q=0, identity"), True)
+    print("✅ Codings follow q-values, wildcards, identity;q=0 and what is installed")
+
+def test_responses():
+    print("🧪 Testing negotiated responses...")
+    expected = items_adapter.dump_python(ITEMS, mode="json")
+
+    plain = client.get("/items", headers={"Accept-Encoding": "identity"})
+    expect("JSON body", plain.json(), expected)
+    expect("uncompressed", plain.headers.get("content-encoding"), None)
+    expect("Vary", plain.headers.get("vary"), "Accept, Accept-Encoding")
+
+    packed = client.get("/items", headers={"Accept": "application/msgpack", "Accept-Encoding": "gzip"})
+    expect("msgpack content type", packed.headers["content-type"], MSGPACK)
+    expect("gzip", packed.headers.get("content-encoding"), "gzip")
+    expect("msgpack round trip", decode(packed.content, MSGPACK), expected)
+
+    brotli = client.get("/items", headers={"Accept-Encoding": "br, gzip"})
+    expect("brotli", brotli.headers.get("content-encoding"), "br")
+    expect("brotli body", brotli.json(), expected)
+    with without("_brotli"):
+        fallback = client.get("/items", headers={"Accept-Encoding": "br, gzip"})
+    expect("brotli missing falls back to gzip", fallback.headers.get("content-encoding"), "gzip")
+
+    small = client.get("/items?limit=1", headers={"Accept-Encoding": "gzip"})
+    expect("small bodies stay uncompressed", small.headers.get("content-encoding"), None)
+    refused = client.get("/items?limit=1", headers={"Accept-Encoding": "gzip, identity;q=0"})
+    expect("identity;q=0 compresses small bodies", refused.headers.get("content-encoding"), "gzip")
+    expect("identity;q=0 body", refused.json(), expected[:1])
+    print("✅ JSON/MessagePack bodies with br/gzip as negotiated, decoded intact")
+
+def test_wrap_encoded():
+    print("🧪 Testing the client's envelope around encoded bodies...")
+    data = items_adapter.dump_python(ITEMS[:3], mode="json")
+    for media_type in (JSON, MSGPACK):
+        body = encode(ITEMS[:3], media_type, items_adapter)
+        wrapped = wrap_encoded(body, media_type, status="success")
+        expect(f"{media_type} envelope", decode(wrapped, media_type), {"status": "success", "data": data})
+        expect(f"{media_type} body passed through", wrapped.endswith(body + (b"}" if media_type == JSON else b"")), True)
+        empty = wrap_encoded(encode([], media_type), media_type)
+        expect(f"{media_type} without fields", decode(empty, media_type), {"data": []})
+    # Compressed on the way out like any other body
+    compressed = gzip.decompress(common.encoding.compress(wrap_encoded(encode(data, JSON), JSON, status="success"), "gzip"))
+    expect("compressed envelope", decode(compressed, JSON)["data"], data)
+    print("✅ Server bytes are placed in the envelope unchanged, for JSON and MessagePack")
+
+def main():
+    print("🚀 Starting response encoding tests...")
+
+    try:
+        test_accept_negotiation()
+        test_accept_encoding_negotiation()
+        test_responses()
+        test_wrap_encoded()
+        print("🎉 All response encoding tests passed!")
+    except AssertionError as e:
+        print(f"💥 Response encoding test failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+import sys
+import os
+import heapq
+import random
+import shutil
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+from config import settings
+from services import eta
+from services.eta import RoadGraph, estimate_duration_minutes, get_eta_engine, load_eta_engine
+from temp_database import temp_database
+
+SIZE = 9  # SIZE x SIZE grid, small enough to check every pair
+ORIGIN = (12.97, 77.59)
+SPACING_DEG = 0.001
+
+def write_graph(path, seed=5):
+    """A jittered grid with one-way streets, missing blocks and one node nothing reaches"""
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        f.write("# test grid\n")
+        for r in range(SIZE):
+            for c in range(SIZE):
+                lat = ORIGIN[0] + (r + rng.uniform(-0.2, 0.2)) * SPACING_DEG
+                lon = ORIGIN[1] + (c + rng.uniform(-0.2, 0.2)) * SPACING_DEG
+                f.write(f"N n{r}_{c} {lat:.6f} {lon:.6f}\n")
+        f.write(f"N island {ORIGIN[0] + 0.002:.6f} {ORIGIN[1] - 0.002:.6f}\n")
+        for r in range(SIZE):
+            for c in range(SIZE):
+                for r2, c2 in ((r, c + 1), (r + 1, c)):
+                    if r2 >= SIZE or c2 >= SIZE or rng.random() < 0.1:
+                        continue
+                    oneway = 1 if rng.random() < 0.25 else 0
+                    f.write(f"E n{r}_{c} n{r2}_{c2} {rng.uniform(8, 30):.2f} {oneway}\n")
+
+def dijkstra(graph, source, reverse=False):
+    """Plain Dijkstra over the CSR arrays: times from source to every reachable node"""
+    offsets, targets, weights = (
+        (graph.rev_offsets, graph.rev_targets, graph.rev_weights) if reverse
+        else (graph.offsets, graph.targets, graph.weights)
+    )
+    dist = {source: 0.0}
+    heap = [(0.0, source)]
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        for i in range(offsets[u], offsets[u + 1]):
+            v, nd = targets[i], d + weights[i]
+            if nd < dist.get(v, float("inf")):
+                dist[v] = nd
+                heapq.heappush(heap, (nd, v))
+    return dist
+
+def close(a, b):
+    return (a is None and b is None) or (a is not None and b is not None and abs(a - b) < 1e-6)
+
+def load_graphs(tmp_dir):
+    """The test grid twice: plain, and with a contraction hierarchy"""
+    path = os.path.join(tmp_dir, "roads.txt")
+    write_graph(path)
+    plain = RoadGraph.from_file(path, use_cache=False)
+    with_hierarchy = RoadGraph.from_file(path, use_cache=False)
+    with_hierarchy.build_hierarchy()
+    return plain, with_hierarchy
+
+def test_point_to_point():
+    print("🧪 Testing A* and contraction hierarchy routes against Dijkstra...")
+    tmp_dir = tempfile.mkdtemp(prefix="miniuber_eta_")
+    try:
+        plain, with_hierarchy = load_graphs(tmp_dir)
+        routers = (("A*", plain), ("hierarchy", with_hierarchy.hierarchy))
+        nodes = range(plain.node_count)
+        unreachable = 0
+        for source in nodes:
+            expected = dijkstra(plain, source)
+            for target in nodes:
+                want = expected.get(target)
+                unreachable += want is None
+                for name, router in routers:
+                    got = router.shortest_time(source, target)
+                    assert close(got, want), f"{name} {source} -> {target}: {got}, Dijkstra says {want}"
+        assert unreachable, "the test graph should have unreachable pairs"
+        print(f"✅ A* and the hierarchy agree with Dijkstra on all {len(nodes) ** 2} pairs "
+              f"({unreachable} unreachable)")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+def test_one_to_many():
+    print("🧪 Testing one-to-many searches against Dijkstra...")
+    tmp_dir = tempfile.mkdtemp(prefix="miniuber_eta_")
+    try:
+        plain, with_hierarchy = load_graphs(tmp_dir)
+        rng = random.Random(9)
+        nodes = list(range(plain.node_count))
+        for source in rng.sample(nodes, 15):
+            targets = rng.sample(nodes, 25)
+            for reverse in (False, True):
+                expected = dijkstra(plain, source, reverse=reverse)
+                want = {t: expected[t] for t in targets if t in expected}
+                for name, router in (("A* graph", plain), ("hierarchy", with_hierarchy.hierarchy)):
+                    got = router.times_from(source, targets, reverse=reverse)
+                    assert got.keys() == want.keys() and all(close(got[t], want[t]) for t in want), \
+                        f"{name} times_from({source}, reverse={reverse}): {got}, Dijkstra says {want}"
+        print("✅ times_from matches Dijkstra forwards and backwards, for both routers")
+
+        # Through the engine: coordinates snap to nodes, and the batch matches single queries
+        engine = eta.EtaEngine(with_hierarchy, cache_size=0)  # the cell cache would answer neighbours alike
+        lat, lon = with_hierarchy.lats[0], with_hierarchy.lons[0]
+        points = [(with_hierarchy.lats[v], with_hierarchy.lons[v]) for v in nodes]
+        batch = engine.eta_one_to_many(lat, lon, points)
+        single = [engine.eta_seconds(lat, lon, p_lat, p_lon) for p_lat, p_lon in points]
+        assert all(close(a, b) for a, b in zip(batch, single)), "one-to-many ETAs differ from point-to-point ones"
+        print(f"✅ eta_one_to_many agrees with eta_seconds for {len(points)} points")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+def test_cache_round_trip():
+    print("🧪 Testing the .csr cache...")
+    tmp_dir = tempfile.mkdtemp(prefix="miniuber_eta_")
+    try:
+        path = os.path.join(tmp_dir, "roads.txt")
+        write_graph(path)
+        graph = RoadGraph.from_file(path)
+        graph.build_hierarchy()
+        graph.save_cache(path + ".csr")
+        cached = RoadGraph.from_file(path)
+        assert cached.hierarchy is not None, "the hierarchy should be loaded from the cache"
+        for source in range(0, graph.node_count, 7):
+            for target in range(graph.node_count):
+                assert close(cached.hierarchy.shortest_time(source, target), graph.shortest_time(source, target))
+        print("✅ A cached graph and hierarchy answer like the parsed one")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+def test_bad_graph_disables_etas():
+    print("🧪 Testing that a graph that can't be loaded disables ETAs instead of failing...")
+    tmp_dir = tempfile.mkdtemp(prefix="miniuber_eta_")
+    saved = settings.ROAD_GRAPH_PATH
+    try:
+        # The cache can't be written (a directory is in the way): the parsed graph is still used
+        path = os.path.join(tmp_dir, "roads.txt")
+        os.mkdir(path + ".csr")
+        os.utime(path + ".csr", (0, 0))
+        write_graph(path)
+        settings.ROAD_GRAPH_PATH = path
+        assert load_eta_engine() is not None, "an unwritable cache should not stop the graph from loading"
+        print("✅ An unwritable .csr cache is skipped")
+
+        bad = os.path.join(tmp_dir, "bad.txt")
+        with open(bad, "w") as f:
+            f.write("N a 12.97 77.59\nX not a record\n")
+        settings.ROAD_GRAPH_PATH = bad
+        parses = []
+        parse = RoadGraph.from_file.__func__
+        RoadGraph.from_file = classmethod(lambda cls, *args, **kw: parses.append(args) or parse(cls, *args, **kw))
+        try:
+            assert load_eta_engine() is None, "a graph that fails to parse should leave no engine"
+            estimates = [estimate_duration_minutes(12.97, 77.59, 12.975, 77.595) for _ in range(3)]
+            assert get_eta_engine() is None and estimates == [None] * 3, f"estimates without a graph: {estimates}"
+        finally:
+            RoadGraph.from_file = classmethod(parse)
+        assert len(parses) == 1, f"a failed load should not be retried, the graph was parsed {len(parses)} times"
+        print("✅ A parse error disables ETAs once, and estimates come back as None")
+    finally:
+        settings.ROAD_GRAPH_PATH = saved
+        load_eta_engine()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+def test_ride_creation_fills_duration():
+    print("🧪 Testing estimated_duration on ride creation...")
+    graph_dir = tempfile.mkdtemp(prefix="miniuber_eta_")
+    saved = settings.ROAD_GRAPH_PATH
+    try:
+        with temp_database("eta"):
+            settings.ADMISSION_CONTROL_ENABLED = False
+            settings.USE_POSTGRES = True
+            settings.ROAD_GRAPH_PATH = os.path.join(graph_dir, "roads.txt")
+            write_graph(settings.ROAD_GRAPH_PATH)
+            eta._engine_loaded = False  # as in a fresh worker: the startup hook loads it
+            import main
+
+            ride = {
+                "user_id": "rider_1", "source_location": "A", "dest_location": "B",
+                "source_latitude": ORIGIN[0], "source_longitude": ORIGIN[1],
+                "dest_latitude": ORIGIN[0] + 0.007, "dest_longitude": ORIGIN[1] + 0.007,
+            }
+            with TestClient(main.app) as client:
+                assert eta._engine_loaded, "the startup hook should load the road graph"
+                response = client.post("/api/v1/ride-request", json=ride)
+                assert response.status_code == 200, response.text
+                minutes = response.json()["estimated_duration"]
+                engine = get_eta_engine()
+                seconds = engine.eta_seconds(ORIGIN[0], ORIGIN[1], ORIGIN[0] + 0.007, ORIGIN[1] + 0.007)
+                assert minutes is not None and minutes == max(1, -(-seconds // 60)), \
+                    f"estimated_duration {minutes} for an ETA of {seconds}s"
+                print(f"✅ A ride across the grid got estimated_duration={minutes} min")
+
+                settings.ROAD_GRAPH_PATH = os.path.join(graph_dir, "missing.txt")
+                load_eta_engine()
+                response = client.post("/api/v1/ride-request", json=ride)
+                assert response.status_code == 200 and response.json()["estimated_duration"] is None, response.text
+                print("✅ Without a road graph the ride is still created, with no estimate")
+    finally:
+        settings.ROAD_GRAPH_PATH = saved
+        load_eta_engine()
+        shutil.rmtree(graph_dir, ignore_errors=True)
+
+def main():
+    print("🚀 Starting ETA tests...")
+    try:
+        test_point_to_point()
+        test_one_to_many()
+        test_cache_round_trip()
+        test_bad_graph_disables_etas()
+        test_ride_creation_fills_duration()
+        print("🎉 All ETA tests passed!")
+    except AssertionError as e:
+        print(f"💥 ETA test failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
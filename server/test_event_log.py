@@ -0,0 +1,156 @@
+import sys
+import os
+import multiprocessing
+import shutil
+import tempfile
+from datetime import datetime, timezone
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import settings
+from services import event_log
+from services.event_log import RECORD_HEADER, EventLog, LogReader, encode_event, list_segments, publish_ride_event
+
+WRITERS = 4
+EVENTS_PER_WRITER = 500
+SEGMENT_BYTES = 8 * 1024  # small, so writers roll segments under each other
+
+def event(ride_id, status="requested"):
+    return encode_event("created", ride_id, f"user_{ride_id % 7}", status, datetime.now(timezone.utc))
+
+def writer(directory, writer_id):
+    log = EventLog(directory, segment_bytes=SEGMENT_BYTES, sync=True)
+    for i in range(EVENTS_PER_WRITER):
+        log.append(event(writer_id * 100000 + i))
+    log.close()
+
+def test_multiprocess_appends():
+    print("🧪 Testing appends from several processes...")
+    directory = tempfile.mkdtemp(prefix="miniuber_event_log_")
+    try:
+        ctx = multiprocessing.get_context("fork")
+        procs = [ctx.Process(target=writer, args=(directory, w)) for w in range(WRITERS)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        assert all(p.exitcode == 0 for p in procs), f"writer processes failed: {[p.exitcode for p in procs]}"
+
+        reader = LogReader(directory)
+        events = list(reader.events())
+        reader.close()
+        ids = [e.ride_id for e in events]
+        assert sorted(ids) == sorted(w * 100000 + i for w in range(WRITERS) for i in range(EVENTS_PER_WRITER)), \
+            f"read {len(ids)} events ({len(set(ids))} distinct), expected {WRITERS * EVENTS_PER_WRITER}"
+        for w in range(WRITERS):
+            own = [i for i in ids if i // 100000 == w]
+            assert own == sorted(own), f"writer {w}'s events are out of order"
+        offsets = [e.offset for e in events]
+        assert offsets == sorted(set(offsets)), "offsets are not strictly increasing"
+
+        segments = list_segments(directory)
+        record_size = RECORD_HEADER.size + len(event(0))
+        sizes = [os.path.getsize(os.path.join(directory, f"{base:020d}.log")) for base in segments]
+        bases_match = all(segments[i] + sizes[i] == segments[i + 1] for i in range(len(segments) - 1))
+        assert len(segments) >= 2 and bases_match and max(sizes[:-1]) < SEGMENT_BYTES + record_size, \
+            f"segments should roll at {SEGMENT_BYTES} bytes and be named by offset: {list(zip(segments, sizes))}"
+        print(f"✅ {len(events)} events from {WRITERS} processes across {len(segments)} segments, none lost or torn")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def test_resume_from_offset():
+    print("🧪 Testing resume from an offset...")
+    directory = tempfile.mkdtemp(prefix="miniuber_event_log_")
+    try:
+        log = EventLog(directory, segment_bytes=SEGMENT_BYTES, sync=False)
+        appended = [log.append(event(i)) for i in range(1000)]
+        log.close()
+
+        reader = LogReader(directory)
+        first = reader.read(max_records=700)
+        resume_at = reader.position
+        reader.close()
+
+        resumed = LogReader(directory, offset=resume_at)
+        rest = list(resumed.events())
+        resumed.close()
+
+        assert [offset for offset, _ in first] == appended[:700], "offsets read back differ from the ones append() returned"
+        assert [e.offset for e in rest] == appended[700:] and [e.ride_id for e in rest] == list(range(700, 1000)), \
+            f"resuming at {resume_at} should yield events 700..999, got {len(rest)} events"
+        print(f"✅ A new reader at offset {resume_at} picked up exactly the remaining {len(rest)} events")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def test_torn_tail_recovery():
+    print("🧪 Testing recovery from a torn tail...")
+    directory = tempfile.mkdtemp(prefix="miniuber_event_log_")
+    try:
+        log = EventLog(directory, sync=True)
+        for i in range(10):
+            log.append(event(i))
+        end = log.end_offset()
+        log.close()
+
+        # A crash part way through the next record: full header, half the payload
+        payload = event(10)
+        segment = os.path.join(directory, f"{list_segments(directory)[-1]:020d}.log")
+        with open(segment, "ab") as f:
+            f.write(RECORD_HEADER.pack(len(payload), 0) + payload[:len(payload) // 2])
+
+        reader = LogReader(directory)
+        before = [e.ride_id for e in reader.events()]
+        reader.close()
+        assert before == list(range(10)), f"readers should stop before the torn record, got {before}"
+
+        log = EventLog(directory, sync=True)
+        offset = log.append(event(11, status="accepted"))
+        log.close()
+        assert offset == end and os.path.getsize(segment) == end + RECORD_HEADER.size + len(event(11, status="accepted")), \
+            f"reopening should truncate the torn record: next offset {offset}, expected {end}"
+
+        reader = LogReader(directory)
+        after = [(e.ride_id, e.status) for e in reader.events()]
+        reader.close()
+        assert after == [(i, "requested") for i in range(10)] + [(11, "accepted")], f"unexpected events after recovery: {after}"
+        print(f"✅ Torn record dropped on reopen, next append landed at offset {offset}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def test_unopenable_log_is_skipped():
+    print("🧪 Testing that a log directory that can't be opened doesn't fail the request...")
+    directory = tempfile.mkdtemp(prefix="miniuber_event_log_")
+    saved = settings.EVENT_LOG_DIR
+    try:
+        # A file where the log directory should be: creating the appender raises OSError
+        blocker = os.path.join(directory, "not_a_directory")
+        open(blocker, "w").close()
+        settings.EVENT_LOG_DIR = os.path.join(blocker, "events")
+        event_log._log = None
+
+        class Ride:
+            id, user_id, status, created_at = 1, "user_1", "requested", None
+
+        assert publish_ride_event("created", Ride()) is None, "publishing should be skipped when the log can't be opened"
+        print("✅ An unopenable EVENT_LOG_DIR is logged and skipped")
+    finally:
+        settings.EVENT_LOG_DIR = saved
+        event_log._log = None
+        shutil.rmtree(directory, ignore_errors=True)
+
+def main():
+    print("🚀 Starting event log tests...")
+
+    try:
+        test_multiprocess_appends()
+        test_resume_from_offset()
+        test_torn_tail_recovery()
+        test_unopenable_log_is_skipped()
+        print("🎉 All event log tests passed!")
+    except AssertionError as e:
+        print(f"💥 Event log test failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import sys
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import func, update
+
+from config import settings
+from models import database
+from models.database import SessionLocal
+from models.model import RideHourlyStat, RideRequest
+from models.schemas import RideRequestCreate
+from services.expiry import ExpirySweeper, parse_ttls
+from services.ride_store import SqlRideStore, memory_store
+from temp_database import temp_database
+
+HOUR = timedelta(hours=1)
+
+def seed(store, fresh, stale, status="requested"):
+    """fresh + stale rides in status; the stale ones last changed two hours ago"""
+    rides = [
+        store.create(RideRequestCreate(user_id=f"rider_{i}", source_location="A", dest_location="B"))
+        for i in range(fresh + stale)
+    ]
+    for ride in rides:
+        if ride.status != status:
+            store.update_status(ride.id, status)
+    stale_ids = [ride.id for ride in rides[fresh:]]
+    past = datetime.now(timezone.utc) - 2 * HOUR
+    if settings.USE_POSTGRES:
+        store.db.execute(update(RideRequest).where(RideRequest.id.in_(stale_ids)).values(created_at=past, updated_at=past))
+        store.db.commit()
+    else:
+        for ride_id in stale_ids:
+            ride = store.get(ride_id)
+            ride.created_at = past
+            ride.updated_at = past if ride.updated_at else None
+    return stale_ids
+
+def check_sweep(backend, store):
+    stale_requested = seed(store, fresh=20, stale=120)
+    stale_completed = seed(store, fresh=5, stale=30, status="completed")
+
+    sweeper = ExpirySweeper({"requested": HOUR.total_seconds(), "completed": HOUR.total_seconds()},
+                            batch_size=50, max_batches=2)
+    first = sweeper.sweep()
+    second = sweeper.sweep()
+    assert first == {"requested": 100, "completed": 30} and second == {"requested": 20, "completed": 0}, \
+        f"{backend}: sweeps should be bounded to batch_size * max_batches: {first}, {second}"
+    print(f"✅ {backend}: expired {first} then {second} in bounded batches")
+
+    active_ids = {ride.id for ride in store.list()}
+    expired_ids = set(stale_requested) | set(stale_completed)
+    assert not active_ids & expired_ids and len(active_ids) == 25, \
+        f"{backend}: {len(active_ids & expired_ids)} expired rides still listed, {len(active_ids)} active"
+    assert all(store.get(i) is None for i in expired_ids), f"{backend}: expired rides are still readable as active"
+    print(f"✅ {backend}: expired rides left the active set, fresh ones stayed")
+
+    stats = sweeper.to_dict()
+    assert stats["sweeps"] == 2 and stats["expired_total"] == {"requested": 120, "completed": 30} \
+        and stats["duration"]["count"], f"{backend}: unexpected sweeper metrics {stats}"
+    print(f"✅ {backend}: metrics {stats['expired_total']}, last sweep {stats['last_sweep']['duration_ms']}ms")
+
+def test_sql_sweep():
+    print("🧪 Testing expiry on the SQL store...")
+    with temp_database("expiry"):
+        settings.USE_POSTGRES = True
+        db = SessionLocal()
+        try:
+            check_sweep("sql", SqlRideStore(db))
+            db.expire_all()
+            rows = db.query(RideRequest.status, RideRequest.is_active, func.count()).group_by(
+                RideRequest.status, RideRequest.is_active).all()
+            cancelled = {(status, active): n for status, active, n in rows}.get(("cancelled", False), 0)
+            rollup = db.query(func.sum(RideHourlyStat.ride_count)).filter(RideHourlyStat.status == "cancelled").scalar()
+        finally:
+            db.close()
+    assert cancelled == 120 and rollup == 120, \
+        f"sql: expected 120 cancelled rides and rollup count, got {cancelled} / {rollup}"
+    print("✅ sql: expired requests are cancelled and counted in the rollups")
+
+def test_sql_sweep_without_rollups():
+    print("🧪 Testing expiry on a database without ride rollups...")
+    with temp_database("expiry"):
+        settings.USE_POSTGRES = True
+        db = SessionLocal()
+        try:
+            store = SqlRideStore(db)
+            seed(store, fresh=0, stale=10)
+            database._rollups_enabled = False  # as on a dialect without INSERT ... ON CONFLICT
+            expired = store.expire_stale("requested", datetime.now(timezone.utc) - HOUR, 50)
+            rollup = db.query(func.sum(RideHourlyStat.ride_count)).filter(RideHourlyStat.status == "cancelled").scalar()
+        finally:
+            db.close()
+    assert expired == 10 and rollup is None, f"expired {expired} rides, rollups counted {rollup} cancellations"
+    print("✅ sql: with rollups off, the sweep leaves them alone like the flush hook does")
+
+def test_memory_sweep():
+    print("🧪 Testing expiry on the memory store...")
+    with temp_database("expiry"):
+        settings.USE_POSTGRES = False
+        check_sweep("memory", memory_store)
+        cancelled = sum(row["ride_count"] for row in memory_store.rollups.hourly(
+            datetime.now(timezone.utc) - HOUR, datetime.now(timezone.utc) + HOUR, status="cancelled"))
+    assert cancelled == 120, f"memory: rollups counted {cancelled} cancellations"
+    print("✅ memory: expired requests are counted in the rollups")
+
+def test_concurrent_sweepers():
+    print("🧪 Testing sweepers in parallel...")
+    with temp_database("expiry"):
+        settings.USE_POSTGRES = True
+        db = SessionLocal()
+        try:
+            stale = seed(SqlRideStore(db), fresh=0, stale=600)
+        finally:
+            db.close()
+
+        sweepers = [ExpirySweeper({"requested": HOUR.total_seconds()}, batch_size=25, max_batches=100) for _ in range(4)]
+        threads = [threading.Thread(target=s.sweep) for s in sweepers]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    total = sum(s.to_dict()["expired_total"]["requested"] for s in sweepers)
+    assert total == len(stale), f"{len(sweepers)} sweepers expired {total} rides, expected each of {len(stale)} exactly once"
+    print(f"✅ {len(sweepers)} sweepers expired {total} rides between them, each once")
+
+def test_parse_ttls():
+    print("🧪 Testing RIDE_EXPIRY_TTLS parsing...")
+    parsed = parse_ttls("requested=1800, accepted=21600,completed=0")
+    assert parsed == {"requested": 1800.0, "accepted": 21600.0}, f"unexpected TTLs {parsed}"
+    try:
+        parse_ttls("pending=60")
+        raise AssertionError("an unknown status should be rejected")
+    except ValueError:
+        pass
+    print("✅ TTLs parsed")
+
+def main():
+    print("🚀 Starting ride expiry tests...")
+
+    try:
+        test_parse_ttls()
+        test_sql_sweep()
+        test_sql_sweep_without_rollups()
+        test_memory_sweep()
+        test_concurrent_sweepers()
+        print("🎉 All ride expiry tests passed!")
+    except AssertionError as e:
+        print(f"💥 Ride expiry test failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
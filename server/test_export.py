@@ -0,0 +1,136 @@
+import sys
+import os
+import csv
+import json
+import subprocess
+from datetime import datetime, timedelta, timezone
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import insert
+
+from models.database import SessionLocal, get_engine
+from models.model import RideRequest
+from services.export import export_to_file
+from services.ride_store import SqlRideStore
+from temp_database import temp_database
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+ROWS = 2500
+
+class Interrupted(Exception):
+    pass
+
+def seed(rows: int):
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    statuses = ["requested", "accepted", "completed", "cancelled"]
+    with get_engine().begin() as conn:
+        conn.execute(insert(RideRequest.__table__), [{
+            "user_id": f"user_{i % 40}",
+            "source_location": "123 Main St",
+            "dest_location": "456 Oak Ave",
+            "status": statuses[i % 4],
+            "is_active": True,
+            "created_at": base + timedelta(minutes=i),
+        } for i in range(rows)])
+
+def run_cli(url, *args):
+    """export_rides.py in its own process, on the default (memory) backend setting"""
+    env = {**os.environ, "DATABASE_URL": url, "DATABASE_REPLICA_URLS": "", "USE_POSTGRES": "false"}
+    return subprocess.run([sys.executable, "export_rides.py", *args], cwd=SERVER_DIR, env=env,
+                          capture_output=True, text=True)
+
+def interrupt_after(calls: int):
+    """A progress callback that fails on its calls-th call, after that checkpoint was saved"""
+    seen = []
+
+    def progress(state):
+        seen.append(state["rows"])
+        if len(seen) == calls:
+            raise Interrupted()
+    return progress
+
+def export_partially(path, fmt, calls, **kw):
+    db = SessionLocal(read_only=True)
+    try:
+        export_to_file(SqlRideStore(db), path, fmt=fmt, progress=interrupt_after(calls), **kw)
+    except Interrupted:
+        pass
+    finally:
+        db.close()
+
+def read_csv_ids(path):
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        return [int(row[header.index("id")]) for row in reader]
+
+def check_ids(label, ids):
+    assert sorted(ids) == list(range(1, ROWS + 1)), \
+        f"{label}: {len(ids)} rows, {len(set(ids))} distinct, expected ids 1..{ROWS} once each"
+    print(f"✅ {label}: {len(ids)} rows, each ride once")
+
+def check_cli_reads_database(tmp_dir, url):
+    print("🧪 Testing export_rides.py against a seeded table...")
+    output = os.path.join(tmp_dir, "full.csv")
+    result = run_cli(url, output, "--chunk-size", "300")
+    assert result.returncode == 0, f"export failed: {result.stdout}{result.stderr}"
+    with open(output + ".checkpoint") as f:
+        checkpoint = json.load(f)
+    assert checkpoint["complete"] and checkpoint["rows"] == ROWS, \
+        f"checkpoint should record a complete export of {ROWS} rows: {checkpoint}"
+    check_ids("CSV export with USE_POSTGRES=false", read_csv_ids(output))
+
+def check_csv_resume(tmp_dir, url):
+    print("🧪 Testing CSV resume from a checkpoint...")
+    output = os.path.join(tmp_dir, "resumed.csv")
+    export_partially(output, "csv", calls=3, chunk_size=300)
+    with open(output + ".checkpoint") as f:
+        checkpoint = json.load(f)
+    assert not checkpoint["complete"] and checkpoint["rows"] == 900, f"expected a checkpoint at 900 rows, got {checkpoint}"
+    # A chunk written after the last checkpoint, cut off mid-row
+    with open(output, "ab") as f:
+        f.write(b"901,user_0,123 Main St,456 Oa")
+
+    result = run_cli(url, output, "--chunk-size", "300", "--resume")
+    assert result.returncode == 0, f"resumed export failed: {result.stdout}{result.stderr}"
+    check_ids("CSV resumed after 900 rows", read_csv_ids(output))
+
+def check_parquet_resume(tmp_dir, url):
+    print("🧪 Testing Parquet resume from a checkpoint...")
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("⚠️  pyarrow not installed, skipping Parquet export")
+        return
+    output = os.path.join(tmp_dir, "resumed.parquet")
+    options = ["--chunk-size", "250", "--row-group-size", "500", "--rows-per-part", "1000"]
+    export_partially(output, "parquet", calls=1, chunk_size=250, row_group_size=500, rows_per_part=1000)
+    parts = sorted(os.listdir(output))
+    result = run_cli(url, output, "--format", "parquet", *options, "--resume")
+    assert result.returncode == 0, f"resumed export failed: {result.stdout}{result.stderr}"
+    ids = pq.read_table(output, columns=["id"]).column("id").to_pylist()
+    assert parts == ["part-00000.parquet"] and sorted(os.listdir(output)) == [f"part-0000{i}.parquet" for i in range(3)], \
+        f"expected one part before and three after resuming: {parts}, {sorted(os.listdir(output))}"
+    check_ids("Parquet resumed after one part", ids)
+
+def test_export():
+    with temp_database("export") as tmp:
+        seed(ROWS)
+        check_cli_reads_database(tmp.directory, tmp.url)
+        check_csv_resume(tmp.directory, tmp.url)
+        check_parquet_resume(tmp.directory, tmp.url)
+
+def main():
+    print("🚀 Starting ride export tests...")
+
+    try:
+        test_export()
+        print("🎉 All ride export tests passed!")
+    except AssertionError as e:
+        print(f"💥 Ride export test failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import sys
+import os
+import math
+import random
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import geohash
+from models.database import SessionLocal
+from models.schemas import RideRequestCreate
+from services.ride_service import NEARBY_FIRST_PASS, RideService
+from services.ride_store import MemoryRideStore, SqlRideStore
+from temp_database import temp_database
+
+SAMPLES = 400
+
+def destination(lat, lon, bearing, meters):
+    """The point `meters` from (lat, lon) along `bearing` (radians) on the sphere"""
+    d = meters / geohash.EARTH_RADIUS_M
+    p1, l1 = math.radians(lat), math.radians(lon)
+    p2 = math.asin(math.sin(p1) * math.cos(d) + math.cos(p1) * math.sin(d) * math.cos(bearing))
+    l2 = l1 + math.atan2(math.sin(bearing) * math.sin(d) * math.cos(p1), math.cos(d) - math.sin(p1) * math.sin(p2))
+    return math.degrees(p2), (math.degrees(l2) + 540.0) % 360.0 - 180.0
+
+def in_ranges(value, ranges):
+    return any(low <= value and (high is None or value < high) for low, high in ranges)
+
+def points_within(rng, lat, lon, radius_m):
+    """Points spread over the circle, plus a ring just inside its edge"""
+    points = [destination(lat, lon, rng.uniform(0, 2 * math.pi), radius_m * math.sqrt(rng.random()))
+              for _ in range(SAMPLES)]
+    points += [destination(lat, lon, 2 * math.pi * i / SAMPLES, radius_m * 0.999) for i in range(SAMPLES)]
+    return points
+
+# (label, lat, lon, radius_m)
+CIRCLES = [
+    ("city centre", 12.9716, 77.5946, 2000),
+    # Exactly on the boundary between cells, at every precision cover() picks
+    ("cell corner", 0.0, 0.0, 500),
+    ("cell edge", 45.0, 22.5, 3000),
+    ("antimeridian, east side", -16.5, 179.999, 5000),
+    ("antimeridian, west side", 65.0, -179.99, 20000),
+    ("on the antimeridian", 0.0, 180.0, 1000),
+    ("near the north pole", 89.95, 30.0, 20000),
+    ("over the north pole", 89.8, 30.0, 25000),
+    ("on the south pole", -90.0, 0.0, 3000),
+    ("high latitude, wide", 80.0, 100.0, 100000),
+]
+
+def test_cover_contains_circle():
+    print("🧪 Testing that cover/prefix_ranges contain every point in the circle...")
+    rng = random.Random(7)
+    for label, lat, lon, radius_m in CIRCLES:
+        cells = geohash.cover(lat, lon, radius_m)
+        ranges = geohash.prefix_ranges(cells)
+        points = points_within(rng, lat, lon, radius_m)
+        missed = [(round(p_lat, 5), round(p_lon, 5)) for p_lat, p_lon in points
+                  if not in_ranges(geohash.encode(p_lat, p_lon), ranges)]
+        assert len(cells) <= 64 and not missed, \
+            f"{label}: {len(cells)} cells miss {len(missed)}/{len(points)} points, e.g. {missed[:3]}"
+        print(f"✅ {label}: {len(cells)} cells, {len(ranges)} ranges hold all {len(points)} points")
+
+def test_prefix_ranges():
+    print("🧪 Testing prefix ranges at the edges of the alphabet...")
+    rng = random.Random(3)
+    cases = [["zz"], ["y", "z"], ["0z", "1"], ["bz", "c0"], ["b", "bc"], ["9z", "b0", "b2"], ["z", "zzz", "0"]]
+    for cells in cases:
+        ranges = geohash.prefix_ranges(cells)
+        # Hashes inside and just outside each cell, at the stored length
+        hashes = [cell + "".join(rng.choice(geohash.BASE32) for _ in range(geohash.PRECISION - len(cell)))
+                  for cell in cells for _ in range(50)]
+        hashes += [edge.ljust(geohash.PRECISION, fill) for cell in cells
+                   for edge in (cell, geohash.successor(cell) or "") if edge for fill in "0z"]
+        wrong = [h for h in hashes if in_ranges(h, ranges) != h.startswith(tuple(cells))]
+        assert not wrong and all(low < high for low, high in ranges if high is not None), \
+            f"prefix_ranges({cells}) = {ranges} misclassifies {wrong[:3]}"
+    assert geohash.prefix_ranges(["zz"]) == [("zz", None)] and geohash.prefix_ranges(["0z", "1"]) == [("0z", "2")], \
+        "'z' prefixes should have no upper bound, and neighbouring cells should merge"
+    print("✅ Ranges match exactly the hashes in their cells, including 'z' prefixes with no upper bound")
+
+def add_rides(store, rng, lat, lon, count, radius_m):
+    for i in range(count):
+        p_lat, p_lon = destination(lat, lon, rng.uniform(0, 2 * math.pi), radius_m * math.sqrt(rng.random()))
+        store.create(RideRequestCreate(
+            user_id=f"rider_{i % 5}", source_location="A", dest_location="B",
+            source_latitude=p_lat, source_longitude=p_lon,
+        ))
+
+def brute_force(rides, lat, lon, radius_m, limit):
+    within = sorted((geohash.haversine_m(lat, lon, r.source_latitude, r.source_longitude), r.id) for r in rides)
+    return [ride_id for distance, ride_id in within if distance <= radius_m][:limit]
+
+def check_two_pass(label, store, rides):
+    service = RideService(None, store=store)
+    # Dense: the first pass (radius_m / NEARBY_FIRST_PASS) alone fills the limit
+    # Sparse: it doesn't, so the full radius is searched
+    for case, lat, lon, radius_m, limit in (
+        ("dense", 12.9716, 77.5946, 4000, 20),
+        ("sparse", 12.9716, 77.5946, 4000, 400),
+        ("antimeridian", 0.0, 179.995, 4000, 200),
+    ):
+        first_pass = store.near(lat, lon, radius_m / NEARBY_FIRST_PASS, ["requested"], limit)
+        found = service.find_nearby_rides(lat, lon, radius_m, ["requested"], limit)
+        want = brute_force(rides, lat, lon, radius_m, limit)
+        got = [ride.id for ride, _ in found]
+        distances = [meters for _, meters in found]
+        assert got == want and distances == sorted(distances), \
+            f"{label}, {case}: found {len(got)} rides, brute force finds {len(want)}"
+        passes = "first pass only" if len(first_pass) >= limit else "both passes"
+        print(f"✅ {label}, {case}: {len(got)} closest rides match brute force ({passes})")
+
+def seed(store):
+    rng = random.Random(11)
+    add_rides(store, rng, 12.9716, 77.5946, 300, 800)  # dense core
+    add_rides(store, rng, 12.9716, 77.5946, 200, 4500)  # sparse ring, some outside the radius
+    add_rides(store, rng, 0.0, 180.0, 150, 4500)  # both sides of the antimeridian
+
+def test_find_nearby_memory():
+    print("🧪 Testing find_nearby_rides on the memory store...")
+    store = MemoryRideStore()
+    seed(store)
+    check_two_pass("memory", store, store._rows)
+
+def test_find_nearby_sql():
+    print("🧪 Testing find_nearby_rides on the SQL store...")
+    with temp_database("geohash"):
+        db = SessionLocal()
+        try:
+            store = SqlRideStore(db)
+            seed(store)
+            check_two_pass("sql", store, store.list())
+        finally:
+            db.close()
+
+def main():
+    print("🚀 Starting geohash tests...")
+
+    try:
+        test_cover_contains_circle()
+        test_prefix_ranges()
+        test_find_nearby_memory()
+        test_find_nearby_sql()
+        print("🎉 All geohash tests passed!")
+    except AssertionError as e:
+        print(f"💥 Geohash test failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import sys
+import os
+import sqlite3
+import threading
+import time
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.pool import InstrumentedQueuePool
+
+def make_pool(pool_size, connect_delay=0.0, timeout=2.0):
+    """A pool of SQLite connections with max_overflow=0, so pool_size is the hard limit"""
+    def connect():
+        time.sleep(connect_delay)
+        return sqlite3.connect(":memory:", check_same_thread=False)
+    return InstrumentedQueuePool(connect, pool_size=pool_size, max_overflow=0, timeout=timeout)
+
+def test_grow_wakes_waiters():
+    print("🧪 Testing that growing the pool wakes waiting checkouts...")
+    pool = make_pool(pool_size=1)
+    held = pool.connect()
+    waited = []
+
+    def checkout():
+        started = time.perf_counter()
+        conn = pool.connect()
+        waited.append(time.perf_counter() - started)
+        conn.close()
+
+    waiter = threading.Thread(target=checkout)
+    waiter.start()
+    time.sleep(0.2)
+    pool.resize(2)
+    waiter.join()
+    held.close()
+
+    status = pool.status()
+    counts = (pool.size(), pool.checkedout(), pool.checkedin(), pool.overflow())
+    pool.dispose()
+    assert waited and waited[0] <= 1.0, f"waiter took {waited} after the pool grew (timeout is 2s)"
+    assert counts == (2, 0, 2, 0), f"inconsistent pool after growing: {status}"
+    print(f"✅ Waiter got a connection {waited[0] * 1000:.0f}ms after blocking, 200ms of which before the resize")
+
+def test_grow_without_room():
+    print("🧪 Testing that a woken waiter keeps waiting when there is still no room...")
+    pool = make_pool(pool_size=2, timeout=0.6)
+    held = [pool.connect(), pool.connect()]
+    errors = []
+
+    def checkout():
+        started = time.perf_counter()
+        try:
+            pool.connect().close()
+        except Exception as e:
+            errors.append((type(e).__name__, time.perf_counter() - started))
+
+    waiter = threading.Thread(target=checkout)
+    waiter.start()
+    time.sleep(0.1)
+    pool.resize(2)  # a resize that adds no room must not time the waiter out early
+    waiter.join()
+    for conn in held:
+        conn.close()
+    pool.dispose()
+
+    assert len(errors) == 1 and errors[0][0] == "TimeoutError" and errors[0][1] >= 0.55, \
+        f"expected a TimeoutError after the full 0.6s, got {errors}"
+    print(f"✅ Waiter timed out after {errors[0][1]:.2f}s, not at the resize")
+
+def test_shrink_closes_idle():
+    print("🧪 Testing that shrinking the pool closes surplus idle connections...")
+    pool = make_pool(pool_size=3)
+    conns = [pool.connect() for _ in range(3)]
+    for conn in conns:
+        conn.close()
+
+    pool.resize(1)
+    status = (pool.size(), pool.checkedin(), pool.overflow(), pool.checkedout())
+    assert status == (1, 1, 0, 0) and len(pool.stats.connected_at) == 1, \
+        f"expected one idle connection and no overflow: {pool.status()}, {len(pool.stats.connected_at)} open"
+    print(f"✅ {pool.status()}")
+
+    # The pool still works at its new size, and a checked out connection over it is closed on return
+    first = pool.connect()
+    pool.resize(2)
+    second = pool.connect()
+    pool.resize(1)
+    first.close()
+    second.close()
+    status, still_open = (pool.size(), pool.checkedin(), pool.overflow(), pool.checkedout()), len(pool.stats.connected_at)
+    description = pool.status()
+    pool.dispose()
+    assert status == (1, 1, 0, 0) and still_open == 1, f"connections returned after shrinking were not closed: {description}"
+    print("✅ Connections returned over the new size are closed")
+
+def test_wait_and_connect_recorded_separately():
+    print("🧪 Testing checkout wait vs connect time...")
+    pool = make_pool(pool_size=2, connect_delay=0.1)
+    conn = pool.connect()
+    conn.close()
+    conn = pool.connect()  # reuses the idle connection: no connect
+    conn.close()
+    waits, connects = pool.stats.waits.to_dict(), pool.stats.connects.to_dict()
+    pool.dispose()
+    assert waits["count"] == 2 and waits["avg_ms"] <= 50 and connects["count"] == 1 and connects["avg_ms"] >= 100, \
+        (f"slow connects should not show up as waits: waits {waits['avg_ms']}ms x{waits['count']}, "
+         f"connects {connects['avg_ms']}ms x{connects['count']}")
+    print(f"✅ Wait avg {waits['avg_ms']}ms, connect avg {connects['avg_ms']}ms")
+
+def main():
+    print("🚀 Starting connection pool tests...")
+    try:
+        test_grow_wakes_waiters()
+        test_grow_without_room()
+        test_shrink_closes_idle()
+        test_wait_and_connect_recorded_separately()
+        print("🎉 All connection pool tests passed!")
+    except AssertionError as e:
+        print(f"💥 Connection pool test failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
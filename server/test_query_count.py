@@ -0,0 +1,151 @@
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import settings
+from models.database import SessionLocal
+from models.model import User
+from services.user_service import UserProfileCache, UserService, user_cache
+from temp_database import temp_database
+
+class QueryCounter:
+    """Counts SQL statements sent by any engine while active"""
+
+    def __init__(self):
+        self.count = 0
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(Engine, "before_cursor_execute", self._before_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(Engine, "before_cursor_execute", self._before_execute)
+
+def seed(client, users, rides):
+    db = SessionLocal()
+    try:
+        existing = {u for (u,) in db.query(User.user_id)}
+        db.add_all(User(user_id=f"rider_{i}", name=f"Rider {i}") for i in range(users) if f"rider_{i}" not in existing)
+        db.commit()
+    finally:
+        db.close()
+    for i in range(rides):
+        client.post("/api/v1/ride-request", json={
+            # rider_missing has no users row: its rides come back with user = null
+            "user_id": f"rider_{i % users}" if i % 10 else "rider_missing",
+            "source_location": "A", "dest_location": "B",
+        })
+
+def list_query_counts(client, backend):
+    """Statements needed to list rides with expand=user as the table grows"""
+    counts = []
+    for rides in (10, 100, 300):
+        seed(client, users=50, rides=rides)
+        user_cache.clear()
+        with QueryCounter() as counter:
+            response = client.get("/api/v1/ride-requests", params={"expand": "user"})
+        body = response.json()
+        assert response.status_code == 200, response.text
+        assert all("user" in ride for ride in body)
+        assert all(ride["user"]["user_id"] == ride["user_id"] for ride in body if ride["user_id"] != "rider_missing")
+        assert all(ride["user"] is None for ride in body if ride["user_id"] == "rider_missing")
+        print(f"  {backend}: {len(body)} rides listed with riders in {counter.count} statements")
+        counts.append(counter.count)
+    return counts
+
+def test_constant_queries():
+    print("🧪 Testing that expand=user doesn't issue a query per ride...")
+    with temp_database("queries"):
+        # Read when main.py is imported: these tests send more requests than the per-user limits allow
+        settings.ADMISSION_CONTROL_ENABLED = False
+        import main
+
+        with TestClient(main.app) as client:
+            for backend, use_postgres in (("sql", True), ("memory", False)):
+                settings.USE_POSTGRES = use_postgres
+                counts = list_query_counts(client, backend)
+                assert len(set(counts)) == 1, f"{backend}: statement count grows with the number of rides: {counts}"
+                print(f"✅ {backend}: {counts[0]} statements regardless of size")
+
+            ride_id = client.get("/api/v1/ride-requests").json()[0]["id"]
+            single = client.get(f"/api/v1/ride-requests/{ride_id}", params={"expand": "user"}).json()
+            plain = client.get(f"/api/v1/ride-requests/{ride_id}").json()
+            assert (single.get("user") is not None or single["user_id"] == "rider_missing") and "user" not in plain, \
+                f"expand=user on a single ride: {single} / {plain}"
+            assert client.get("/api/v1/ride-requests", params={"expand": "driver"}).status_code == 400, \
+                "unknown expand values should be rejected"
+
+def test_profile_cache():
+    print("🧪 Testing the user profile cache...")
+    with temp_database("queries"):
+        settings.ADMISSION_CONTROL_ENABLED = False
+        import main
+
+        with TestClient(main.app) as client:
+            client.post("/users/", json={"user_id": "cached_user", "name": "Before"})
+            client.get("/users/cached_user")
+            with QueryCounter() as counter:
+                first = client.get("/users/cached_user").json()
+            assert counter.count == 0 and first["name"] == "Before", \
+                f"cached profile read took {counter.count} statements: {first}"
+            print("✅ Repeated GET /users/{user_id} is served from the cache")
+
+            client.patch("/users/cached_user", json={"name": "After"})
+            updated = client.get("/users/cached_user").json()
+            assert updated["name"] == "After", f"update didn't invalidate the cached profile: {updated}"
+            print("✅ Updating a user invalidates the cached profile")
+
+            assert client.get("/users/nobody").status_code == 404, "unknown user should be 404"
+            client.post("/users/", json={"user_id": "nobody", "name": "New"})
+            assert client.get("/users/nobody").status_code == 200, "a cached miss survived creating the user"
+
+def test_cache_stays_bounded():
+    print("🧪 Testing that writes alone don't grow the profile cache...")
+    with temp_database("queries"):
+        cache = UserProfileCache(max_size=100)
+        db = SessionLocal()
+        try:
+            service = UserService(db, cache=cache)
+            for i in range(1000):
+                service.create_user({"user_id": f"writer_{i}", "name": "Written"})
+                service.update_user(f"writer_{i}", {"name": "Rewritten"})
+            assert not cache._loads and not cache._entries, \
+                f"1000 unread users left {len(cache._loads)} generations, {len(cache._entries)} entries"
+            print("✅ Creating and updating 1000 unread users kept nothing in the cache")
+
+            service.get_profiles([f"writer_{i}" for i in range(300)])
+            assert len(cache._entries) == 100 and not cache._loads, f"reads should fill the cache to max_size: {cache.stats()}"
+        finally:
+            db.close()
+
+    # An update that lands while a profile is being loaded keeps the old profile out
+    generation = cache.begin_load("writer_1")
+    cache.invalidate("writer_1")
+    cache.finish_load("writer_1", generation, profile=None)
+    assert not cache.get("writer_1")[0] and not cache._loads, "a load that raced an invalidation was cached"
+    print("✅ A load that raced an invalidation is dropped, and its generation with it")
+
+def main():
+    print("🚀 Starting query count tests...")
+
+    try:
+        test_constant_queries()
+        test_profile_cache()
+        test_cache_stays_bounded()
+        print("🎉 All query count tests passed!")
+    except AssertionError as e:
+        print(f"💥 Query count test failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
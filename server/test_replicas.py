@@ -0,0 +1,84 @@
+import sys
+import os
+import shutil
+import time
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.database import Base, SessionLocal, dispose_engine, get_engine, get_replica_engines, recent_writes
+from models.model import RideRequest
+from temp_database import temp_database
+
+WINDOW = 0.5
+
+def find_ride(ride_id, user_id):
+    db = SessionLocal(read_only=True, user_id=user_id)
+    try:
+        return db.query(RideRequest).filter(RideRequest.id == ride_id).first()
+    finally:
+        db.close()
+
+def test_replica_routing():
+    print("🧪 Testing primary/replica read routing...")
+    # Local SQLite files: one is the primary, two more stand in for read replicas
+    saved_window = recent_writes.window
+    recent_writes.window = WINDOW
+    try:
+        with temp_database("replicas", replicas=2, create=False) as tmp:
+            check_replica_routing(tmp.path, tmp.replica_paths)
+    finally:
+        recent_writes.window = saved_window
+
+def check_replica_routing(primary, replicas):
+    for engine in [get_engine()] + get_replica_engines():
+        Base.metadata.create_all(bind=engine)
+
+    # Writes always go to the primary
+    db = SessionLocal()
+    ride = RideRequest(user_id="alice", source_location="123 Main St", dest_location="456 Oak Ave")
+    db.add(ride)
+    db.commit()
+    ride_id = ride.id
+    db.close()
+    print(f"✅ Wrote ride {ride_id} to the primary")
+
+    # The writer reads their own write from the primary...
+    assert find_ride(ride_id, "alice") is not None, "alice should be pinned to the primary"
+    print("✅ Read-your-writes: alice sees her ride")
+
+    # ...while everyone else reads from the (not yet replicated) replicas
+    assert find_ride(ride_id, "bob") is None, "bob should read from a replica"
+    print("✅ Other users read from replicas")
+
+    time.sleep(WINDOW)
+    assert find_ride(ride_id, "alice") is None, "alice should be back on replicas"
+    print("✅ Stickiness expires after the window")
+
+    # "Replicate" and read again
+    dispose_engine()
+    for path in replicas:
+        shutil.copyfile(primary, path)
+    assert find_ride(ride_id, "bob") is not None, "replicas should serve the ride once replicated"
+    print("✅ Replicas serve reads once caught up")
+
+    # A read-only session that writes is moved to the primary for the rest of its life
+    db = SessionLocal(read_only=True, user_id="carol")
+    db.add(RideRequest(user_id="carol", source_location="A", dest_location="B"))
+    db.commit()
+    count = db.query(RideRequest).count()
+    db.close()
+    assert count == 2, f"expected to read back from the primary, got {count} rides"
+    print("✅ Sessions that write stay on the primary")
+
+def main():
+    print("🚀 Starting Mini Uber Replica Routing Tests...")
+    try:
+        test_replica_routing()
+        print("🎉 All replica routing tests passed!")
+    except AssertionError as e:
+        print(f"💥 Replica routing test failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()